@@ -27,6 +27,10 @@
 from test.json_io.test_json_importer import TestJsonImporter  # NOQA 
 from test.json_io.test_json_exporter import TestJsonExporter # NOQA 
 from test.json_io.test_json_spread_sheet import TestJsonSpreadSheet # NOQA
+from test.json_io.test_json_manifest import TestJsonManifest # NOQA
+from test.json_io.test_json_import_worker_pool import TestJsonImportWorkerPool # NOQA
+from test.json_io.test_json_preprocessor import TestJsonPreprocessor # NOQA
+from test.json_io.test_json_change_plan import TestJsonChangePlan # NOQA
 from test.json_io.parts.test_json_part import TestJsonPart  # NOQA 
 from test.json_io.parts.test_json_part_box import TestJsonPartBox  # NOQA 
 from test.json_io.parts.test_json_part_cone import TestJsonPartCone  # NOQA 
@@ -34,13 +38,19 @@ from test.json_io.parts.test_json_part_cylinder import TestJsonPartCylinder  # N
 from test.json_io.parts.test_json_part_sphere import TestJsonPartSphere  # NOQA 
 from test.json_io.parts.test_json_part_geometry import TestJsonPartGeometry  # NOQA 
 from test.json_io.parts.test_json_part_factory import TestJsonPartFactory # NOQA
+from test.json_io.test_json_uuid_index import TestJsonUuidIndex # NOQA
 from test.json_io.products.test_json_product import TestJsonProduct # NOQA
 from test.json_io.products.test_json_product_assembly import TestJsonProductAssembly # NOQA
 from test.json_io.products.test_json_product_child import TestJsonProductChild # NOQA
 from test.json_io.products.test_json_product_assembly_tree_traverser import TestJsonProductAssemblyTreeTraverser # NOQA
+from test.json_io.products.test_json_product_flat_assembly import TestJsonProductFlatAssembly # NOQA
 from test.freecad.test_actice_document import TestActiveDocument # NOQA
+from test.freecad.test_document_session import TestDocumentSession # NOQA
+from test.module.test_tracer import TestTracer # NOQA
+from test.benchmark.test_synthetic_satellite import TestSyntheticSatellite # NOQA
 from test.plugins.VirtualSatelliteRestPlugin.test_api_switch import TestApiSwitch # NOQA
 from test.plugins.VirtualSatelliteRestPlugin.test_tree_crawler import TestTreeCrawler # NOQA
+from test.plugins.VirtualSatelliteRestPlugin.test_rest_cache import TestRestCache # NOQA
 from test.plugins.VirtualSatelliteRestPlugin.test_importer import TestImporter # NOQA
 from test.plugins.VirtualSatelliteRestPlugin.test_exporter import TestExorter # NOQA
 from test.freecad.test_name_converter import TestNameConverter # NOQA
@@ -28,6 +28,8 @@ import FreeCAD
 from module.environment import Environment, ICON_EXPORT
 from json_io.json_exporter import JsonExporter
 from freecad.active_document import ActiveDocument
+from freecad.document_session import DocumentSession, DEFAULT_MAX_OPEN_DOCUMENTS
+from module.tracer import Tracer, trace_span, is_tracing_enabled
 
 Msg = FreeCAD.Console.PrintMessage
 Err = FreeCAD.Console.PrintError
@@ -48,16 +50,23 @@ class CommandExport:
         json_exporter = JsonExporter(file_directory_path + os.sep)
 
         if(FreeCAD.ActiveDocument is not None):
-            # Export into the interim format
-            document_name = FreeCAD.ActiveDocument.Label
-            active_document = ActiveDocument(file_directory_path).open_set_and_get_document(document_name)
-            json_dict = json_exporter.full_export(active_document)
+            preferences = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/VirtualSatelliteCAD")
+            max_open_documents = preferences.GetInt("MaxOpenDocuments", DEFAULT_MAX_OPEN_DOCUMENTS)
 
-            # call the export from the plugin
-            self.workbench.getActivePlugin().exportFromDict(json_dict, file_directory_path)
+            # Keep the documents open for the whole export instead of reopening them for every object
+            with Tracer(file_directory_path, is_tracing_enabled()), DocumentSession(file_directory_path + os.sep, max_open_documents):
+                # Export into the interim format
+                document_name = FreeCAD.ActiveDocument.Label
+                active_document = ActiveDocument(file_directory_path).open_set_and_get_document(document_name)
+                with trace_span("full_export"):
+                    json_dict = json_exporter.full_export(active_document)
 
-            # after export open the file again for the UI
-            active_document = ActiveDocument(file_directory_path).open_set_and_get_document(document_name)
+                # call the export from the plugin
+                with trace_span("exportFromDict"):
+                    self.workbench.getActivePlugin().exportFromDict(json_dict, file_directory_path)
+
+                # after export open the file again for the UI
+                active_document = ActiveDocument(file_directory_path).open_set_and_get_document(document_name)
             Msg("Finished export\n")
 
         else:
@@ -27,11 +27,63 @@
 import FreeCAD
 from module.environment import Environment, ICON_IMPORT
 from json_io.json_importer import JsonImporter
+from json_io.json_definitions import JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, JSON_ELEMENT_NAME, JSON_ELEMENT_UUID
+from freecad.document_session import DocumentSession, DEFAULT_MAX_OPEN_DOCUMENTS
+from module.tracer import Tracer, trace_span, is_tracing_enabled
 import os
+from PySide2.QtWidgets import QMessageBox, QDialog, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QDialogButtonBox
 
 Msg = FreeCAD.Console.PrintMessage
 Err = FreeCAD.Console.PrintError
 Log = FreeCAD.Console.PrintLog
+Wrn = FreeCAD.Console.PrintWarning
+
+
+class SelectProductDialog(QDialog):
+    '''
+    Lets the user select the assembly whose subtree gets imported. Selecting the root imports everything.
+    '''
+
+    def __init__(self, json_root):
+        super(SelectProductDialog, self).__init__()
+        self.selectedProduct = None
+
+        self.setWindowTitle("Select the assembly to import")
+        self.setMinimumWidth(500)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Name", "Uuid"])
+
+        def fillTreeRecursive(item, json_product):
+            for json_child in json_product.get(JSON_ELEMNT_CHILDREN, []):
+                # Only assemblies have a subtree to import
+                if json_child.get(JSON_ELEMNT_CHILDREN):
+                    childItem = QTreeWidgetItem(item, [json_child[JSON_ELEMENT_NAME], json_child[JSON_ELEMENT_UUID]])
+                    fillTreeRecursive(childItem, json_child)
+
+        rootItem = QTreeWidgetItem(self.tree, [json_root[JSON_ELEMENT_NAME], json_root[JSON_ELEMENT_UUID]])
+        fillTreeRecursive(rootItem, json_root)
+        self.tree.expandAll()
+        self.tree.setCurrentItem(rootItem)
+
+        self.vlayout = QVBoxLayout()
+        self.vlayout.addWidget(self.tree)
+        self.vlayout.addWidget(self.buttons)
+
+        self.buttons.accepted.connect(self.acceptSelection)
+        self.buttons.rejected.connect(self.reject)
+        self.setLayout(self.vlayout)
+
+    def acceptSelection(self):
+        self.selectedProduct = self.tree.currentItem().text(1)
+        self.accept()
+
+    @classmethod
+    def show(cls, json_root):
+        dialog = cls(json_root)
+        dialog.exec_()
+        return dialog.selectedProduct
 
 
 class CommandImport:
@@ -46,8 +98,13 @@ class CommandImport:
         if file_directory_path is None:
             return
 
+        with Tracer(file_directory_path, is_tracing_enabled()):
+            self.run_import(file_directory_path)
+
+    def run_import(self, file_directory_path):
         # call the import from the plugin
-        json_object = self.workbench.getActivePlugin().importToDict(file_directory_path)
+        with trace_span("importToDict"):
+            json_object = self.workbench.getActivePlugin().importToDict(file_directory_path)
 
         if(json_object is None):
             Err("Plugin import returned None\n")
@@ -56,10 +113,55 @@ class CommandImport:
             Log("Plugin returned following JSON:\n")
             Log("{}\n".format(json_object))
 
-        json_importer = JsonImporter(file_directory_path + os.sep)
-        json_importer.full_import(json_object)
+        # Writing the parts in parallel worker processes is opt-in
+        preferences = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/VirtualSatelliteCAD")
+        worker_count = preferences.GetInt("ImportWorkerCount", 1)
+        merge_identical_parts = preferences.GetBool("MergeIdenticalParts", False)
+        flatten_assemblies = preferences.GetBool("FlattenAssemblies", False)
+        max_open_documents = preferences.GetInt("MaxOpenDocuments", DEFAULT_MAX_OPEN_DOCUMENTS)
+
+        # Optionally only import the subtree of one product, it is asked for on every import
+        product_uuid = None
+        if preferences.GetBool("AskForImportProduct", False):
+            product_uuid = SelectProductDialog.show(json_object[JSON_PRODUCTS])
+            if product_uuid is None:
+                Msg("Import cancelled\n")
+                return
+            elif product_uuid == json_object[JSON_PRODUCTS][JSON_ELEMENT_UUID]:
+                product_uuid = None
+            else:
+                Wrn(f"Only importing the subtree of the product '{product_uuid}'\n")
+
+        json_importer = JsonImporter(file_directory_path + os.sep, worker_count, merge_identical_parts, flatten_assemblies)
+
+        # Let the user see what the import costs before any document gets touched
+        change_plan = None
+        if preferences.GetBool("ConfirmImportPlan", False):
+            change_plan = json_importer.plan_import(json_object, product_uuid)
+            if not self.confirm_change_plan(change_plan):
+                Msg("Import cancelled\n")
+                return
+
+        # Keep the documents open for the whole import instead of reopening them for every object
+        with trace_span("full_import"), DocumentSession(file_directory_path + os.sep, max_open_documents):
+            json_importer.full_import(json_object, product_uuid, change_plan)
         Msg("Finished import\n")
 
+    def confirm_change_plan(self, change_plan):
+        if change_plan is None:
+            return False
+        elif change_plan.is_empty():
+            # Nothing to confirm, the import only opens the existing documents
+            Msg("Nothing changed since the last import\n")
+            return True
+
+        msgBox = QMessageBox()
+        msgBox.setText('The import will change the following documents.')
+        msgBox.setInformativeText(change_plan.get_summary() + 'Do you want to continue?')
+        msgBox.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        msgBox.setDefaultButton(QMessageBox.Yes)
+        return msgBox.exec_() == QMessageBox.Yes
+
     def IsActive(self):
         return True
 
@@ -26,6 +26,9 @@
 import FreeCADGui
 import FreeCAD
 import os
+from collections import OrderedDict
+from freecad.document_session import DocumentSession
+from module.tracer import trace_span
 
 App = FreeCAD
 Gui = FreeCADGui
@@ -42,6 +45,55 @@ VECTOR_Y = FreeCAD.Vector(0, 1, 0)
 VECTOR_Z = FreeCAD.Vector(0, 0, 1)
 
 
+class BulkWrite(object):
+    '''
+    While a bulk write is active, recomputes requested through the ActiveDocument are
+    deferred. Each document gets recomputed exactly once, right before it is saved, or
+    when the bulk write ends in case it is still open.
+    '''
+
+    _current_bulk_write = None
+
+    def __init__(self):
+        self._previous_bulk_write = None
+        self._pending_documents = OrderedDict()
+        self.deferred_count = 0
+        self.recompute_count = 0
+
+    @staticmethod
+    def get_current_bulk_write():
+        return BulkWrite._current_bulk_write
+
+    def __enter__(self):
+        self._previous_bulk_write = BulkWrite._current_bulk_write
+        BulkWrite._current_bulk_write = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            for file_name_without_extension in list(self._pending_documents.keys()):
+                if file_name_without_extension in App.listDocuments():
+                    self.recompute_pending(file_name_without_extension)
+        finally:
+            BulkWrite._current_bulk_write = self._previous_bulk_write
+
+        Log(f"Bulk write deferred {self.deferred_count} recomputes into {self.recompute_count} document recomputes\n")
+        return False
+
+    def defer(self, file_name_without_extension):
+        self._pending_documents[file_name_without_extension] = True
+        self.deferred_count += 1
+
+    def discard(self, file_name_without_extension):
+        self._pending_documents.pop(file_name_without_extension, None)
+
+    def recompute_pending(self, file_name_without_extension):
+        if self._pending_documents.pop(file_name_without_extension, None):
+            with trace_span("recompute"):
+                App.getDocument(file_name_without_extension).recompute()
+            self.recompute_count += 1
+
+
 class ActiveDocument(object):
 
     def __init__(self, working_directory):
@@ -54,9 +106,9 @@ class ActiveDocument(object):
     def open_set_and_get_document(self, file_name_without_extension):
 
         file_full_path = self.get_file_full_path(file_name_without_extension)
-        documents = list(App.listDocuments().keys())
 
-        if documents.count(file_name_without_extension) == 0:
+        opened_document = file_name_without_extension not in App.listDocuments()
+        if opened_document:
             if os.path.isfile(file_full_path):
                 Log('Open existing FreeCAD file from disk for update...\n')
                 App.open(file_full_path)
@@ -66,14 +118,16 @@ class ActiveDocument(object):
         else:
             Log('Open existing already open FreeCAD file for update...\n')
 
+        session = DocumentSession.get_current_session()
+        if session is not None:
+            session.acquire(file_name_without_extension, opened_document)
+
         self.set_active_documents(file_name_without_extension)
 
         return self
 
     def clear_if_open_document(self, file_name_without_extension):
-        documents = list(App.listDocuments().keys())
-
-        if documents.count(file_name_without_extension) != 0:
+        if file_name_without_extension in App.listDocuments():
             Log('Delete and recreate new FreeCAD file...\n')
             App.closeDocument(file_name_without_extension)
             App.newDocument(file_name_without_extension)
@@ -82,23 +136,57 @@ class ActiveDocument(object):
         App.setActiveDocument(file_name_without_extension)
 
         App.ActiveDocument = App.getDocument(file_name_without_extension)
-        Gui.ActiveDocument = Gui.getDocument(file_name_without_extension)
-
         self.app_active_document = App.ActiveDocument
-        self.gui_active_document = Gui.ActiveDocument
+
+        # A headless FreeCAD (e.g. an import worker process) has no gui documents
+        self.gui_active_document = None
+        if App.GuiUp:
+            Gui.ActiveDocument = Gui.getDocument(file_name_without_extension)
+            self.gui_active_document = Gui.ActiveDocument
 
         self.app = App
         self.gui = Gui
 
+    def recompute(self):
+        '''
+        Recomputes the active document, or defers it to one recompute before saving during a bulk write
+        '''
+        bulk_write = BulkWrite.get_current_bulk_write()
+        if bulk_write is not None:
+            bulk_write.defer(self.app_active_document.Name)
+        else:
+            with trace_span("recompute"):
+                self.app_active_document.recompute()
+
     def save_as(self, file_name_without_extension):
+        bulk_write = BulkWrite.get_current_bulk_write()
+        if bulk_write is not None:
+            bulk_write.recompute_pending(file_name_without_extension)
+
         file_full_path = self.get_file_full_path(file_name_without_extension)
-        App.getDocument(file_name_without_extension).saveAs(file_full_path)
+        with trace_span("save"):
+            App.getDocument(file_name_without_extension).saveAs(file_full_path)
 
     def save_and_close_active_document(self, file_name_without_extension):
+        # Within a session the document stays open and gets saved once the session is flushed
+        session = DocumentSession.get_current_session()
+        if session is not None:
+            session.release(file_name_without_extension, dirty=True)
+            return
+
         self.save_as(file_name_without_extension)
 
         self.close_active_document(file_name_without_extension)
 
     def close_active_document(self, file_name_without_extension):
+        session = DocumentSession.get_current_session()
+        if session is not None:
+            session.release(file_name_without_extension)
+            return
+
+        bulk_write = BulkWrite.get_current_bulk_write()
+        if bulk_write is not None:
+            bulk_write.discard(file_name_without_extension)
+
         App.closeDocument(file_name_without_extension)
         App.ActiveDocument = None
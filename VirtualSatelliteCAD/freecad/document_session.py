@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+#
+import FreeCAD
+from collections import OrderedDict
+
+App = FreeCAD
+Log = FreeCAD.Console.PrintLog
+Msg = FreeCAD.Console.PrintMessage
+
+DEFAULT_MAX_OPEN_DOCUMENTS = 32
+
+SESSION_HITS = "hits"
+SESSION_MISSES = "misses"
+SESSION_EVICTIONS = "evictions"
+SESSION_SAVES = "saves"
+
+
+class DocumentSession(object):
+    '''
+    Keeps the documents of one command open instead of opening, saving and closing
+    them for every single object. The documents are held in a bounded LRU, documents
+    which got changed are only saved when the session gets flushed, evicted or ended.
+    While a session is active, the ActiveDocument routes its open, save and close through it.
+    '''
+
+    _current_session = None
+
+    def __init__(self, working_directory, max_open_documents=DEFAULT_MAX_OPEN_DOCUMENTS):
+        self._working_directory = working_directory
+        self._max_open_documents = max(1, max_open_documents)
+        self._previous_session = None
+
+        # document name to the number of its current users, in least recently used order
+        self._documents = OrderedDict()
+        self._owned_documents = set()
+        self._dirty_documents = OrderedDict()
+
+        self.statistics = {SESSION_HITS: 0, SESSION_MISSES: 0, SESSION_EVICTIONS: 0, SESSION_SAVES: 0}
+
+    @staticmethod
+    def get_current_session():
+        return DocumentSession._current_session
+
+    @staticmethod
+    def flush_current_session():
+        '''
+        Writes the changed documents of the active session to disk, e.g. before
+        A2plus or a worker process reads them from there
+        '''
+        session = DocumentSession.get_current_session()
+        if session is not None:
+            session.flush()
+
+    def __enter__(self):
+        self._previous_session = DocumentSession._current_session
+        DocumentSession._current_session = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.end()
+        finally:
+            DocumentSession._current_session = self._previous_session
+        return False
+
+    def _is_open(self, file_name_without_extension):
+        return file_name_without_extension in App.listDocuments()
+
+    def acquire(self, file_name_without_extension, opened_from_session):
+        '''
+        Called whenever a document got opened. A document which was already open counts as hit.
+        Documents opened by the session are the ones it is allowed to close again.
+        '''
+        if opened_from_session:
+            self.statistics[SESSION_MISSES] += 1
+            self._owned_documents.add(file_name_without_extension)
+        else:
+            self.statistics[SESSION_HITS] += 1
+
+        self._documents[file_name_without_extension] = self._documents.get(file_name_without_extension, 0) + 1
+        self._documents.move_to_end(file_name_without_extension)
+
+        self._evict()
+
+    def release(self, file_name_without_extension, dirty=False):
+        '''
+        Called instead of closing a document, it stays open for the next user.
+        A dirty document gets saved with the next flush.
+        '''
+        if dirty:
+            self._dirty_documents[file_name_without_extension] = True
+
+        if self._documents.get(file_name_without_extension, 0) > 0:
+            self._documents[file_name_without_extension] -= 1
+
+    def is_dirty(self, file_name_without_extension):
+        return file_name_without_extension in self._dirty_documents
+
+    def _save(self, file_name_without_extension):
+        from freecad.active_document import ActiveDocument
+
+        self._dirty_documents.pop(file_name_without_extension, None)
+        if self._is_open(file_name_without_extension):
+            ActiveDocument(self._working_directory).save_as(file_name_without_extension)
+            self.statistics[SESSION_SAVES] += 1
+
+    def _close(self, file_name_without_extension):
+        if self.is_dirty(file_name_without_extension):
+            self._save(file_name_without_extension)
+
+        self._documents.pop(file_name_without_extension, None)
+        if file_name_without_extension in self._owned_documents:
+            self._owned_documents.discard(file_name_without_extension)
+            if self._is_open(file_name_without_extension):
+                App.closeDocument(file_name_without_extension)
+
+    def _evict(self):
+        '''
+        Closes the least recently used documents which are not in use anymore
+        until the session is back within its bounds
+        '''
+        for file_name_without_extension in list(self._documents.keys()):
+            if len(self._documents) <= self._max_open_documents:
+                break
+            if self._documents[file_name_without_extension] == 0:
+                Log(f"Evicting document '{file_name_without_extension}' from the session\n")
+                self._close(file_name_without_extension)
+                self.statistics[SESSION_EVICTIONS] += 1
+
+    def flush(self):
+        '''
+        Saves all changed documents, they stay open
+        '''
+        for file_name_without_extension in list(self._dirty_documents.keys()):
+            self._save(file_name_without_extension)
+
+    def end(self):
+        '''
+        Saves all changed documents and closes the ones the session opened.
+        Documents which are still in use, such as the one shown to the user, stay open.
+        '''
+        self.flush()
+
+        for file_name_without_extension in list(self._documents.keys()):
+            if self._documents[file_name_without_extension] == 0:
+                self._close(file_name_without_extension)
+
+        Msg("Document session: {} hits, {} misses, {} evictions, {} saves\n".format(
+            self.statistics[SESSION_HITS],
+            self.statistics[SESSION_MISSES],
+            self.statistics[SESSION_EVICTIONS],
+            self.statistics[SESSION_SAVES]))
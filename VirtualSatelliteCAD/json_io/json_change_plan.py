@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+#
+from collections import OrderedDict
+import FreeCAD
+from json_io.json_definitions import JSON_PARTS, JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, JSON_ELEMENT_UUID, \
+    JSON_ELEMENT_PART_UUID, PART_IDENTIFIER, PRODUCT_IDENTIFIER, FLAT_IDENTIFIER, get_part_name_uuid, get_product_name_uuid
+
+Log = FreeCAD.Console.PrintLog
+
+CHANGE_CREATE = "create"
+CHANGE_UPDATE = "update"
+CHANGE_DELETE = "delete"
+CHANGE_UNTOUCHED = "untouched"
+
+CHANGES = [CHANGE_CREATE, CHANGE_UPDATE, CHANGE_DELETE, CHANGE_UNTOUCHED]
+
+
+class JsonChangePlan(object):
+    '''
+    Compares an incoming JSON against what the manifest knows about the working directory,
+    without opening any FreeCAD document. For every part and assembly the plan tells whether
+    its document has to be created, updated, deleted or can stay untouched. An assembly
+    imports the documents of its children, thus it has to be updated as soon as one of them changes.
+    '''
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+
+        # the JSON the plan got created for
+        self.json_object = None
+
+        # uuid to (change, file name)
+        self.parts = OrderedDict()
+        self.assemblies = OrderedDict()
+
+    def _get_change(self, unchanged, file_name):
+        if unchanged:
+            return CHANGE_UNTOUCHED
+        elif self.manifest.has_file(file_name):
+            return CHANGE_UPDATE
+        return CHANGE_CREATE
+
+    def _plan_parts(self, json_parts):
+        for json_part in json_parts:
+            part_file_name = PART_IDENTIFIER + get_part_name_uuid(json_part)
+            unchanged = self.manifest.is_part_unchanged(json_part, part_file_name)
+            self.parts[json_part[JSON_ELEMENT_UUID]] = (self._get_change(unchanged, part_file_name), part_file_name)
+
+    def _plan_assembly(self, json_assembly):
+        '''
+        Plans the assembly after all of its children, so changes propagate bottom up
+        '''
+        dependencies_changed = self.get_part_change(json_assembly.get(JSON_ELEMENT_PART_UUID)) != CHANGE_UNTOUCHED
+
+        for json_child in json_assembly[JSON_ELEMNT_CHILDREN]:
+            if json_child.get(JSON_ELEMNT_CHILDREN):
+                child_change = self._plan_assembly(json_child)
+            else:
+                child_change = self.get_part_change(json_child.get(JSON_ELEMENT_PART_UUID))
+            dependencies_changed = dependencies_changed or child_change != CHANGE_UNTOUCHED
+
+        assembly_file_name = PRODUCT_IDENTIFIER + get_product_name_uuid(json_assembly)
+        unchanged = not dependencies_changed and self.manifest.is_assembly_unchanged(json_assembly, assembly_file_name)
+        change = self._get_change(unchanged, assembly_file_name)
+        self.assemblies[json_assembly[JSON_ELEMENT_UUID]] = (change, assembly_file_name)
+
+        return change
+
+    def _plan_flat_assembly(self, json_assembly):
+        '''
+        A flat assembly imports every part of the tree into its one document,
+        thus any changed part changes it
+        '''
+        dependencies_changed = any(change != CHANGE_UNTOUCHED for change, _ in self.parts.values())
+
+        assembly_file_name = FLAT_IDENTIFIER + get_product_name_uuid(json_assembly)
+        unchanged = not dependencies_changed and self.manifest.is_flat_assembly_unchanged(json_assembly, assembly_file_name)
+        change = self._get_change(unchanged, assembly_file_name)
+        self.assemblies[json_assembly[JSON_ELEMENT_UUID]] = (change, assembly_file_name)
+
+        return change
+
+    def _plan_deletes(self, planned, known_files):
+        for uuid, file_name in known_files.items():
+            if uuid not in planned:
+                planned[uuid] = (CHANGE_DELETE, file_name)
+
+    def plan(self, json_object, plan_deletes=True, flatten_assemblies=False):
+        '''
+        Creates the plan for the whole JSON. Documents the manifest knows
+        but the JSON does not contain anymore are planned for deletion.
+        Flattened assemblies are planned as the one document of the root product.
+        '''
+        self.json_object = json_object
+        self.parts.clear()
+        self.assemblies.clear()
+
+        self._plan_parts(json_object[JSON_PARTS])
+        if json_object[JSON_PRODUCTS].get(JSON_ELEMNT_CHILDREN):
+            if flatten_assemblies:
+                self._plan_flat_assembly(json_object[JSON_PRODUCTS])
+            else:
+                self._plan_assembly(json_object[JSON_PRODUCTS])
+
+        if plan_deletes:
+            self._plan_deletes(self.parts, self.manifest.get_part_files())
+            self._plan_deletes(self.assemblies, self.manifest.get_assembly_files())
+
+        return self
+
+    def get_part_change(self, uuid):
+        '''
+        Parts which are not part of the plan are not written, thus they count as untouched
+        '''
+        return self.parts.get(uuid, (CHANGE_UNTOUCHED, ""))[0]
+
+    def get_assembly_change(self, uuid):
+        return self.assemblies.get(uuid, (CHANGE_UNTOUCHED, ""))[0]
+
+    def get_part_file_name(self, uuid):
+        return self.parts[uuid][1]
+
+    def _count(self, planned):
+        counts = OrderedDict((change, 0) for change in CHANGES)
+        for change, _ in planned.values():
+            counts[change] += 1
+        return counts
+
+    def get_part_counts(self):
+        return self._count(self.parts)
+
+    def get_assembly_counts(self):
+        return self._count(self.assemblies)
+
+    def get_document_write_count(self):
+        '''
+        The number of documents which have to be opened and saved, this is what an import costs
+        '''
+        return sum(1 for change, _ in list(self.parts.values()) + list(self.assemblies.values())
+                   if change in [CHANGE_CREATE, CHANGE_UPDATE])
+
+    def is_empty(self):
+        return all(change == CHANGE_UNTOUCHED for change, _ in list(self.parts.values()) + list(self.assemblies.values()))
+
+    def get_summary(self):
+        part_counts, assembly_counts = self.get_part_counts(), self.get_assembly_counts()
+        return "Parts: {}\nAssemblies: {}\nDocuments to write: {}\n".format(
+            ", ".join(f"{count} {change}" for change, count in part_counts.items()),
+            ", ".join(f"{count} {change}" for change, count in assembly_counts.items()),
+            self.get_document_write_count())
@@ -66,10 +66,14 @@ JSON_ELEMENT_ROT_Z = "rotZ"
 JSON_ELEMENT_PART_UUID = "partUuid"
 JSON_ELEMENT_PART_NAME = "partName"
 
+# Only set during the import, a product of a merged part imports the document of the identical part
+JSON_ELEMENT_PART_FILE_NAME = "partFileName"
+
 JSON_ELEMNT_CHILDREN = "children"
 
 PART_IDENTIFIER = "part_"
 PRODUCT_IDENTIFIER = "assembly_"
+FLAT_IDENTIFIER = "flat_"
 
 
 def _get_combined_name_uuid(name, uuid):
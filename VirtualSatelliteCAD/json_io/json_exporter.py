@@ -28,8 +28,12 @@
 # from freecad.active_document import ActiveDocument
 import FreeCAD
 from json_io.products.json_product_assembly import JsonProductAssembly
+from json_io.products.json_product_flat_assembly import JsonProductFlatAssembly
+from json_io.json_part_registry import JsonPartRegistry
+from json_io.json_uuid_index import JsonUuidIndex, INDEX_KIND_PART
+from module.tracer import trace_span
 # import json
-from json_io.json_definitions import JSON_PARTS, JSON_PRODUCTS
+from json_io.json_definitions import JSON_PARTS, JSON_PRODUCTS, FLAT_IDENTIFIER
 # from json_io.json_spread_sheet import FREECAD_PART_SHEET_NAME
 
 Log = FreeCAD.Console.PrintLog
@@ -50,22 +54,35 @@ class JsonExporter(object):
 
         root_assembly = JsonProductAssembly()
 
-        part_list = []
+        part_list = JsonPartRegistry()
         # read the root document (this will create the tree and read all children)
         # a list of all found part names and the created part objects will be returned
         Log("Read root assembly...\n")
-        root_assembly.read_from_freecad(active_document, self.working_output_directory, part_list)
-
-        Log(part_list)
+        with trace_span("export_read") as span:
+            # a flat document contains the whole tree instead of referencing assembly documents
+            if active_document.app_active_document.Name.startswith(FLAT_IDENTIFIER):
+                root_assembly = JsonProductFlatAssembly(self.working_output_directory).read_from_freecad(active_document, part_list)
+            else:
+                root_assembly.read_from_freecad(active_document, self.working_output_directory, part_list)
+            span.add_count("parts", len(part_list))
+            span.add_count("deduplicated_reads", part_list.deduplicated_reads)
+
+        Log(f"{part_list}\n")
+
+        # Record in which documents and objects the parts have been found
+        with JsonUuidIndex(self.working_output_directory) as uuid_index:
+            for part_name, part in part_list:
+                uuid_index.update(part.uuid, INDEX_KIND_PART, part_name, part.get_shape_type())
 
         Log("Parse root assembly...\n")
-        # parse the products using the product assembly tree similar as above
-        json_products_dict = root_assembly.parse_to_json(isRoot=True)
-
-        # separate parse the parts into a list
-        json_part_list = []
-        for _, part in part_list:
-            json_part_list.append(part.parse_to_json())
+        with trace_span("export_parse"):
+            # parse the products using the product assembly tree similar as above
+            json_products_dict = root_assembly.parse_to_json(isRoot=True)
+
+            # separate parse the parts into a list
+            json_part_list = []
+            for _, part in part_list:
+                json_part_list.append(part.parse_to_json())
 
         # create the complete JSON dictionary
         json_dict = {
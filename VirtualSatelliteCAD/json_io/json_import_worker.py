@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+"""
+Entry point of a headless FreeCAD (FreeCADCmd) import worker process.
+The worker reads its job from the file named by the environment variable
+VIRTUAL_SATELLITE_IMPORT_JOB, processes it and writes the result next to it.
+Only the standard library may be imported before the module path is known.
+"""
+import json
+import os
+import sys
+import traceback
+
+JOB_ENVIRONMENT_VARIABLE = "VIRTUAL_SATELLITE_IMPORT_JOB"
+JOB_RESULT_EXTENSION = ".result"
+
+JOB_MODULE_PATH = "module_path"
+JOB_WORKING_OUTPUT_DIRECTORY = "working_output_directory"
+JOB_KIND = "kind"
+JOB_KIND_PARTS = "parts"
+JOB_ITEMS = "items"
+
+RESULT_FILE_NAMES = "file_names"
+
+
+def run_parts_job(job):
+    '''
+    Writes all parts of the job into their own part documents
+    and hands back the written file names by part uuid
+    '''
+    from json_io.json_importer import JsonImporter
+    from json_io.json_definitions import JSON_ELEMENT_UUID
+    from freecad.active_document import BulkWrite
+
+    json_importer = JsonImporter(job[JOB_WORKING_OUTPUT_DIRECTORY])
+
+    file_names = {}
+    with BulkWrite():
+        for json_part in job[JOB_ITEMS]:
+            file_names[json_part[JSON_ELEMENT_UUID]] = json_importer.create_or_update_part(json_part)
+
+    return file_names
+
+
+def run_job(job_file_path):
+    with open(job_file_path, "r") as file:
+        job = json.load(file)
+
+    if job[JOB_MODULE_PATH] not in sys.path:
+        sys.path.append(job[JOB_MODULE_PATH])
+
+    # Assemblies are not written by workers, A2plus needs the FreeCAD GUI
+    if job[JOB_KIND] == JOB_KIND_PARTS:
+        file_names = run_parts_job(job)
+    else:
+        raise ValueError("Unknown job kind: " + job[JOB_KIND])
+
+    # Write to a temporary file first, so a crashing worker never leaves a partial result
+    with open(job_file_path + JOB_RESULT_EXTENSION + ".tmp", "w") as file:
+        json.dump({RESULT_FILE_NAMES: file_names}, file)
+    os.replace(job_file_path + JOB_RESULT_EXTENSION + ".tmp", job_file_path + JOB_RESULT_EXTENSION)
+
+
+if JOB_ENVIRONMENT_VARIABLE in os.environ:
+    exit_code = 0
+    try:
+        run_job(os.environ[JOB_ENVIRONMENT_VARIABLE])
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # FreeCADCmd would otherwise stay in its interactive console
+    os._exit(exit_code)
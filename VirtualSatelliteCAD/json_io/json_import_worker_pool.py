@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import FreeCAD
+from module.environment import Environment
+from json_io.json_import_worker import JOB_ENVIRONMENT_VARIABLE, JOB_RESULT_EXTENSION, \
+    JOB_MODULE_PATH, JOB_WORKING_OUTPUT_DIRECTORY, JOB_KIND, JOB_KIND_PARTS, JOB_ITEMS, RESULT_FILE_NAMES
+
+Log = FreeCAD.Console.PrintLog
+Err = FreeCAD.Console.PrintError
+Wrn = FreeCAD.Console.PrintWarning
+
+WORKER_SCRIPT_NAME = "json_import_worker.py"
+WORKER_LOG_EXTENSION = ".log"
+
+
+class JsonImportWorkerPool(object):
+    '''
+    This class fans independent import jobs out to several headless FreeCAD
+    (FreeCADCmd) processes and waits for all of them to finish.
+    NOTE: Headless FreeCAD has no view providers, thus the documents written
+    by the workers do not store view properties such as the shape color.
+    The importer writes the colors into these documents afterwards.
+    Only part documents are written by workers, the A2plus assemblies need the FreeCAD GUI.
+    '''
+
+    def __init__(self, working_output_directory, worker_count, freecad_cmd_path=None):
+        self.working_output_directory = working_output_directory
+        self.worker_count = worker_count
+        self.freecad_cmd_path = freecad_cmd_path
+
+    def _split_into_chunks(self, items):
+        '''
+        Distributes the items round robin, so every worker gets a similar share
+        '''
+        chunk_count = min(self.worker_count, len(items))
+        return [items[index::chunk_count] for index in range(chunk_count)]
+
+    def _start_worker(self, job_directory, index, kind, items):
+        job_file_path = os.path.join(job_directory, "job_" + str(index) + ".json")
+        job = {
+            JOB_MODULE_PATH: Environment.get_module_path(),
+            JOB_WORKING_OUTPUT_DIRECTORY: self.working_output_directory,
+            JOB_KIND: kind,
+            JOB_ITEMS: items
+        }
+        with open(job_file_path, "w") as file:
+            json.dump(job, file)
+
+        environment = dict(os.environ)
+        environment[JOB_ENVIRONMENT_VARIABLE] = job_file_path
+
+        worker_script_path = os.path.join(Environment.get_module_path(), "json_io", WORKER_SCRIPT_NAME)
+        with open(job_file_path + WORKER_LOG_EXTENSION, "w") as log_file:
+            try:
+                process = subprocess.Popen(
+                    [self.freecad_cmd_path, worker_script_path],
+                    env=environment,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT)
+            except OSError as error:
+                Err(f"Could not start import worker '{self.freecad_cmd_path}': {error}\n")
+                return None, job_file_path
+
+        Log(f"Started import worker {index} with {len(items)} items\n")
+        return process, job_file_path
+
+    def _join_worker(self, process, job_file_path):
+        '''
+        Waits for the worker and hands back its result, or None if it failed
+        '''
+        if process is None:
+            return None
+
+        return_code = process.wait()
+        result_file_path = job_file_path + JOB_RESULT_EXTENSION
+
+        if return_code != 0 or not os.path.isfile(result_file_path):
+            with open(job_file_path + WORKER_LOG_EXTENSION, "r") as log_file:
+                Err(f"Import worker failed with exit code {return_code}:\n{log_file.read()}\n")
+            return None
+
+        with open(result_file_path, "r") as file:
+            return json.load(file)[RESULT_FILE_NAMES]
+
+    def run(self, kind, items):
+        '''
+        Runs the items of the given job kind in parallel and blocks until all workers are done.
+        Hands back the merged results of all successful workers. Items of failed
+        workers are missing in the result, thus the caller can process them again.
+        '''
+        if self.freecad_cmd_path is None:
+            self.freecad_cmd_path = Environment.get_freecad_cmd_path()
+
+        if self.freecad_cmd_path is None:
+            Wrn("Could not find FreeCADCmd, no import workers are started\n")
+            return {}
+
+        results = {}
+        job_directory = tempfile.mkdtemp(prefix="virtual_satellite_import_")
+        try:
+            workers = [self._start_worker(job_directory, index, kind, chunk)
+                       for index, chunk in enumerate(self._split_into_chunks(items))]
+
+            # Join all workers before handing back, this acts as barrier
+            for process, job_file_path in workers:
+                worker_results = self._join_worker(process, job_file_path)
+                if worker_results is not None:
+                    results.update(worker_results)
+        finally:
+            shutil.rmtree(job_directory, ignore_errors=True)
+
+        return results
+
+    def create_or_update_parts(self, json_parts):
+        '''
+        Writes the part documents in parallel. Hands back the file names by part uuid.
+        '''
+        return self.run(JOB_KIND_PARTS, json_parts)
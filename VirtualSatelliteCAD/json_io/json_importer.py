@@ -24,12 +24,23 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 #
 
+import os
 import FreeCAD
 import FreeCADGui
-from freecad.active_document import ActiveDocument
+from freecad.active_document import ActiveDocument, BulkWrite
+from freecad.document_session import DocumentSession
 from json_io.parts.json_part_factory import JsonPartFactory
 from json_io.products.json_product_assembly_tree_traverser import JsonProductAssemblyTreeTraverser
-from json_io.json_definitions import get_part_name_uuid, JSON_PRODUCTS, JSON_PARTS, PART_IDENTIFIER
+from json_io.products.json_product_flat_assembly import JsonProductFlatAssembly
+from json_io.products.json_product_assembly import JsonProductAssembly
+from json_io.products.json_product import get_imported_file_names, is_link_supported
+from json_io.json_definitions import get_part_name_uuid, JSON_PRODUCTS, JSON_PARTS, PART_IDENTIFIER, JSON_ELEMENT_UUID, \
+    JSON_ELEMNT_CHILDREN
+from json_io.json_manifest import JsonManifest
+from json_io.json_change_plan import JsonChangePlan, CHANGE_UNTOUCHED, CHANGE_UPDATE, CHANGE_DELETE, CHANGE_CREATE
+from json_io.json_uuid_index import JsonUuidIndex, INDEX_KIND_PART, INDEX_KIND_ASSEMBLY
+from json_io.json_preprocessor import JsonPreprocessor
+from module.tracer import trace_span
 
 App = FreeCAD
 Gui = FreeCADGui
@@ -38,14 +49,35 @@ Msg = FreeCAD.Console.PrintMessage
 Err = FreeCAD.Console.PrintError
 Wrn = FreeCAD.Console.PrintWarning
 
+PARTS_CREATED = "created"
+PARTS_UPDATED = "updated"
+PARTS_SKIPPED = "skipped"
+
 
 class JsonImporter(object):
     '''
     Provides functionality to import a JSON created by Virtual Satellite into FreeCAD
     '''
 
-    def __init__(self, working_output_directory):
+    def __init__(self, working_output_directory, worker_count=1, merge_identical_parts=False, flatten_assemblies=False):
+        '''
+        With a worker count greater than one, the part documents get written
+        in parallel by headless FreeCAD processes.
+        Merging identical parts lets all products share one part document per geometry.
+        Flattening the assemblies writes the whole product tree into one document.
+        '''
         self.working_output_directory = working_output_directory
+        self.worker_count = worker_count
+        self.merge_identical_parts = merge_identical_parts
+        self.flatten_assemblies = flatten_assemblies
+
+        # The flat assembly places its products as App::Link
+        if flatten_assemblies and not is_link_supported():
+            Wrn("Flattening assemblies needs App::Link of FreeCAD 0.19 or newer, writing one document per assembly instead\n")
+            self.flatten_assemblies = False
+        self.part_statistics = {PARTS_CREATED: 0, PARTS_UPDATED: 0, PARTS_SKIPPED: 0}
+        self.changed_file_names = set()
+        self.assembly_references = {}
 
     def create_or_update_part(self, json_object):
         Log("Creating or Updating a part...\n")
@@ -60,31 +92,300 @@ class JsonImporter(object):
             # but definitely efficient
             part_file_name = PART_IDENTIFIER + get_part_name_uuid(json_object)
 
-            active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(part_file_name)
+            with trace_span("create_part"):
+                active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(part_file_name)
 
-            json_part.write_to_freecad(active_document)
+                json_part.write_to_freecad(active_document)
 
-            active_document.save_and_close_active_document(part_file_name)
+                active_document.save_and_close_active_document(part_file_name)
             Log("Saved part to file: " + part_file_name + "\n")
         else:
             Log("Visualization shape is most likely NONE, therefore no file is created\n")
 
         return part_file_name
 
-    def full_import(self, json_object):
+    def write_part_colors(self, json_parts, part_file_names):
+        '''
+        Headless import workers cannot store the color of their parts, as it is a view property.
+        With a gui, the colors get written into the part documents afterwards.
+        '''
+        if not App.GuiUp:
+            return
+
+        with trace_span("part_colors", parts=len(part_file_names)):
+            for json_object in json_parts:
+                part_file_name = part_file_names.get(json_object[JSON_ELEMENT_UUID])
+                if not part_file_name:
+                    continue
+
+                json_part = JsonPartFactory().create_from_json(json_object)
+                active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(part_file_name)
+                json_part.write_color_to_freecad(active_document)
+                active_document.save_and_close_active_document(part_file_name)
+
+    def create_or_update_parts(self, json_parts):
+        '''
+        Writes the given parts, either one after the other or in parallel worker processes.
+        Parts a worker failed on are written in this process again.
+        Hands back the written file names by part uuid.
+        '''
+        part_file_names = {}
+        if self.worker_count > 1 and len(json_parts) > 1:
+            # Parts that are open in this process have to be written here,
+            # otherwise the open document would overwrite the work of the worker
+            open_documents = App.listDocuments().keys()
+            worker_parts = [json_part for json_part in json_parts
+                            if PART_IDENTIFIER + get_part_name_uuid(json_part) not in open_documents]
+
+            Log(f"Writing {len(worker_parts)} parts with {self.worker_count} workers\n")
+            from json_io.json_import_worker_pool import JsonImportWorkerPool
+            worker_pool = JsonImportWorkerPool(self.working_output_directory, self.worker_count)
+            part_file_names = worker_pool.create_or_update_parts(worker_parts)
+            self.write_part_colors(worker_parts, part_file_names)
+
+        for json_part in json_parts:
+            if json_part[JSON_ELEMENT_UUID] not in part_file_names:
+                part_file_names[json_part[JSON_ELEMENT_UUID]] = self.create_or_update_part(json_part)
+
+        # The assemblies import the parts from disk
+        DocumentSession.flush_current_session()
+
+        return part_file_names
+
+    def create_or_update_planned_parts(self, json_parts, change_plan, manifest):
+        '''
+        Only writes the parts to FreeCAD which the change plan asks for.
+        For all others the FreeCAD round trip is skipped.
+        Hands back the part file names in the order of the given parts.
+        '''
+        changed_parts = []
+        for json_part in json_parts:
+            if change_plan.get_part_change(json_part[JSON_ELEMENT_UUID]) == CHANGE_UNTOUCHED:
+                Log(f"Part '{change_plan.get_part_file_name(json_part[JSON_ELEMENT_UUID])}' is unchanged, skipping it\n")
+                self.part_statistics[PARTS_SKIPPED] += 1
+            else:
+                changed_parts.append(json_part)
+
+        written_part_file_names = self.create_or_update_parts(changed_parts)
+
+        for json_part in changed_parts:
+            part_file_name = written_part_file_names[json_part[JSON_ELEMENT_UUID]]
+            if part_file_name != "":
+                self.changed_file_names.add(part_file_name)
+                manifest.update_part(json_part, part_file_name)
+                if change_plan.get_part_change(json_part[JSON_ELEMENT_UUID]) == CHANGE_UPDATE:
+                    self.part_statistics[PARTS_UPDATED] += 1
+                else:
+                    self.part_statistics[PARTS_CREATED] += 1
+
+        return [written_part_file_names.get(json_part[JSON_ELEMENT_UUID], change_plan.get_part_file_name(json_part[JSON_ELEMENT_UUID]))
+                for json_part in json_parts]
+
+    def delete_planned_documents(self, change_plan, manifest):
+        '''
+        Removes the documents of parts and assemblies which are not part of the JSON anymore.
+        Documents which are open in FreeCAD are kept, they may contain unsaved work.
+        '''
+        open_documents = App.listDocuments()
+        delete_count = 0
+        for planned, remove_from_manifest in [(change_plan.parts, manifest.remove_part), (change_plan.assemblies, manifest.remove_assembly)]:
+            for uuid, (change, file_name) in planned.items():
+                if change != CHANGE_DELETE:
+                    continue
+                if file_name in open_documents:
+                    Wrn(f"Document '{file_name}' is not used anymore but open, keeping it\n")
+                    continue
+
+                file_full_path = ActiveDocument(self.working_output_directory).get_file_full_path(file_name)
+                if os.path.isfile(file_full_path):
+                    os.remove(file_full_path)
+                remove_from_manifest(uuid)
+                delete_count += 1
+
+        if delete_count > 0:
+            Msg(f"Deleted {delete_count} documents which are not used anymore\n")
+
+    def delete_renamed_documents(self, change_plan, uuid_index):
+        '''
+        A part or assembly renamed in Virtual Satellite keeps its uuid but gets written
+        into a document of a new name. The index still knows the document of the old name,
+        which gets deleted once no assembly document imports it anymore. What the assembly
+        documents import is recorded in the index as well.
+        '''
+        open_documents = App.listDocuments()
+        renamed_file_names = {}
+        for kind, planned in [(INDEX_KIND_PART, change_plan.parts), (INDEX_KIND_ASSEMBLY, change_plan.assemblies)]:
+            for uuid, (change, file_name) in planned.items():
+                indexed_file_name = uuid_index.get_file_name(uuid, kind)
+                if change == CHANGE_DELETE or indexed_file_name is None or indexed_file_name == file_name:
+                    continue
+                if indexed_file_name in open_documents:
+                    Wrn(f"Document '{indexed_file_name}' got renamed to '{file_name}' but is open, keeping it\n")
+                    continue
+                renamed_file_names[indexed_file_name] = file_name
+
+        if not renamed_file_names:
+            return
+
+        # Assemblies outside of an imported subtree may still import the document of the old name
+        referenced_file_names = uuid_index.get_referenced_file_names(excluded_file_names=renamed_file_names)
+        for indexed_file_name, file_name in renamed_file_names.items():
+            if indexed_file_name in referenced_file_names:
+                Wrn(f"Document '{indexed_file_name}' got renamed to '{file_name}' but is still imported by an assembly, keeping it\n")
+                continue
+
+            file_full_path = ActiveDocument(self.working_output_directory).get_file_full_path(indexed_file_name)
+            if os.path.isfile(file_full_path):
+                os.remove(file_full_path)
+                Msg(f"Deleted document '{indexed_file_name}' which got renamed to '{file_name}'\n")
+            uuid_index.remove_references(indexed_file_name)
+
+    def _get_json_assemblies(self, json_product):
+        if json_product.get(JSON_ELEMNT_CHILDREN):
+            yield json_product
+            for json_child in json_product[JSON_ELEMNT_CHILDREN]:
+                yield from self._get_json_assemblies(json_child)
+
+    def update_uuid_index(self, json_object, change_plan, manifest, uuid_index):
         '''
-        Import a whole json file's products and parts into a FreeCAD document
+        Records the documents of all planned parts and assemblies in the index,
+        together with the documents the written assemblies import.
+        Deleted documents are removed from it.
+        '''
+        planned_json_objects = [(INDEX_KIND_PART, change_plan.parts, json_part) for json_part in json_object[JSON_PARTS]]
+        # A flat assembly is recorded as the one document of the root product
+        if self.flatten_assemblies:
+            planned_json_objects += [(INDEX_KIND_ASSEMBLY, change_plan.assemblies, json_object[JSON_PRODUCTS])]
+        else:
+            planned_json_objects += [(INDEX_KIND_ASSEMBLY, change_plan.assemblies, json_assembly)
+                                     for json_assembly in self._get_json_assemblies(json_object[JSON_PRODUCTS])]
+
+        for kind, planned, json_element in planned_json_objects:
+            change, file_name = planned.get(json_element[JSON_ELEMENT_UUID], (CHANGE_UNTOUCHED, None))
+            if file_name is None or not manifest.has_file(file_name):
+                continue
+
+            object_name = None
+            if kind == INDEX_KIND_PART:
+                json_part = JsonPartFactory().create_from_json(json_element)
+                object_name = json_part.get_shape_type() if json_part is not None else None
+
+            uuid_index.update(json_element[JSON_ELEMENT_UUID], kind, file_name, object_name,
+                              imported=change in [CHANGE_CREATE, CHANGE_UPDATE])
+
+        for kind, planned in [(INDEX_KIND_PART, change_plan.parts), (INDEX_KIND_ASSEMBLY, change_plan.assemblies)]:
+            for uuid, (change, file_name) in planned.items():
+                if change == CHANGE_DELETE and not manifest.has_file(file_name):
+                    uuid_index.remove(uuid, kind)
+                    uuid_index.remove_references(file_name)
+
+        orphaned_file_names = uuid_index.find_orphaned_files()
+        if len(orphaned_file_names) > 0:
+            Log(f"Documents in the working directory which belong to no part or assembly: {orphaned_file_names}\n")
+
+    def write_flat_assembly(self, json_object, change_plan, manifest):
+        '''
+        Writes the flat document of the root product, unless the change plan leaves it untouched
+        '''
+        flat_assembly = JsonProductFlatAssembly(self.working_output_directory)
+        if change_plan.get_assembly_change(json_object[JSON_ELEMENT_UUID]) == CHANGE_UNTOUCHED:
+            Log(f"Flat assembly '{flat_assembly.get_document_name(json_object)}' is unchanged, skipping it\n")
+            json_product = JsonProductAssembly().parse_from_json(json_object)
+            if json_product is None:
+                return None, None
+            active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(flat_assembly.get_document_name(json_object))
+            return json_product, active_document
+
+        json_product, active_document = flat_assembly.write_to_freecad(json_object)
+        if json_product is not None:
+            manifest.update_flat_assembly(json_object, flat_assembly.get_document_name(json_object))
+            self.changed_file_names.add(flat_assembly.get_document_name(json_object))
+            self.assembly_references[flat_assembly.get_document_name(json_object)] = get_imported_file_names(active_document.app_active_document)
+        return json_product, active_document
+
+    def _preprocess(self, json_object, product_uuid):
+        preprocessor = JsonPreprocessor()
+        if product_uuid is not None:
+            json_object = preprocessor.prune_to_product(json_object, product_uuid)
+            if json_object is None:
+                return None
+
+        # Make sure every part document gets written only once
+        return preprocessor.deduplicate_parts(json_object, self.merge_identical_parts)
+
+    def plan_import(self, json_object, product_uuid=None):
+        '''
+        Dry run of the import. Compares the JSON against the working directory
+        and hands back the change plan, no FreeCAD document gets touched.
+        The plan can be handed to the full import, which then applies it as is.
+        '''
+        json_object = self._preprocess(json_object, product_uuid)
+        if json_object is None:
+            return None
+
+        manifest = JsonManifest(self.working_output_directory).load()
+        return JsonChangePlan(manifest).plan(json_object, plan_deletes=product_uuid is None, flatten_assemblies=self.flatten_assemblies)
+
+    def full_import(self, json_object, product_uuid=None, change_plan=None):
+        '''
+        Import a whole json file's products and parts into a FreeCAD document.
+        Only the documents the change plan asks for get written.
+        Given a product uuid, only the subtree of this product and the parts
+        it references get imported. Documents outside of it are left alone.
+        Given the change plan of plan_import for the same JSON and product uuid,
+        the JSON is not preprocessed and planned again.
         '''
         Log("Calling the importer\n")
 
+        ancestor_uuids = []
+        if product_uuid is not None:
+            ancestor_uuids = JsonPreprocessor().get_ancestor_uuids(json_object, product_uuid)
+
+        if change_plan is None:
+            change_plan = self.plan_import(json_object, product_uuid)
+            if change_plan is None:
+                return [], None, None
+
+        json_object = change_plan.json_object
         json_parts = json_object[JSON_PARTS]
+        manifest = change_plan.manifest
+        Msg("Import plan:\n" + change_plan.get_summary())
+
+        self.part_statistics = {PARTS_CREATED: 0, PARTS_UPDATED: 0, PARTS_SKIPPED: 0}
+        self.changed_file_names = set()
+        self.assembly_references = {}
+
+        # Recompute every written document only once before it gets saved
+        with BulkWrite():
+            with trace_span("parts", parts=len(json_parts)):
+                part_file_names = self.create_or_update_planned_parts(json_parts, change_plan, manifest)
+                manifest.save()
+            Msg("Parts created: {}, updated: {}, skipped: {}\n".format(
+                self.part_statistics[PARTS_CREATED],
+                self.part_statistics[PARTS_UPDATED],
+                self.part_statistics[PARTS_SKIPPED]))
+
+            with trace_span("assemblies"):
+                if self.flatten_assemblies:
+                    json_product, active_document = self.write_flat_assembly(json_object[JSON_PRODUCTS], change_plan, manifest)
+                else:
+                    traverser = JsonProductAssemblyTreeTraverser(self.working_output_directory, part_file_names, change_plan, manifest,
+                                                                 self.changed_file_names, self.assembly_references)
+                    json_product, active_document = traverser.traverse_and_parse_from_json(json_object[JSON_PRODUCTS])
 
-        part_file_names = []
-        for part in json_parts:
-            part_file_names.append(self.create_or_update_part(part))
+        with JsonUuidIndex(self.working_output_directory) as uuid_index:
+            for assembly_file_name, referenced_file_names in self.assembly_references.items():
+                uuid_index.set_references(assembly_file_name, referenced_file_names)
+            self.delete_renamed_documents(change_plan, uuid_index)
+            self.delete_planned_documents(change_plan, manifest)
+            self.update_uuid_index(json_object, change_plan, manifest, uuid_index)
 
-        traverser = JsonProductAssemblyTreeTraverser(self.working_output_directory, part_file_names)
-        json_product, active_document = traverser.traverse_and_parse_from_json(json_object[JSON_PRODUCTS])
+        # The assemblies above a written subtree import its document but did not get updated,
+        # forgetting them lets the next import update them
+        if not change_plan.is_empty():
+            for ancestor_uuid in ancestor_uuids:
+                manifest.remove_assembly(ancestor_uuid)
+        manifest.save()
 
         Log("Import successful\n")
 
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+import hashlib
+import json
+import os
+import FreeCAD
+from freecad.active_document import ActiveDocument
+from json_io.json_definitions import JSON_ELEMENT_UUID, JSON_ELEMENT_STL_PATH, JSON_ELEMNT_CHILDREN
+
+Log = FreeCAD.Console.PrintLog
+
+MANIFEST_FILE_NAME = ".virtual_satellite_manifest.json"
+
+MANIFEST_PARTS = "parts"
+MANIFEST_ASSEMBLIES = "assemblies"
+MANIFEST_FILE = "file"
+MANIFEST_HASH = "hash"
+MANIFEST_MTIME = "mtime"
+
+
+def get_json_hash(json_object):
+    '''
+    Creates a canonical hash of a json object. Keys are sorted and
+    separators are fixed, so the same content always gives the same hash.
+    '''
+    canonical_json = json.dumps(json_object, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+
+
+class JsonManifest(object):
+    '''
+    This class keeps track of what got imported into the working directory.
+    For every part and assembly it remembers the hash of the json it was created
+    from and the modification time of the written FreeCAD file. An unchanged part
+    or assembly does not need to be written to FreeCAD again.
+    '''
+
+    def __init__(self, working_output_directory):
+        self.working_output_directory = working_output_directory
+        self._manifest = {MANIFEST_PARTS: {}, MANIFEST_ASSEMBLIES: {}}
+
+    def get_manifest_path(self):
+        return os.path.join(self.working_output_directory, MANIFEST_FILE_NAME)
+
+    def load(self):
+        manifest_path = self.get_manifest_path()
+        self._manifest = {MANIFEST_PARTS: {}, MANIFEST_ASSEMBLIES: {}}
+
+        if os.path.isfile(manifest_path):
+            try:
+                with open(manifest_path, "r") as file:
+                    self._manifest.update(json.load(file))
+            except ValueError:
+                Log(f"Manifest '{manifest_path}' is invalid, all parts will be written again\n")
+
+        return self
+
+    def save(self):
+        with open(self.get_manifest_path(), "w") as file:
+            json.dump(self._manifest, file, sort_keys=True, indent=1)
+
+    def get_part_hash(self, json_object):
+        '''
+        Hashes the part json. A geometry part also depends on its STL file,
+        thus the size and time stamp of that file are part of the hash.
+        '''
+        hashed_object = dict(json_object)
+        stl_path = json_object.get(JSON_ELEMENT_STL_PATH)
+        if stl_path is not None and os.path.isfile(stl_path):
+            stl_stat = os.stat(stl_path)
+            hashed_object[JSON_ELEMENT_STL_PATH + "_stat"] = [stl_stat.st_size, stl_stat.st_mtime]
+
+        return get_json_hash(hashed_object)
+
+    def _get_file_mtime(self, file_name):
+        file_full_path = ActiveDocument(self.working_output_directory).get_file_full_path(file_name)
+        if os.path.isfile(file_full_path):
+            return os.path.getmtime(file_full_path)
+        return None
+
+    def get_assembly_hash(self, json_object):
+        '''
+        Hashes what gets written into the assembly document itself, that is the assembly
+        and its direct children. Deeper levels live in the documents of the children.
+        '''
+        hashed_object = {key: value for key, value in json_object.items() if key != JSON_ELEMNT_CHILDREN}
+        hashed_object[JSON_ELEMNT_CHILDREN] = [
+            {key: value for key, value in json_child.items() if key != JSON_ELEMNT_CHILDREN}
+            for json_child in json_object.get(JSON_ELEMNT_CHILDREN, [])]
+
+        return get_json_hash(hashed_object)
+
+    def has_file(self, file_name):
+        return self._get_file_mtime(file_name) is not None
+
+    def has_part_file(self, file_name):
+        return self.has_file(file_name)
+
+    def _is_unchanged(self, section, json_hash, json_object, file_name):
+        entry = self._manifest[section].get(json_object[JSON_ELEMENT_UUID])
+        if entry is None:
+            return False
+
+        return (
+            entry[MANIFEST_FILE] == file_name and
+            entry[MANIFEST_HASH] == json_hash and
+            entry[MANIFEST_MTIME] == self._get_file_mtime(file_name))
+
+    def _update(self, section, json_hash, json_object, file_name):
+        self._manifest[section][json_object[JSON_ELEMENT_UUID]] = {
+            MANIFEST_FILE: file_name,
+            MANIFEST_HASH: json_hash,
+            MANIFEST_MTIME: self._get_file_mtime(file_name)
+        }
+
+    def is_part_unchanged(self, json_object, file_name):
+        '''
+        A part is unchanged if it got written from the very same json
+        into the same file, and this file was not touched afterwards.
+        '''
+        return self._is_unchanged(MANIFEST_PARTS, self.get_part_hash(json_object), json_object, file_name)
+
+    def update_part(self, json_object, file_name):
+        self._update(MANIFEST_PARTS, self.get_part_hash(json_object), json_object, file_name)
+
+    def is_assembly_unchanged(self, json_object, file_name):
+        '''
+        Same as for parts, but an assembly also has to be written again
+        if any of the documents it imports changed. This is up to the caller.
+        '''
+        return self._is_unchanged(MANIFEST_ASSEMBLIES, self.get_assembly_hash(json_object), json_object, file_name)
+
+    def update_assembly(self, json_object, file_name):
+        self._update(MANIFEST_ASSEMBLIES, self.get_assembly_hash(json_object), json_object, file_name)
+
+    def get_flat_assembly_hash(self, json_object):
+        '''
+        A flat assembly holds the whole product tree in its document, thus it hashes all levels
+        '''
+        return get_json_hash(json_object)
+
+    def is_flat_assembly_unchanged(self, json_object, file_name):
+        return self._is_unchanged(MANIFEST_ASSEMBLIES, self.get_flat_assembly_hash(json_object), json_object, file_name)
+
+    def update_flat_assembly(self, json_object, file_name):
+        self._update(MANIFEST_ASSEMBLIES, self.get_flat_assembly_hash(json_object), json_object, file_name)
+
+    def get_part_files(self):
+        '''
+        Hands back the file names of all known parts by their uuid
+        '''
+        return {uuid: entry[MANIFEST_FILE] for uuid, entry in self._manifest[MANIFEST_PARTS].items()}
+
+    def get_assembly_files(self):
+        '''
+        Hands back the file names of all known assemblies by their uuid
+        '''
+        return {uuid: entry[MANIFEST_FILE] for uuid, entry in self._manifest[MANIFEST_ASSEMBLIES].items()}
+
+    def remove_part(self, uuid):
+        self._manifest[MANIFEST_PARTS].pop(uuid, None)
+
+    def remove_assembly(self, uuid):
+        self._manifest[MANIFEST_ASSEMBLIES].pop(uuid, None)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+from collections import OrderedDict
+
+
+class JsonPartRegistry(object):
+    '''
+    Collects the parts read during an export in the order they were found.
+    Checking if a part has been read already takes constant time. Iterating
+    and indexing hands back (part name, part) tuples like the former part list.
+    The part names are kept in a list as well, so indexing takes constant time, too.
+    '''
+
+    def __init__(self):
+        self._parts = OrderedDict()
+        self._part_names = []
+        self.deduplicated_reads = 0
+
+    def __contains__(self, part_name):
+        return part_name in self._parts
+
+    def __len__(self):
+        return len(self._parts)
+
+    def __iter__(self):
+        return iter(self._parts.items())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [(part_name, self._parts[part_name]) for part_name in self._part_names[index]]
+
+        part_name = self._part_names[index]
+        return part_name, self._parts[part_name]
+
+    def __repr__(self):
+        return f"JsonPartRegistry({list(self._parts.keys())}, deduplicated_reads={self.deduplicated_reads})"
+
+    def append(self, name_and_part):
+        part_name, part = name_and_part
+        # a part read again keeps its position
+        if part_name not in self._parts:
+            self._part_names.append(part_name)
+        self._parts[part_name] = part
+
+    def get(self, part_name):
+        return self._parts.get(part_name)
+
+    def record_deduplicated_read(self):
+        '''
+        Counts a product referencing a part which has been read before
+        '''
+        self.deduplicated_reads += 1
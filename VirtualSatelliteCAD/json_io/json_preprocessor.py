@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+from copy import deepcopy
+import FreeCAD
+from json_io.json_definitions import JSON_PARTS, JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, \
+    JSON_ELEMENT_NAME, JSON_ELEMENT_UUID, JSON_ELEMENT_PART_UUID, JSON_ELEMENT_PART_FILE_NAME, \
+    PART_IDENTIFIER, get_part_name_uuid
+from json_io.json_manifest import get_json_hash
+
+Log = FreeCAD.Console.PrintLog
+Msg = FreeCAD.Console.PrintMessage
+Err = FreeCAD.Console.PrintError
+
+
+class JsonPreprocessor(object):
+    '''
+    Provides functionality to prepare an imported JSON before any FreeCAD document is touched
+    '''
+
+    def __init__(self):
+        self.removed_by_uuid = 0
+        self.removed_by_geometry = 0
+
+    def _get_geometry_key(self, json_part):
+        '''
+        Everything but the name and the uuid defines what the part looks like
+        '''
+        return get_json_hash({key: value for key, value in json_part.items() if key not in [JSON_ELEMENT_NAME, JSON_ELEMENT_UUID]})
+
+    def _replace_part_references(self, json_product, replaced_parts):
+        '''
+        The products keep the uuid and name of their part, so the export still hands them back.
+        Only the document they import is the one of the kept part.
+        '''
+        part_uuid = json_product.get(JSON_ELEMENT_PART_UUID)
+        if part_uuid in replaced_parts:
+            json_product[JSON_ELEMENT_PART_FILE_NAME] = PART_IDENTIFIER + get_part_name_uuid(replaced_parts[part_uuid])
+
+        for json_child in json_product.get(JSON_ELEMNT_CHILDREN, []):
+            self._replace_part_references(json_child, replaced_parts)
+
+    def _find_product(self, json_product, product_uuid):
+        if json_product.get(JSON_ELEMENT_UUID) == product_uuid:
+            return json_product
+
+        for json_child in json_product.get(JSON_ELEMNT_CHILDREN, []):
+            found_product = self._find_product(json_child, product_uuid)
+            if found_product is not None:
+                return found_product
+        return None
+
+    def get_ancestor_uuids(self, json_object, product_uuid):
+        '''
+        Hands back the uuids of all products above the given one, starting at the root
+        '''
+        def find_path(json_product):
+            if json_product.get(JSON_ELEMENT_UUID) == product_uuid:
+                return []
+            for json_child in json_product.get(JSON_ELEMNT_CHILDREN, []):
+                path = find_path(json_child)
+                if path is not None:
+                    return [json_product[JSON_ELEMENT_UUID]] + path
+            return None
+
+        return find_path(json_object[JSON_PRODUCTS]) or []
+
+    def _collect_part_uuids(self, json_product, part_uuids):
+        if JSON_ELEMENT_PART_UUID in json_product:
+            part_uuids.add(json_product[JSON_ELEMENT_PART_UUID])
+
+        for json_child in json_product.get(JSON_ELEMNT_CHILDREN, []):
+            self._collect_part_uuids(json_child, part_uuids)
+
+    def prune_to_product(self, json_object, product_uuid):
+        '''
+        Reduces the JSON to the subtree of the given product and the parts this subtree references.
+        The product becomes the root of the import. Hands back None if there is no such assembly.
+        '''
+        json_product = self._find_product(json_object[JSON_PRODUCTS], product_uuid)
+        if json_product is None or not json_product.get(JSON_ELEMNT_CHILDREN):
+            Err(f"There is no assembly with the uuid '{product_uuid}' to import\n")
+            return None
+
+        part_uuids = set()
+        self._collect_part_uuids(json_product, part_uuids)
+
+        pruned_json_object = dict(json_object)
+        pruned_json_object[JSON_PRODUCTS] = json_product
+        pruned_json_object[JSON_PARTS] = [json_part for json_part in json_object[JSON_PARTS] if json_part[JSON_ELEMENT_UUID] in part_uuids]
+
+        Msg("Importing the subtree of '{}' with {} of {} parts\n".format(
+            json_product.get(JSON_ELEMENT_NAME), len(pruned_json_object[JSON_PARTS]), len(json_object[JSON_PARTS])))
+
+        return pruned_json_object
+
+    def deduplicate_parts(self, json_object, merge_identical_geometry=False):
+        '''
+        Removes parts which would be written to the same part document more than once.
+        Parts are always collapsed by their uuid. If requested, parts of identical geometry
+        are collapsed as well, and the products referencing them import the document of the kept part.
+        Hands back a JSON object, the given one stays untouched.
+        '''
+        self.removed_by_uuid, self.removed_by_geometry = 0, 0
+
+        unique_parts, known_uuids, parts_by_geometry, replaced_parts = [], set(), {}, {}
+        for json_part in json_object[JSON_PARTS]:
+            uuid = json_part[JSON_ELEMENT_UUID]
+            if uuid in known_uuids:
+                self.removed_by_uuid += 1
+                continue
+            known_uuids.add(uuid)
+
+            if merge_identical_geometry:
+                geometry_key = self._get_geometry_key(json_part)
+                if geometry_key in parts_by_geometry:
+                    Log(f"Part '{json_part[JSON_ELEMENT_NAME]}' is replaced by identical part '{parts_by_geometry[geometry_key][JSON_ELEMENT_NAME]}'\n")
+                    replaced_parts[uuid] = parts_by_geometry[geometry_key]
+                    self.removed_by_geometry += 1
+                    continue
+                parts_by_geometry[geometry_key] = json_part
+
+            unique_parts.append(json_part)
+
+        deduplicated_json_object = dict(json_object)
+        deduplicated_json_object[JSON_PARTS] = unique_parts
+        if replaced_parts:
+            deduplicated_json_object[JSON_PRODUCTS] = deepcopy(json_object[JSON_PRODUCTS])
+            self._replace_part_references(deduplicated_json_object[JSON_PRODUCTS], replaced_parts)
+
+        Msg("Avoided {} redundant part document writes ({} by uuid, {} by identical geometry)\n".format(
+            self.removed_by_uuid + self.removed_by_geometry, self.removed_by_uuid, self.removed_by_geometry))
+
+        return deduplicated_json_object
@@ -24,11 +24,70 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 #
 import FreeCAD
+from collections import OrderedDict
+from module.tracer import trace_span
 Log = FreeCAD.Console.PrintLog
 
 FREECAD_PART_SHEET_NAME = "VS"
 FREECAD_PART_SHEET_ATTRIBUTE_START_LINE = 3
 
+# Instead of a spreadsheet the attributes can be stored in one property of a plain object
+FREECAD_PART_PROPERTY_NAME = "VirtualSatelliteAttributes"
+
+FREECAD_PART_SHEET_HEADER = [
+    ("A1", "Virtual Satellite Part Data"),
+    ("A2", "Name"),
+    ("B2", "Value"),
+    ("C2", "Unit")
+]
+
+# The rows of the attributes only depend on the attributes of the part or product
+_attribute_rows_by_schema = {}
+
+
+def is_property_storage_enabled():
+    '''
+    Checks the preferences if the attributes should be stored as property instead of a spreadsheet
+    '''
+    preferences = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/VirtualSatelliteCAD")
+    return preferences.GetBool("UsePropertyStorage", False)
+
+
+def is_property_storage(freecad_sheet):
+    '''
+    Tells if the given sheet object stores the attributes as property or is a spreadsheet
+    '''
+    return hasattr(freecad_sheet, FREECAD_PART_PROPERTY_NAME)
+
+
+def get_attribute_rows(attributes):
+    '''
+    Hands back the sheet row of every attribute, computed only once per set of attributes
+    '''
+    schema = tuple(attributes.keys())
+    attribute_rows = _attribute_rows_by_schema.get(schema)
+    if attribute_rows is None:
+        attribute_rows = {attribute_name: index + FREECAD_PART_SHEET_ATTRIBUTE_START_LINE for index, attribute_name in enumerate(schema)}
+        _attribute_rows_by_schema[schema] = attribute_rows
+    return attribute_rows
+
+
+def is_cell_content_equal(cell_content, value):
+    '''
+    Compares the content of a sheet cell with a value to be written. FreeCAD normalises
+    numbers and marks text with a leading quote, therefore the parsed values are compared.
+    '''
+    if cell_content.startswith("'"):
+        cell_content = cell_content[1:]
+
+    if cell_content == value:
+        return True
+
+    try:
+        return float(cell_content) == float(value)
+    except ValueError:
+        return False
+
 
 class JsonSpreadSheet(object):
     '''
@@ -54,36 +113,112 @@ class JsonSpreadSheet(object):
         out the uuid of the part which corresponds to the uuid of
         virtual satellite.
         '''
+        with trace_span("sheet_write", attributes=len(self._json_part_or_product.attributes)):
+            if is_property_storage_enabled():
+                self._write_property(active_document)
+            else:
+                self._write_sheet(active_document)
+
+        # The object owning the sheet got written as well, so the document is recomputed
+        # even if no attribute changed. During a bulk write the recompute happens once
+        # before the document is saved.
+        active_document.recompute()
+
+    def _get_attribute_values(self):
+        '''
+        Hands back the values of all existing attributes as strings by their name
+        '''
+        attribute_values = OrderedDict()
+        for json_part_attribute_name in self._json_part_or_product.attributes.keys():
+            try:
+                attribute_values[json_part_attribute_name] = str(getattr(self._json_part_or_product, json_part_attribute_name))
+            except AttributeError:
+                Log(f"Warning: Couldn't write attribute '{json_part_attribute_name}' because it doesn't exist")
+
+        return attribute_values
+
+    def _get_cells(self):
+        '''
+        Hands back the content of all attribute rows as list of cells and their values
+        '''
+        cells = []
+        sheet_line = FREECAD_PART_SHEET_ATTRIBUTE_START_LINE
+        for json_part_attribute_name, json_part_attribute_value in self._get_attribute_values().items():
+            json_part_attribute_unit = self._json_part_or_product.attributes[json_part_attribute_name]
 
+            cells.append(("A" + str(sheet_line), json_part_attribute_name))
+            cells.append(("B" + str(sheet_line), json_part_attribute_value))
+            cells.append(("C" + str(sheet_line), json_part_attribute_unit))
+
+            sheet_line += 1
+
+        return cells
+
+    def _remove_sheet_of_other_storage(self, active_document, store_as_property):
+        '''
+        Documents written with the other storage get their sheet replaced, which migrates them
+        '''
         sheet_name = self.create_sheet_name()
         sheet = active_document.app_active_document.getObject(sheet_name)
-        if not self.is_sheet_attached(active_document):
-            sheet = active_document.app_active_document.addObject("Spreadsheet::Sheet", sheet_name)
 
-        sheet.set("A1", "Virtual Satellite Part Data")
-        sheet.set("A2", "Name")
-        sheet.set("B2", "Value")
-        sheet.set("C2", "Unit")
-        sheet.setStyle("A1:C2", "bold")
+        if sheet is not None and is_property_storage(sheet) != store_as_property:
+            Log(f"Migrating '{sheet_name}' to the {'property' if store_as_property else 'spreadsheet'} storage\n")
+            active_document.app_active_document.removeObject(sheet_name)
+            sheet = None
 
-        sheet_line = FREECAD_PART_SHEET_ATTRIBUTE_START_LINE
-        for json_part_attribute_name in list(self._json_part_or_product.attributes.keys()):
+        return sheet
 
-            try:
-                json_part_attribute_value = str(getattr(self._json_part_or_product, json_part_attribute_name))
-                json_part_attribute_unit = self._json_part_or_product.attributes[json_part_attribute_name]
+    def _write_property(self, active_document):
+        '''
+        Stores all attributes in one map property of a plain object named like the sheet.
+        Compared to a spreadsheet it keeps the documents small.
+        '''
+        sheet = self._remove_sheet_of_other_storage(active_document, store_as_property=True)
 
-                sheet.set("A" + str(sheet_line), json_part_attribute_name)
-                sheet.set("B" + str(sheet_line), json_part_attribute_value)
-                sheet.set("C" + str(sheet_line), json_part_attribute_unit)
+        if sheet is None:
+            sheet = active_document.app_active_document.addObject("App::FeaturePython", self.create_sheet_name())
+            sheet.addProperty("App::PropertyMap", FREECAD_PART_PROPERTY_NAME, "VirtualSatellite", "Virtual Satellite Part Data")
 
-                sheet_line += 1
-            except AttributeError:
-                Log(f"Warning: Couldn't write attribute '{json_part_attribute_name}' because it doesn't exist")
+        attribute_values = dict(self._get_attribute_values())
+        if getattr(sheet, FREECAD_PART_PROPERTY_NAME) != attribute_values:
+            setattr(sheet, FREECAD_PART_PROPERTY_NAME, attribute_values)
+
+    def _read_sheet_contents(self, sheet, cells):
+        '''
+        Reads the contents of all given cells in one pass and hands them back by their cell
+        '''
+        return {cell: sheet.getContents(cell) for cell, _ in cells}
 
-        # Recompute the sheet, so that all properties are correctly written
-        # if not recomputed accessing the properties will result in none objects
-        active_document.app_active_document.recompute()
+    def _write_sheet(self, active_document):
+        '''
+        The spreadsheet has no call to set many cells at once. Instead the existing
+        contents are read once and only the cells which differ get set.
+        '''
+        sheet = self._remove_sheet_of_other_storage(active_document, store_as_property=False)
+        sheet_name = self.create_sheet_name()
+        cells = FREECAD_PART_SHEET_HEADER + self._get_cells()
+
+        if sheet is None:
+            sheet = active_document.app_active_document.addObject("Spreadsheet::Sheet", sheet_name)
+            changed_cells = cells
+        else:
+            # Clear the rows of attributes which got written before but don't exist anymore
+            written_lines = (len(cells) - len(FREECAD_PART_SHEET_HEADER)) // 3
+            cells += [(column + str(sheet_line), "")
+                      for sheet_line in range(FREECAD_PART_SHEET_ATTRIBUTE_START_LINE + written_lines,
+                                              FREECAD_PART_SHEET_ATTRIBUTE_START_LINE + len(self._json_part_or_product.attributes))
+                      for column in "ABC"]
+
+            # An existing sheet only gets the cells written which changed
+            sheet_contents = self._read_sheet_contents(sheet, cells)
+            changed_cells = [(cell, value) for cell, value in cells if not is_cell_content_equal(sheet_contents[cell], value)]
+
+        if len(changed_cells) == 0:
+            return
+
+        for cell, value in changed_cells:
+            sheet.set(cell, value)
+        sheet.setStyle("A1:C2", "bold")
 
     def read_sheet_attribute(self, active_document, attribute_name):
         '''
@@ -93,10 +228,7 @@ class JsonSpreadSheet(object):
         '''
         sheet_name = self.create_sheet_name()
         sheet = active_document.app_active_document.getObject(sheet_name)
-        attribute_index = list(self._json_part_or_product.attributes).index(attribute_name)
-
-        if (attribute_index >= 0 and attribute_index < len(self._json_part_or_product.attributes)):
-            return sheet.get("B" + str(attribute_index + FREECAD_PART_SHEET_ATTRIBUTE_START_LINE))
+        return self.read_sheet_attribute_from_freecad(sheet, attribute_name)
 
     def read_sheet_attribute_from_freecad(self, freecad_sheet, attribute_name):
         '''
@@ -104,8 +236,29 @@ class JsonSpreadSheet(object):
         given document. The method allows to individually access the
         written properties.
         '''
+        if is_property_storage(freecad_sheet):
+            return getattr(freecad_sheet, FREECAD_PART_PROPERTY_NAME).get(attribute_name)
+
+        attribute_row = get_attribute_rows(self._json_part_or_product.attributes).get(attribute_name)
+
+        if attribute_row is not None:
+            return freecad_sheet.get("B" + str(attribute_row))
+
+    def read_sheet_attributes_from_freecad(self, freecad_sheet):
+        '''
+        This method reads all written properties from the part sheet
+        at once and hands them back by their attribute name.
+        '''
+        if is_property_storage(freecad_sheet):
+            stored_attributes = getattr(freecad_sheet, FREECAD_PART_PROPERTY_NAME)
+            return {attribute_name: stored_attributes[attribute_name]
+                    for attribute_name in self._json_part_or_product.attributes if attribute_name in stored_attributes}
 
-        attribute_index = list(self._json_part_or_product.attributes).index(attribute_name)
+        sheet_attributes = {}
+        for attribute_name, attribute_row in get_attribute_rows(self._json_part_or_product.attributes).items():
+            try:
+                sheet_attributes[attribute_name] = freecad_sheet.get("B" + str(attribute_row))
+            except ValueError:
+                Log(f"Warning: Couldn't read attribute '{attribute_name}' because its cell is empty\n")
 
-        if (attribute_index >= 0 and attribute_index < len(self._json_part_or_product.attributes)):
-            return freecad_sheet.get("B" + str(attribute_index + FREECAD_PART_SHEET_ATTRIBUTE_START_LINE))
+        return sheet_attributes
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+import os
+import sqlite3
+import time
+import FreeCAD
+from freecad.active_document import FREECAD_FILE_EXTENSION
+from json_io.json_definitions import PART_IDENTIFIER, PRODUCT_IDENTIFIER
+
+Log = FreeCAD.Console.PrintLog
+
+UUID_INDEX_FILE_NAME = ".virtual_satellite_index.sqlite"
+
+INDEX_KIND_PART = "part"
+INDEX_KIND_ASSEMBLY = "assembly"
+
+INDEX_UUID = "uuid"
+INDEX_KIND = "kind"
+INDEX_FILE_NAME = "file_name"
+INDEX_OBJECT_NAME = "object_name"
+INDEX_IMPORT_TIME = "import_time"
+
+INDEX_COLUMNS = [INDEX_UUID, INDEX_KIND, INDEX_FILE_NAME, INDEX_OBJECT_NAME, INDEX_IMPORT_TIME]
+
+
+class JsonUuidIndex(object):
+    '''
+    A small SQLite database in the working directory, which maps the uuid of every
+    part and assembly to its document, the name of its object in there and the time
+    of its last import. For every assembly document it also keeps the names of the
+    documents it imports. Finding the document of a uuid, documents nobody knows
+    anymore or documents still imported does not need to open any document.
+    Whether a document has to be written again is up to the manifest.
+    '''
+
+    def __init__(self, working_output_directory):
+        self.working_output_directory = working_output_directory
+        self._connection = None
+
+    def get_index_path(self):
+        return os.path.join(self.working_output_directory, UUID_INDEX_FILE_NAME)
+
+    def open(self):
+        self._connection = sqlite3.connect(self.get_index_path())
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "uuid TEXT NOT NULL, kind TEXT NOT NULL, file_name TEXT NOT NULL, "
+            "object_name TEXT, import_time REAL, "
+            "PRIMARY KEY (uuid, kind))")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_file_name ON entries (file_name)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS document_references ("
+            "file_name TEXT NOT NULL, referenced_file_name TEXT NOT NULL, "
+            "PRIMARY KEY (file_name, referenced_file_name))")
+        return self
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_entry(self, uuid, kind):
+        '''
+        Hands back the entry of the uuid as dictionary, or None if it is unknown
+        '''
+        row = self._connection.execute(
+            "SELECT " + ", ".join(INDEX_COLUMNS) + " FROM entries WHERE uuid = ? AND kind = ?", (uuid, kind)).fetchone()
+        return dict(zip(INDEX_COLUMNS, row)) if row is not None else None
+
+    def get_file_name(self, uuid, kind):
+        entry = self.get_entry(uuid, kind)
+        return entry[INDEX_FILE_NAME] if entry is not None else None
+
+    def get_file_names(self, kind):
+        '''
+        Hands back the file names of all entries of the given kind by their uuid
+        '''
+        return dict(self._connection.execute("SELECT uuid, file_name FROM entries WHERE kind = ?", (kind,)).fetchall())
+
+    def update(self, uuid, kind, file_name, object_name=None, imported=False):
+        '''
+        Creates or updates the entry of the uuid. Values which are not given are kept.
+        The import time is only set if the document got written by an import.
+        '''
+        entry = self.get_entry(uuid, kind) or {}
+        self._connection.execute(
+            "INSERT OR REPLACE INTO entries (" + ", ".join(INDEX_COLUMNS) + ") VALUES (?, ?, ?, ?, ?)", (
+                uuid, kind, file_name,
+                object_name if object_name is not None else entry.get(INDEX_OBJECT_NAME),
+                time.time() if imported else entry.get(INDEX_IMPORT_TIME)))
+
+    def remove(self, uuid, kind):
+        self._connection.execute("DELETE FROM entries WHERE uuid = ? AND kind = ?", (uuid, kind))
+
+    def set_references(self, file_name, referenced_file_names):
+        '''
+        Replaces the names of the documents the given document imports
+        '''
+        self.remove_references(file_name)
+        self._connection.executemany(
+            "INSERT INTO document_references (file_name, referenced_file_name) VALUES (?, ?)",
+            [(file_name, referenced_file_name) for referenced_file_name in sorted(set(referenced_file_names))])
+
+    def remove_references(self, file_name):
+        self._connection.execute("DELETE FROM document_references WHERE file_name = ?", (file_name,))
+
+    def get_referenced_file_names(self, excluded_file_names=()):
+        '''
+        Hands back the names of all documents which are imported by another document.
+        What the excluded documents import is not taken into account.
+        '''
+        excluded_file_names = list(excluded_file_names)
+        query = "SELECT DISTINCT referenced_file_name FROM document_references"
+        if excluded_file_names:
+            query += " WHERE file_name NOT IN (" + ", ".join("?" * len(excluded_file_names)) + ")"
+
+        return {referenced_file_name for referenced_file_name, in self._connection.execute(query, excluded_file_names)}
+
+    def find_orphaned_files(self):
+        '''
+        Hands back the part and assembly documents of the working directory which no entry refers to
+        '''
+        indexed_file_names = {file_name for file_name, in self._connection.execute("SELECT file_name FROM entries")}
+
+        orphaned_file_names = []
+        for file in sorted(os.listdir(self.working_output_directory)):
+            file_name, extension = os.path.splitext(file)
+            if extension != FREECAD_FILE_EXTENSION or not file_name.startswith((PART_IDENTIFIER, PRODUCT_IDENTIFIER)):
+                continue
+            if file_name not in indexed_file_names:
+                orphaned_file_names.append(file_name)
+
+        return orphaned_file_names
+
+    def find_missing_files(self):
+        '''
+        Hands back the uuids and kinds of the entries whose document does not exist anymore
+        '''
+        return [(uuid, kind) for uuid, kind, file_name in self._connection.execute("SELECT uuid, kind, file_name FROM entries")
+                if not os.path.isfile(os.path.join(self.working_output_directory, file_name + FREECAD_FILE_EXTENSION))]
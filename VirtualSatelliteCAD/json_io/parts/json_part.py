@@ -126,7 +126,16 @@ class AJsonPart():
         object_name_and_type = self.get_shape_type()
 
         active_document.app_active_document.getObject(object_name_and_type).Label = self.name
-        active_document.gui_active_document.getObject(object_name_and_type).ShapeColor = self.color
+
+        self.write_color_to_freecad(active_document)
+
+    def write_color_to_freecad(self, active_document):
+        '''
+        The color is a view property, it can only be set if there is a gui.
+        Parts written by headless import workers get their color this way afterwards.
+        '''
+        if active_document.gui_active_document is not None:
+            active_document.gui_active_document.getObject(self.get_shape_type()).ShapeColor = self.color
 
     def _set_freecad_properties(self, active_document):
         pass
@@ -143,13 +152,10 @@ class AJsonPart():
         self._set_freecad_properties(active_document)
 
         # Attach the Spreadsheet with a copy of all relevant parameters
-        # to the FreeCAD document
+        # to the FreeCAD document. Writing the sheet always recomputes the document,
+        # which recomputes the object on FreeCAD side as well.
         self.sheet.write_to_freecad(active_document)
 
-        # Recompute the object on FreeCAD side
-        object_name_and_type = self.get_shape_type()
-        active_document.app_active_document.getObject(object_name_and_type).recompute()
-
     def _get_freecad_properties(self, freecad_object):
         """
         Function to be overwritten by concrete part implementations
@@ -158,17 +164,18 @@ class AJsonPart():
 
     def read_from_freecad(self, freecad_object, freecad_sheet):
         sheet = JsonSpreadSheet(self)
+        sheet_attributes = sheet.read_sheet_attributes_from_freecad(freecad_sheet)
 
-        self.name = sheet.read_sheet_attribute_from_freecad(freecad_sheet, "name")
-        self.shape = sheet.read_sheet_attribute_from_freecad(freecad_sheet, "shape")
-        self.uuid = sheet.read_sheet_attribute_from_freecad(freecad_sheet, "uuid")
+        self.name = sheet_attributes["name"]
+        self.shape = sheet_attributes["shape"]
+        self.uuid = sheet_attributes["uuid"]
 
         # initialize with values of the sheet
-        self.length = float(sheet.read_sheet_attribute_from_freecad(freecad_sheet, "length"))
-        self.width = float(sheet.read_sheet_attribute_from_freecad(freecad_sheet, "width"))
-        self.height = float(sheet.read_sheet_attribute_from_freecad(freecad_sheet, "height"))
-        self.radius = float(sheet.read_sheet_attribute_from_freecad(freecad_sheet, "radius"))
-        self.color = int(sheet.read_sheet_attribute_from_freecad(freecad_sheet, "color"))
+        self.length = float(sheet_attributes["length"])
+        self.width = float(sheet_attributes["width"])
+        self.height = float(sheet_attributes["height"])
+        self.radius = float(sheet_attributes["radius"])
+        self.color = int(sheet_attributes["color"])
 
         # then overwrite with the values of the FreeCAD object
         self._get_freecad_properties(freecad_object)
@@ -101,9 +101,10 @@ class JsonPartGeometry(AJsonPart):
             active_document.app_active_document.addObject("Part::Feature", "Geometry").Shape = shape_solid
 
             # Hide origin objects
-            meshed_object.ViewObject.Visibility = False
-            form_object.ViewObject.Visibility = False
-            cleaned_object.ViewObject.Visibility = False
+            if active_document.gui_active_document is not None:
+                meshed_object.ViewObject.Visibility = False
+                form_object.ViewObject.Visibility = False
+                cleaned_object.ViewObject.Visibility = False
 
     def _export_to_stl(self, freecad_object):
 
@@ -29,16 +29,80 @@ from json_io.json_definitions import JSON_ELEMENT_NAME, JSON_ELEMENT_UUID,\
     JSON_ELEMENT_POS_Z, JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y,\
     JSON_ELEMENT_ROT_Z, JSON_ELEMENT_PART_UUID, JSON_ELEMENT_PART_NAME, M_TO_MM,\
     RAD_TO_DEG, _get_combined_name_uuid, JSON_ELEMNT_CHILDREN, PART_IDENTIFIER,\
-    PRODUCT_IDENTIFIER
+    PRODUCT_IDENTIFIER, JSON_ELEMENT_PART_FILE_NAME
 from json_io.json_spread_sheet import JsonSpreadSheet, FREECAD_PART_SHEET_NAME
 from json_io.parts.json_part_factory import JsonPartFactory
+from json_io.parts.json_part import AJsonPart
 from A2plus.a2p_importpart import importPartFromFile
 from freecad.active_document import VECTOR_X, VECTOR_Y, VECTOR_Z, VECTOR_ZERO, ActiveDocument
 import freecad.name_converter as nc
+from module.tracer import trace_span
+import os
 import re
 import FreeCAD
 
 Log = FreeCAD.Console.PrintLog
+Wrn = FreeCAD.Console.PrintWarning
+
+# Label prefix of the hidden part imports which are shared by linked products
+PART_TEMPLATE_LABEL_PREFIX = "Template_"
+
+
+# Older FreeCAD versions get warned only once that they cannot place links
+_link_support_warned = False
+
+
+def is_link_supported():
+    '''
+    App::Link exists since FreeCAD 0.19
+    '''
+    version = FreeCAD.Version()
+    return (int(version[0]), int(version[1])) >= (0, 19)
+
+
+def is_part_instancing_enabled():
+    '''
+    Checks the preferences if repeated parts should be placed as links to one shared import.
+    Without App::Link support every part gets imported by A2plus instead.
+    '''
+    global _link_support_warned
+    preferences = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/VirtualSatelliteCAD")
+    if not preferences.GetBool("UsePartInstancing", False):
+        return False
+
+    if not is_link_supported():
+        if not _link_support_warned:
+            Wrn("Part instancing needs App::Link of FreeCAD 0.19 or later, importing every part with A2plus instead\n")
+            _link_support_warned = True
+        return False
+
+    return True
+
+
+def get_part_source_file(freecad_object):
+    '''
+    Returns the file an imported product was read from. For a link the
+    file of the shared import it points to is returned.
+    '''
+    linked_object = getattr(freecad_object, "LinkedObject", None)
+    if linked_object is not None and linked_object is not freecad_object:
+        freecad_object = linked_object
+    return freecad_object.sourceFile
+
+
+def get_part_source_file_name(freecad_object):
+    '''
+    Returns the name of the file an imported product was read from, without
+    its path (.split(os.path.sep)[-1]) and its FreeCAD file ending ([:-6])
+    '''
+    return get_part_source_file(freecad_object).split(os.path.sep)[-1][:-6]
+
+
+def get_imported_file_names(app_document):
+    '''
+    Returns the names of all files the products of the given document were imported from
+    '''
+    return {get_part_source_file_name(freecad_object) for freecad_object in app_document.Objects if hasattr(freecad_object, "sourceFile")}
 
 
 class AJsonProduct():
@@ -55,6 +119,7 @@ class AJsonProduct():
             "rot_x": "°",
             "rot_y": "°",
             "rot_z": "°",
+            "part_file_name": "-",
             }
 
         self.pos_x = 0.0
@@ -78,6 +143,7 @@ class AJsonProduct():
         if json_has_part_name and json_has_part_uuid:
             self.part_uuid = str(json_object[JSON_ELEMENT_PART_UUID])
             self.part_name = str(json_object[JSON_ELEMENT_PART_NAME])
+            self.part_file_name = str(json_object.get(JSON_ELEMENT_PART_FILE_NAME, AJsonProduct.get_part_unique_name(self)))
 
     def _parse_position_and_rotation_from_json(self, json_object):
         # the coordinate system between virtual satellite and FreeCAD seem
@@ -132,15 +198,44 @@ class AJsonProduct():
         the assembly. E.g. A BasePlate will be added as BasePlateBottom to the
         assembly.
         '''
-        import_part_file_name = self.get_part_unique_name()
+        import_part_file_name = self.get_part_file_name()
         import_part_name_in_product = self.get_unique_name()
         import_part_full_path = active_document.get_file_full_path(import_part_file_name)
 
-        imported_product_part = importPartFromFile(
-            active_document.app_active_document,
-            import_part_full_path)
+        if is_part_instancing_enabled():
+            imported_product_part = self._create_freecad_part_link(active_document, import_part_file_name, import_part_full_path)
+        else:
+            with trace_span("importPartFromFile"):
+                imported_product_part = importPartFromFile(
+                    active_document.app_active_document,
+                    import_part_full_path)
         imported_product_part.Label = import_part_name_in_product
 
+    def _create_freecad_part_link(self, active_document, import_part_file_name, import_part_full_path):
+        '''
+        Instead of importing the part again for every product, the part file is
+        imported only once per assembly as a hidden template. Every product is
+        placed as a link to this template, thus sharing its shape.
+        '''
+        template_label = PART_TEMPLATE_LABEL_PREFIX + import_part_file_name
+        templates = active_document.app_active_document.getObjectsByLabel(template_label)
+
+        if templates:
+            template = templates[0]
+        else:
+            with trace_span("importPartFromFile"):
+                template = importPartFromFile(
+                    active_document.app_active_document,
+                    import_part_full_path)
+            template.Label = template_label
+            template.Visibility = False
+
+        # name the link like the file, so the identifier of parts and assemblies stays in its name
+        with trace_span("create_link"):
+            link = active_document.app_active_document.addObject("App::Link", import_part_file_name)
+            link.setLink(template)
+        return link
+
     def _set_freecad_position_and_rotation(self, active_document):
         product_part_name = self.get_unique_name()
 
@@ -200,11 +295,9 @@ class AJsonProduct():
 
         if(create):
             self._write_freecad_part(active_document)
-        # only update the existing part
+        # only update the existing part, the sheet only gets its changed cells written
         else:
             self._update_freecad_part(active_document)
-            # remove the existing sheet
-            active_document.app_active_document.removeObject(self.sheet.create_sheet_name())
 
         self.sheet.write_to_freecad(active_document)
 
@@ -217,14 +310,31 @@ class AJsonProduct():
         self.rot_y = rot[1]
         self.rot_x = rot[2]
 
-    def read_from_freecad(self, active_document, working_output_directory, part_list, freecad_object=None, freecad_sheet=None):
+    def _get_freecad_position_and_rotation(self, freecad_object):
+        pos = freecad_object.Placement.Base
+
+        self.pos_x = pos[0]
+        self.pos_y = pos[1]
+        self.pos_z = pos[2]
+
+        self._get_freecad_rotation(freecad_object)
+
+    def _read_sheet_from_freecad(self, freecad_sheet):
+        sheet_attributes = JsonSpreadSheet(self).read_sheet_attributes_from_freecad(freecad_sheet)
+        self.name = sheet_attributes["name"]
+        self.uuid = sheet_attributes["uuid"]
+
+        # The property storage only holds the part of products which reference one
+        if "part_name" in sheet_attributes and "part_uuid" in sheet_attributes:
+            self.part_name = sheet_attributes["part_name"]
+            self.part_uuid = sheet_attributes["part_uuid"]
+            # Sheets written before parts could be merged have no part file
+            self.part_file_name = sheet_attributes.get("part_file_name") or AJsonProduct.get_part_unique_name(self)
+
+    def read_from_freecad(self, active_document, working_output_directory, part_list, freecad_object=None, freecad_sheet=None, child_cache=None):
 
         if(freecad_sheet is not None):
-            sheet = JsonSpreadSheet(self)
-            self.name = sheet.read_sheet_attribute_from_freecad(freecad_sheet, "name")
-            self.uuid = sheet.read_sheet_attribute_from_freecad(freecad_sheet, "uuid")
-            self.part_name = sheet.read_sheet_attribute_from_freecad(freecad_sheet, "part_name")
-            self.part_uuid = sheet.read_sheet_attribute_from_freecad(freecad_sheet, "part_uuid")
+            self._read_sheet_from_freecad(freecad_sheet)
         # get properties from name, because a root assembly has no sheet
         else:
             # document_name is identifier_name_uuid
@@ -235,13 +345,7 @@ class AJsonProduct():
             self.uuid = nc.fromFreeCad(split_name[2])
 
         if(freecad_object is not None):
-            pos = freecad_object.Placement.Base
-
-            self.pos_x = pos[0]
-            self.pos_y = pos[1]
-            self.pos_z = pos[2]
-
-            self._get_freecad_rotation(freecad_object)
+            self._get_freecad_position_and_rotation(freecad_object)
 
             child_cnt = 0
             for obj in active_document.app_active_document.Objects:
@@ -254,22 +358,48 @@ class AJsonProduct():
 
             self.has_children = child_cnt
 
+        self._read_part_from_freecad(working_output_directory, part_list)
+
+    def read_from_cached_product(self, cached_product, working_output_directory, part_list, freecad_object, freecad_sheet):
+        '''
+        Reads the product like read_from_freecad, but instead of opening its document
+        again, the content of the document is taken from a product read from it before.
+        '''
+        self._read_sheet_from_freecad(freecad_sheet)
+        self._get_freecad_position_and_rotation(freecad_object)
+        self.has_children = cached_product.has_children
+
+        self._read_part_from_freecad(working_output_directory, part_list)
+
+    def _read_part_from_freecad(self, working_output_directory, part_list):
         if(self.is_part_reference()):
             # read in the referenced part (if not read in already)
 
             part_name = self.get_part_unique_name()
 
-            # only have a part one time in the list
-            if(part_name not in [item[0] for item in part_list]):
-                part_document = ActiveDocument(working_output_directory).open_set_and_get_document(part_name)
+            # only have a part one time in the registry
+            if(part_name in part_list):
+                part_list.record_deduplicated_read()
+            else:
+                # a merged part is stored in the document of an identical part of another name
+                part_file_name = self.get_part_file_name()
+                part_document = ActiveDocument(working_output_directory).open_set_and_get_document(part_file_name)
                 for obj in part_document.app_active_document.Objects:
-                    if(obj.Label == self.part_name):
-                        part_object = obj
-                    elif(FREECAD_PART_SHEET_NAME in obj.Label):
+                    if(FREECAD_PART_SHEET_NAME in obj.Label):
                         part_sheet = obj
+
+                part_label = self.part_name
+                if part_file_name != part_name:
+                    part_label = JsonSpreadSheet(AJsonPart()).read_sheet_attribute_from_freecad(part_sheet, "name")
+                part_object = part_document.app_active_document.getObjectsByLabel(part_label)[0]
+
                 factory = JsonPartFactory()
                 part = factory.create_from_freecad(part_object, part_sheet)
                 part.read_from_freecad(part_object, part_sheet)
+
+                # the export hands back the part the product references in Virtual Satellite
+                part.name = self.part_name
+                part.uuid = self.part_uuid
                 part_list.append((part_name, part))
 
     def get_unique_name(self):
@@ -284,6 +414,13 @@ class AJsonProduct():
         '''
         return PART_IDENTIFIER + _get_combined_name_uuid(self.part_name, self.part_uuid)
 
+    def get_part_file_name(self):
+        '''
+        Returns the name of the part document to import. Products of merged identical
+        parts import the document of the kept part instead of the one of their own part.
+        '''
+        return getattr(self, "part_file_name", None) or self.get_part_unique_name()
+
     def is_part_reference(self):
         '''
         This method checks for the existence of the properties partUuid and partName.
@@ -24,19 +24,66 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 #
 
-from json_io.products.json_product import AJsonProduct
+from json_io.products.json_product import AJsonProduct, PART_TEMPLATE_LABEL_PREFIX, get_part_source_file_name
 from json_io.json_definitions import JSON_ELEMNT_CHILDREN, PRODUCT_IDENTIFIER, PART_IDENTIFIER, \
  _get_combined_name_uuid, JSON_ELEMENT_NAME, JSON_ELEMENT_UUID
 from json_io.products.json_product_child import JsonProductChild
 from json_io.json_spread_sheet import FREECAD_PART_SHEET_NAME
 from freecad.active_document import ActiveDocument
-from itertools import compress
 import FreeCAD
+import FreeCADGui
+import inspect
 import os
 from A2plus.a2p_importpart import updateImportedParts
+from module.tracer import trace_span
 
 Log = FreeCAD.Console.PrintLog
 
+RECONCILIATION_CREATE = "create"
+RECONCILIATION_UPDATE = "update"
+RECONCILIATION_DELETE = "delete"
+
+_partial_update_supported = None
+
+
+def is_partial_update_supported():
+    '''
+    Older A2plus versions can only update all imported parts at once
+    '''
+    global _partial_update_supported
+    if _partial_update_supported is None:
+        try:
+            _partial_update_supported = "partial" in inspect.signature(updateImportedParts).parameters
+        except (TypeError, ValueError):
+            _partial_update_supported = False
+    return _partial_update_supported
+
+
+def update_imported_parts(app_document, changed_file_names=None):
+    '''
+    Updates the parts A2plus imported into the document from their files.
+    Given the names of the files written during the current import, only the
+    parts read from these files get updated instead of all parts of the document.
+    '''
+    if changed_file_names is None or not FreeCAD.GuiUp or not is_partial_update_supported():
+        updateImportedParts(app_document)
+        return
+
+    changed_parts = [obj for obj in app_document.Objects
+                     if hasattr(obj, "sourceFile") and os.path.splitext(os.path.basename(obj.sourceFile))[0] in changed_file_names]
+    Log(f"Updating {len(changed_parts)} imported parts of changed files\n")
+    if len(changed_parts) == 0:
+        return
+
+    # A2plus updates only the selected parts in partial mode
+    FreeCADGui.Selection.clearSelection()
+    for obj in changed_parts:
+        FreeCADGui.Selection.addSelection(obj)
+    try:
+        updateImportedParts(app_document, partial=True)
+    finally:
+        FreeCADGui.Selection.clearSelection()
+
 
 class JsonProductAssembly(AJsonProduct):
     '''
@@ -53,6 +100,10 @@ class JsonProductAssembly(AJsonProduct):
     the super assembly.
     '''
 
+    def __init__(self):
+        super().__init__()
+        self.reconciliation_counts = {RECONCILIATION_CREATE: 0, RECONCILIATION_UPDATE: 0, RECONCILIATION_DELETE: 0}
+
     def _parse_position_and_rotation_from_json(self, json_object):
         '''
         An assembly does not have a position or orientation. If it has these properties
@@ -110,59 +161,112 @@ class JsonProductAssembly(AJsonProduct):
 
         return json_dict
 
-    def write_to_freecad(self, active_document):
+    def _reconcile(self, active_document):
+        '''
+        Compares the products written to the document before with the ones of this assembly,
+        keyed by their unique name, which is the label of the product in the document.
+        Hands back the products to create and to update as well as the old products to delete.
+        A product whose part got renamed keeps its name but imports another file, hence
+        its old product gets deleted and it is created again.
+        '''
+        old_products = {product.Label: (product, sheet) for product, sheet in self.get_products_of_active_document(active_document)}
+
         # This assembly may refer to a part as well
         # hence if there is a partUuid and if there is a part name, than
         # it should be written to the FreeCAD document as well.
+        # The children decide on their own if they reference a part or a product
+        products = ([self] if self.is_part_reference() else []) + self.children
 
-        old_products = self.get_products_of_active_document(active_document)
-        old_product_names = [o[0].Label for o in old_products]
-
-        # store if a product has to be deleted
-        # (because it doesn't exist in the new imported JSON file)
-        delete_products = [True] * len(old_product_names)
-        update_count = 0
-
-        if self.is_part_reference():
-            name = _get_combined_name_uuid(self.part_name, self.part_uuid)
-            if(name in old_product_names):
-                # update
-                update_count += 1
-                super().write_to_freecad(active_document, create=False)
-                delete_products[old_product_names.index(name)] = False
+        create_products, update_products, renamed_names = [], [], set()
+        for product in products:
+            old_product = old_products.get(product.get_unique_name())
+            if old_product is None:
+                create_products.append(product)
+            elif get_part_source_file_name(old_product[0]) != product.get_part_file_name():
+                create_products.append(product)
+                renamed_names.add(product.get_unique_name())
             else:
-                # create
-                super().write_to_freecad(active_document)
+                update_products.append(product)
 
-        # And now write the children, they decide on their own if they reference
-        # part or a product
-        for child in self.children:
-            name = child.get_unique_name()
-            if(name in old_product_names):
-                # update
-                update_count += 1
-                child.write_to_freecad(active_document, create=False)
-                delete_products[old_product_names.index(name)] = False
-            else:
-                # create
-                child.write_to_freecad(active_document)
+        # delete the old products which don't exist in the new imported JSON file anymore
+        written_names = {product.get_unique_name() for product in products} - renamed_names
+        delete_products = [old_product for name, old_product in old_products.items() if name not in written_names]
 
-        # delete remaining old products
-        old_products = list(compress(old_products, delete_products))
-        for old_product in old_products:
-            active_document.app_active_document.removeObject(old_product[0].Name)
-            active_document.app_active_document.removeObject(old_product[1].Name)
+        return create_products, update_products, delete_products
+
+    def _write_product(self, product, active_document, create):
+        # The part of the assembly itself is written by the product implementation of this class
+        if product is self:
+            super().write_to_freecad(active_document, create=create)
+        else:
+            product.write_to_freecad(active_document, create=create)
+
+    def write_to_freecad(self, active_document, changed_file_names=None):
+        '''
+        Writes the children of the assembly into the document. Given the names of
+        the part and assembly files written during the current import, only the
+        updated products referencing these files get read in again.
+        '''
+        create_products, update_products, delete_products = self._reconcile(active_document)
+
+        self.reconciliation_counts = {
+            RECONCILIATION_CREATE: len(create_products),
+            RECONCILIATION_UPDATE: len(update_products),
+            RECONCILIATION_DELETE: len(delete_products)
+        }
+        Log(f"Reconciled assembly '{self.name}': {self.reconciliation_counts}\n")
+
+        with trace_span("reconcile", **self.reconciliation_counts):
+            # delete all old products in one go, together with their sheets, before renamed products
+            # get created again under the same name
+            delete_object_names = [freecad_object.Name for old_product in delete_products for freecad_object in old_product]
+            for object_name in delete_object_names:
+                active_document.app_active_document.removeObject(object_name)
+
+            for product in update_products:
+                self._write_product(product, active_document, create=False)
+
+            for product in create_products:
+                self._write_product(product, active_document, create=True)
+
+            # the shared part imports of deleted products may have been reused by the created ones
+            if delete_object_names:
+                self._remove_unused_part_templates(active_document)
 
         # only if there were updates instead of creates
-        if(update_count > 0):
+        if(len(update_products) > 0):
             # update already read in parts
-            updateImportedParts(active_document.app_active_document)
+            with trace_span("updateImportedParts", updates=len(update_products)):
+                update_imported_parts(active_document.app_active_document, changed_file_names)
+
+    def read_from_cached_product(self, cached_product, working_output_directory, part_list, freecad_object, freecad_sheet):
+        '''
+        The children of the same assembly document are the same, thus they are shared
+        '''
+        super().read_from_cached_product(cached_product, working_output_directory, part_list, freecad_object, freecad_sheet)
+        self.children = cached_product.children
+
+    def _remove_unused_part_templates(self, active_document):
+        '''
+        Removes the shared part imports which are not linked by any product anymore
+        '''
+        unused_template_names = [
+            obj.Name for obj in active_document.app_active_document.Objects
+            if obj.Label.startswith(PART_TEMPLATE_LABEL_PREFIX) and len(obj.InList) == 0]
 
-    def read_from_freecad(self, active_document, working_output_directory, part_list, freecad_object=None, freecad_sheet=None):
+        for template_name in unused_template_names:
+            active_document.app_active_document.removeObject(template_name)
+
+    def read_from_freecad(self, active_document, working_output_directory, part_list, freecad_object=None, freecad_sheet=None, child_cache=None):
         """
         Reads an ProductAssembly from FreeCAD
         Then calls read_from_freecad of his children (either another assembly or a ProductChild)
+        Every child document is only opened once per export, the child cache hands back
+        the product read from it before by the name of the document.
         """
+        if child_cache is None:
+            child_cache = {}
+
         products_with_sheets = self.get_products_of_active_document(active_document)
         # read the assembly
         super().read_from_freecad(active_document, working_output_directory, part_list, freecad_object, freecad_sheet)
@@ -171,12 +275,8 @@ class JsonProductAssembly(AJsonProduct):
         # read the children
         for product, sheet in products_with_sheets:
             name, label = product.Name, product.Label
-            # use the source file of a2plus part
-            # then get the file name (.split(os.path.sep)[-1]) and ignore the FreeCAD file ending ([:-6])
-            child_file_name = product.sourceFile.split(os.path.sep)[-1][:-6]
-
-            # open the document for this child
-            child_document = ActiveDocument(working_output_directory).open_set_and_get_document(child_file_name)
+            # use the file name of the source file of a2plus part
+            child_file_name = get_part_source_file_name(product)
 
             if(PRODUCT_IDENTIFIER in name):
                 Log(f"Read ProductAssembly '{label}'\n")
@@ -185,8 +285,17 @@ class JsonProductAssembly(AJsonProduct):
                 Log(f"Read Product '{label}'\n")
                 child = AJsonProduct()
 
-            child.read_from_freecad(child_document, working_output_directory, part_list, freecad_object=product, freecad_sheet=sheet)
-            child_document.close_active_document(child_file_name)
+            cached_child = child_cache.get(child_file_name)
+            if cached_child is not None:
+                Log(f"Document '{child_file_name}' has already been read\n")
+                child.read_from_cached_product(cached_child, working_output_directory, part_list, freecad_object=product, freecad_sheet=sheet)
+            else:
+                # open the document for this child
+                child_document = ActiveDocument(working_output_directory).open_set_and_get_document(child_file_name)
+                child.read_from_freecad(child_document, working_output_directory, part_list, freecad_object=product, freecad_sheet=sheet,
+                                        child_cache=child_cache)
+                child_document.close_active_document(child_file_name)
+                child_cache[child_file_name] = child
 
             self.children.append(child)
 
@@ -197,27 +306,26 @@ class JsonProductAssembly(AJsonProduct):
             Only a document that references one part, thus contains the PART_IDENTIFIER in it's name, references a part
         Returns a list of found products (that have a sheet) and the corresponding sheets
         """
-        products, sheets = [], []
+        # The sheet of a product is named after the unique name of the product,
+        # which is the label of the product object, see JsonSpreadSheet.create_sheet_name
+        products, sheets_by_label = [], {}
 
         for obj in active_document.app_active_document.Objects:
-            name, label = obj.Name, obj.Label
-            Log("Object: {}, {}\n".format(name, label))
+            name = obj.Name
 
             if(FREECAD_PART_SHEET_NAME in name):
-                sheets.append(obj)
-                Log("Object is sheet\n")
+                sheets_by_label[obj.Label] = obj
             elif(PRODUCT_IDENTIFIER in name or PART_IDENTIFIER in name):
                 products.append(obj)
-                Log("Object is product\n")
 
         products_with_sheets = []
 
         for product in products:
-            for sheet in sheets:
-                if(product.Label in sheet.Label):
-                    products_with_sheets.append((product, sheet))
+            sheet = sheets_by_label.get(FREECAD_PART_SHEET_NAME + "_" + product.Label)
+            if sheet is not None:
+                products_with_sheets.append((product, sheet))
 
-        Log(f"Found products with sheets: '{[(p.Label, s.Label) for p, s in products_with_sheets]}'\n")
+        Log(f"Found {len(products_with_sheets)} products with sheets out of {len(products)} products\n")
 
         return products_with_sheets
 
@@ -24,9 +24,15 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 
 from json_io.products.json_product_assembly import JsonProductAssembly
-from json_io.json_definitions import JSON_ELEMNT_CHILDREN, JSON_ELEMENT_NAME
+from json_io.products.json_product import get_imported_file_names
+from json_io.json_definitions import JSON_ELEMNT_CHILDREN, JSON_ELEMENT_NAME, JSON_ELEMENT_UUID, \
+    PRODUCT_IDENTIFIER, get_product_name_uuid
 from freecad.active_document import ActiveDocument
+from freecad.document_session import DocumentSession
+from json_io.json_change_plan import CHANGE_UNTOUCHED
+from module.tracer import trace_span
 import FreeCAD
+import time
 Log = FreeCAD.Console.PrintLog
 
 
@@ -35,10 +41,23 @@ class JsonProductAssemblyTreeTraverser(object):
     This class provides functionality to traverse a product tree to parse the product assemblies in the right order
     '''
 
-    def __init__(self, working_output_directory, part_file_names=[]):
+    def __init__(self, working_output_directory, part_file_names=[], change_plan=None, manifest=None, changed_file_names=None,
+                 assembly_references=None):
+        '''
+        With a change plan only the assemblies it asks for get written,
+        and the written ones are recorded in the manifest.
+        Given the names of the part files written during the import, updated
+        assemblies only read in these parts and the assemblies written before again.
+        Given a dictionary of assembly references, the names of the files every
+        written assembly imports get recorded in it by the name of the assembly.
+        '''
         self._lst_of_depths = []
         self.working_output_directory = working_output_directory
         self.part_file_names = part_file_names
+        self.change_plan = change_plan
+        self.manifest = manifest
+        self.changed_file_names = changed_file_names
+        self.assembly_references = assembly_references
 
     def traverse(self, json_object, depth=0):
         """
@@ -62,25 +81,69 @@ class JsonProductAssemblyTreeTraverser(object):
             for child in json_object[JSON_ELEMNT_CHILDREN]:
                 self.traverse(child, depth+1)
 
-    def parse_from_json(self):
+    def write_assembly(self, assembly):
         """
-        Iterate through the list created by traversing the tree in reverse and parse the found product assemblies
+        Parse a single assembly and write it into its own document
         """
-        json_product, active_document = None, None
+        Log(f"Parsing '{assembly[JSON_ELEMENT_NAME]}'\n")
 
-        # parse in reverse order
-        for depth in reversed(self._lst_of_depths):
+        json_product = JsonProductAssembly().parse_from_json(assembly)
+        active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(json_product.get_product_unique_name())
+
+        json_product.write_to_freecad(active_document, self.changed_file_names)
+        if self.assembly_references is not None:
+            self.assembly_references[json_product.get_product_unique_name()] = get_imported_file_names(active_document.app_active_document)
+        active_document.save_and_close_active_document(json_product.get_product_unique_name())
+
+        return json_product
+
+    def write_depth(self, depth):
+        """
+        Write all assemblies of one depth. They only depend on deeper depths which are already written.
+        The assemblies are written one after the other, A2plus needs the FreeCAD GUI.
+        Hands back the assemblies which got written.
+        """
+        if self.change_plan is not None:
+            planned_depth = [assembly for assembly in depth if self.change_plan.get_assembly_change(assembly[JSON_ELEMENT_UUID]) != CHANGE_UNTOUCHED]
+            if len(planned_depth) < len(depth):
+                Log(f"Skipping {len(depth) - len(planned_depth)} unchanged assemblies\n")
+            depth = planned_depth
+
+        for assembly in depth:
+            self.write_assembly(assembly)
+
+        # The next higher depth imports these assemblies from disk
+        DocumentSession.flush_current_session()
+
+        # The next higher depth has to read in the written assemblies again
+        if self.changed_file_names is not None:
+            self.changed_file_names.update(PRODUCT_IDENTIFIER + get_product_name_uuid(assembly) for assembly in depth)
+
+        if self.manifest is not None:
             for assembly in depth:
-                Log(f"Parsing '{assembly[JSON_ELEMENT_NAME]}'\n")
+                self.manifest.update_assembly(assembly, PRODUCT_IDENTIFIER + get_product_name_uuid(assembly))
 
-                json_product = JsonProductAssembly().parse_from_json(assembly)
-                active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(json_product.get_product_unique_name())
+        return depth
 
-                json_product.write_to_freecad(active_document)
-                active_document.save_and_close_active_document(json_product.get_product_unique_name())
+    def parse_from_json(self):
+        """
+        Iterate through the list created by traversing the tree in reverse and parse the found product assemblies.
+        """
+        json_product, active_document = None, None
 
-        # the last json_product is the root of the assembly, open it again for the UI
-        if(json_product is not None):
+        # parse in reverse order
+        for depth_index in reversed(range(len(self._lst_of_depths))):
+            depth = self._lst_of_depths[depth_index]
+
+            start_time = time.perf_counter()
+            with trace_span("assembly_depth", depth=depth_index) as span:
+                written_depth = self.write_depth(depth)
+                span.add_count("assemblies", len(written_depth))
+            Log(f"Wrote {len(written_depth)} assemblies of depth {depth_index} in {time.perf_counter() - start_time:.3f} s\n")
+
+        # the root of the assembly is the only one of depth 0, open it again for the UI
+        if(len(self._lst_of_depths) > 0):
+            json_product = JsonProductAssembly().parse_from_json(self._lst_of_depths[0][0])
             active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(json_product.get_product_unique_name())
 
         return json_product, active_document
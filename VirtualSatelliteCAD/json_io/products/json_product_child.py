@@ -41,3 +41,12 @@ class JsonProductChild(AJsonProduct):
             return PRODUCT_IDENTIFIER + _get_combined_name_uuid(self.name, self.uuid)
         else:
             return PART_IDENTIFIER + _get_combined_name_uuid(self.part_name, self.part_uuid)
+
+    def get_part_file_name(self):
+        '''
+        A sub assembly imports the document of its product, not the one of its part
+        '''
+        if self.has_children:
+            return self.get_part_unique_name()
+        else:
+            return super().get_part_file_name()
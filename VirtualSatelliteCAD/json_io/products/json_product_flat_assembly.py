@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+from json_io.products.json_product import AJsonProduct
+from json_io.products.json_product_assembly import JsonProductAssembly
+from json_io.json_definitions import JSON_ELEMNT_CHILDREN, PRODUCT_IDENTIFIER, FLAT_IDENTIFIER, get_product_name_uuid
+from json_io.json_spread_sheet import FREECAD_PART_SHEET_NAME
+from freecad.active_document import ActiveDocument
+from module.tracer import trace_span
+import FreeCAD
+
+Log = FreeCAD.Console.PrintLog
+Err = FreeCAD.Console.PrintError
+
+FREECAD_GROUP_TYPE = "App::Part"
+
+
+class JsonProductFlatAssembly(object):
+    '''
+    This class writes the whole product tree into one single document, instead of
+    one document per assembly. Every assembly becomes an App::Part group containing
+    its children. Every part file is imported only once into the document and all
+    products referencing it are placed as links to this import.
+    The part documents are still written as separate files by the importer.
+    '''
+
+    def __init__(self, working_output_directory):
+        self.working_output_directory = working_output_directory
+
+    def get_document_name(self, json_object):
+        return FLAT_IDENTIFIER + get_product_name_uuid(json_object)
+
+    def _clear_document(self, active_document):
+        '''
+        The document is written from scratch on every import
+        '''
+        app_document = active_document.app_active_document
+        for object_name in [obj.Name for obj in app_document.Objects]:
+            # removing an object may already have removed the ones depending on it
+            if app_document.getObject(object_name) is not None:
+                app_document.removeObject(object_name)
+
+    def _write_part_link(self, json_product, active_document):
+        part_file_name = AJsonProduct.get_part_file_name(json_product)
+        return json_product._create_freecad_part_link(active_document, part_file_name, active_document.get_file_full_path(part_file_name))
+
+    def _write_group(self, json_product, json_object, active_document):
+        '''
+        Writes an assembly as group holding the part of the assembly and all its children
+        '''
+        group = active_document.app_active_document.addObject(FREECAD_GROUP_TYPE, PRODUCT_IDENTIFIER + json_product.get_unique_name())
+
+        # The part of the assembly itself is placed in the origin of the assembly
+        if json_product.is_part_reference():
+            group.addObject(self._write_part_link(json_product, active_document))
+
+        for json_object_child in json_object[JSON_ELEMNT_CHILDREN]:
+            for child_object in self._write_child(json_object_child, active_document):
+                group.addObject(child_object)
+
+        group.Label = json_product.get_unique_name()
+        return group
+
+    def _write_child(self, json_object, active_document):
+        '''
+        Writes a child product together with its sheet and hands back both objects
+        '''
+        json_product = AJsonProduct().parse_from_json(json_object)
+
+        if json_product.has_children:
+            product_object = self._write_group(json_product, json_object, active_document)
+        else:
+            product_object = self._write_part_link(json_product, active_document)
+            product_object.Label = json_product.get_unique_name()
+
+        json_product._set_freecad_position_and_rotation(active_document)
+        json_product.sheet.write_to_freecad(active_document)
+
+        return [product_object, active_document.app_active_document.getObject(json_product.sheet.create_sheet_name())]
+
+    def write_to_freecad(self, json_object):
+        '''
+        Writes the product tree of the given root product into its flat document.
+        Hands back the root assembly and the opened document.
+        '''
+        json_product = JsonProductAssembly().parse_from_json(json_object)
+        if json_product is None:
+            Err("The root product has no children, no flat assembly is written\n")
+            return None, None
+
+        document_name = self.get_document_name(json_object)
+        active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(document_name)
+
+        with trace_span("flat_assembly"):
+            self._clear_document(active_document)
+            self._write_group(json_product, json_object, active_document)
+        Log(f"Wrote flat assembly with {len(active_document.app_active_document.Objects)} objects\n")
+
+        active_document.save_and_close_active_document(document_name)
+
+        # open the document again for the UI
+        active_document = ActiveDocument(self.working_output_directory).open_set_and_get_document(document_name)
+        return json_product, active_document
+
+    def _read_children(self, json_assembly, group, active_document, part_list):
+        json_assembly.children = []
+        for obj in group.Group:
+            # the sheets themselves and the part of the assembly have no sheet
+            sheet = active_document.app_active_document.getObject(FREECAD_PART_SHEET_NAME + "_" + obj.Label)
+            if sheet is None:
+                continue
+
+            child = JsonProductAssembly() if obj.TypeId == FREECAD_GROUP_TYPE else AJsonProduct()
+            AJsonProduct.read_from_freecad(child, active_document, self.working_output_directory, part_list, freecad_sheet=sheet)
+            child._get_freecad_position_and_rotation(obj)
+
+            if obj.TypeId == FREECAD_GROUP_TYPE:
+                self._read_children(child, obj, active_document, part_list)
+
+            json_assembly.children.append(child)
+
+    def read_from_freecad(self, active_document, part_list):
+        '''
+        Reads the product tree back from a flat document. Hands back the root assembly.
+        '''
+        root_groups = [obj for obj in active_document.app_active_document.Objects
+                       if obj.TypeId == FREECAD_GROUP_TYPE and obj.getParentGeoFeatureGroup() is None]
+
+        # The name and uuid of the root assembly are part of the document name
+        root_assembly = JsonProductAssembly()
+        AJsonProduct.read_from_freecad(root_assembly, active_document, self.working_output_directory, part_list)
+
+        if len(root_groups) > 0:
+            self._read_children(root_assembly, root_groups[0], active_document, part_list)
+        else:
+            Err("Found no root assembly in the flat document\n")
+            root_assembly.children = []
+
+        return root_assembly
@@ -25,6 +25,7 @@
 #
 
 import os
+import shutil
 import Init
 import FreeCAD
 from PySide2.QtWidgets import QMessageBox
@@ -136,6 +137,20 @@ class Environment:
         '''
         return Init.APPDATA_DIR
 
+    @classmethod
+    def get_freecad_cmd_path(cls):
+        '''
+        This method hands back the path of the headless FreeCAD executable (FreeCADCmd).
+        It is expected next to the running FreeCAD, otherwise it is searched on the path.
+        '''
+        executable = "FreeCADCmd.exe" if os.name == "nt" else "FreeCADCmd"
+        path = os.path.join(FreeCAD.getHomePath(), "bin", executable)
+
+        if not os.path.isfile(path):
+            path = shutil.which(executable) or shutil.which(executable.lower())
+
+        return path
+
     @classmethod
     def get_user_home_path(cls):
         '''
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+#
+import json
+import os
+import threading
+import time
+import FreeCAD
+
+Log = FreeCAD.Console.PrintLog
+Msg = FreeCAD.Console.PrintMessage
+Wrn = FreeCAD.Console.PrintWarning
+
+TRACE_FILE_PREFIX = "virtual_satellite_trace_"
+TRACE_FILE_EXTENSION = ".json"
+
+SPAN_CPU_MS = "cpu_ms"
+
+
+class _NoSpan(object):
+    '''
+    Span handed out while no tracer is active, it costs nothing
+    '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def add_count(self, name, value=1):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span(object):
+    '''
+    One timed phase. Spans opened within another span are nested into it.
+    The CPU time is the one of the opening thread, work of other threads is not included.
+    '''
+
+    def __init__(self, tracer, name, counts):
+        self._tracer = tracer
+        self.name = name
+        self.counts = dict(counts)
+
+    def __enter__(self):
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self._start_wall
+        cpu = time.thread_time() - self._start_cpu
+        self._tracer.record(self, self._start_wall, wall, cpu)
+        return False
+
+    def add_count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+
+class Tracer(object):
+    '''
+    Records nested spans with wall time, CPU time of the span's thread and object counts.
+    The spans are written as Chrome trace events (one event per line),
+    thus the file can be loaded into chrome://tracing or Perfetto even if
+    the traced command did not finish.
+    '''
+
+    _current_tracer = None
+
+    def __init__(self, working_directory, enabled=True):
+        self._working_directory = working_directory
+        self._enabled = enabled
+        self._previous_tracer = None
+        self._trace_file = None
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+        self.trace_file_path = None
+
+        # span name to [count, wall time, cpu time]
+        self.summary = {}
+
+    @staticmethod
+    def get_current_tracer():
+        return Tracer._current_tracer
+
+    def __enter__(self):
+        if not self._enabled:
+            return self
+
+        self.trace_file_path = os.path.join(self._working_directory, TRACE_FILE_PREFIX + time.strftime("%Y%m%d_%H%M%S") + TRACE_FILE_EXTENSION)
+        try:
+            self._trace_file = open(self.trace_file_path, "w")
+            # The closing bracket of the array is optional in the chrome trace format
+            self._trace_file.write("[\n")
+        except OSError:
+            Wrn(f"Cannot write trace file '{self.trace_file_path}', only printing the summary\n")
+            self._trace_file = None
+
+        self._previous_tracer = Tracer._current_tracer
+        Tracer._current_tracer = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self._enabled:
+            return False
+
+        Tracer._current_tracer = self._previous_tracer
+
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
+            Msg(f"Wrote trace to '{self.trace_file_path}'\n")
+
+        self.print_summary()
+        return False
+
+    def span(self, name, **counts):
+        return Span(self, name, counts)
+
+    def record(self, span, start_wall, wall, cpu):
+        event = {
+            "name": span.name,
+            "ph": "X",
+            "ts": int((start_wall - self._start_time) * 1e6),
+            "dur": int(wall * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": dict(span.counts, **{SPAN_CPU_MS: round(cpu * 1e3, 3)})
+        }
+
+        with self._lock:
+            entry = self.summary.setdefault(span.name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += wall
+            entry[2] += cpu
+
+            if self._trace_file is not None:
+                self._trace_file.write(json.dumps(event) + ",\n")
+                self._trace_file.flush()
+
+    def print_summary(self):
+        Msg("Trace summary (calls, wall time, cpu time):\n")
+        for name, (count, wall, cpu) in sorted(self.summary.items(), key=lambda item: item[1][1], reverse=True):
+            Msg(f"    {name}: {count}, {wall:.3f} s, {cpu:.3f} s\n")
+
+
+def trace_span(name, **counts):
+    '''
+    Opens a span on the active tracer, to be used as context manager:
+    with trace_span("save", objects=3) as span: ...
+    '''
+    tracer = Tracer.get_current_tracer()
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, **counts)
+
+
+def is_tracing_enabled():
+    preferences = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/VirtualSatelliteCAD")
+    return preferences.GetBool("TraceEnabled", False)
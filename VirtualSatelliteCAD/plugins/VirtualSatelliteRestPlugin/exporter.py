@@ -24,26 +24,36 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 #
 import json_io.json_definitions as jd
-from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler
+from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler, get_crawler_threads, get_rest_cache
 from plugins.VirtualSatelliteRestPlugin.api_kinds import CAS, DEFAULT, SEIS
 import traceback
 import json
+import math
+from numbers import Number
 import FreeCAD
 import plugins.VirtualSatelliteRestPlugin.virsat_constants as vc
 Err = FreeCAD.Console.PrintError
 Log = FreeCAD.Console.PrintLog
+Msg = FreeCAD.Console.PrintMessage
 Wrn = FreeCAD.Console.PrintWarning
 
+VALUE_TOLERANCE = 1e-9
+
 
 class VirSatRestExporter():
     def exportFromDict(self, data_dict, api_instances, repo_name):
         Log('Calling export in Virtual Satellite REST importer\n')
         root_product = data_dict[jd.JSON_PRODUCTS]
         parts = data_dict[jd.JSON_PARTS]
+        # Elements put to the server, their cached versions are outdated afterwards
+        self.changed_elements = []
+        # Changed beans are only put once after all of their updates
+        self.changed_cas, self.changed_seis = {}, {}
+        self.skipped_writes = 0
 
         try:
-            # Read tree
-            _, seis, _, visualisations = TreeCrawler().crawl_tree(api_instances, repo_name)
+            # Read tree, always from the server since the elements get written back
+            _, seis, _, visualisations = TreeCrawler(get_crawler_threads()).crawl_tree(api_instances, repo_name)
 
             for part in parts:
                 uuid = part[jd.JSON_ELEMENT_UUID]
@@ -62,19 +72,37 @@ class VirSatRestExporter():
                     superVisCa = None
                     if sei.super_seis:
                         superVisCa = self.getVisCaForSei(seis[sei.super_seis[0].uuid], visualisations)
-                    self.part2VisCa(part, foundVisCa, superVisCa)
-                    # Put vis bean again
-                    api_instances[CAS].put_ca(foundVisCa, repo_name, sync=False, _preload_content=False)
+                    if self.part2VisCa(part, foundVisCa, superVisCa):
+                        self.changed_cas[foundVisCa[vc.UUID]] = foundVisCa
+                    else:
+                        self.skipped_writes += 1
                 else:
                     # In the future we could create a new one here
                     Wrn('{} not updated\n'.format(part_id))
 
             self.exportProductsRecursive(root_product, seis, visualisations, api_instances, repo_name)
-            api_instances[DEFAULT].force_synchronize(repo_name)
+
+            # Put vis beans and seis again
+            for ca_uuid, visCa in self.changed_cas.items():
+                api_instances[CAS].put_ca(visCa, repo_name, sync=False, _preload_content=False)
+                self.changed_elements.append((CAS, ca_uuid))
+            for sei_uuid, raw_sei in self.changed_seis.items():
+                api_instances[SEIS].put_sei(raw_sei, repo_name, sync=False, _preload_content=False)
+                self.changed_elements.append((SEIS, sei_uuid))
+
+            Msg('Exported {} changed elements, skipped {} unchanged writes\n'.format(len(self.changed_elements), self.skipped_writes))
+            if self.changed_elements:
+                api_instances[DEFAULT].force_synchronize(repo_name)
 
         except Exception:
             Err(traceback.format_exc())
 
+        cache = get_rest_cache(api_instances, repo_name)
+        if cache is not None:
+            for kind, uuid in self.changed_elements:
+                cache.invalidate(kind, uuid)
+            cache.save()
+
     def exportProductsRecursive(self, product, seis, visualisations, api_instances, repo_name):
         uuid = product[jd.JSON_ELEMENT_UUID]
         name = product[jd.JSON_ELEMENT_NAME]
@@ -85,7 +113,6 @@ class VirSatRestExporter():
         if sei is None:
             Err('No sei found for product: {}\n'.format(product_id))
             return None
-        raw_sei = json.loads(api_instances[SEIS].get_sei(uuid, repo_name, sync=False, _preload_content=False).data)
 
         foundVisCa = self.getVisCaForSei(sei, visualisations)
 
@@ -94,12 +121,18 @@ class VirSatRestExporter():
             superVisCa = None
             if sei.super_seis:
                 superVisCa = self.getVisCaForSei(seis[sei.super_seis[0].uuid], visualisations)
-            self.product2VisCa(product, foundVisCa, superVisCa)
-            raw_sei[vc.NAME] = product[jd.JSON_ELEMENT_NAME]
+            if self.product2VisCa(product, foundVisCa, superVisCa):
+                self.changed_cas[foundVisCa[vc.UUID]] = foundVisCa
+            else:
+                self.skipped_writes += 1
 
-            # Put vis bean and sei again
-            api_instances[CAS].put_ca(foundVisCa, repo_name, sync=False, _preload_content=False)
-            api_instances[SEIS].put_sei(raw_sei, repo_name, sync=False, _preload_content=False)
+            # The complete sei is only fetched if it has to be written
+            if sei.name != name:
+                raw_sei = json.loads(api_instances[SEIS].get_sei(uuid, repo_name, sync=False, _preload_content=False).data)
+                raw_sei[vc.NAME] = name
+                self.changed_seis[uuid] = raw_sei
+            else:
+                self.skipped_writes += 1
         else:
             # In the future we could create a new one here
             Wrn('No visualization for {} updated\n'.format(product_id))
@@ -112,31 +145,51 @@ class VirSatRestExporter():
         # For now assume correct units
         # For now ignore name changes
         # For now geometry files are not exported
-        self.updateValueAndOverride(vc.SHAPE, part[jd.JSON_ELEMENT_SHAPE], visCa, superCa)
-        self.updateValueAndOverride(vc.COLOR, part[jd.JSON_ELEMENT_COLOR], visCa, superCa)
-        self.updateValueAndOverride(vc.SIZE_X, part[jd.JSON_ELEMENT_LENGTH_X], visCa, superCa)
-        self.updateValueAndOverride(vc.SIZE_Y, part[jd.JSON_ELEMENT_LENGTH_Y], visCa, superCa)
-        self.updateValueAndOverride(vc.SIZE_Z,  part[jd.JSON_ELEMENT_LENGTH_Z], visCa, superCa)
-        self.updateValueAndOverride(vc.RADIUS, part[jd.JSON_ELEMENT_RADIUS], visCa, superCa)
+        changed = [
+            self.updateValueAndOverride(vc.SHAPE, part[jd.JSON_ELEMENT_SHAPE], visCa, superCa),
+            self.updateValueAndOverride(vc.COLOR, part[jd.JSON_ELEMENT_COLOR], visCa, superCa),
+            self.updateValueAndOverride(vc.SIZE_X, part[jd.JSON_ELEMENT_LENGTH_X], visCa, superCa),
+            self.updateValueAndOverride(vc.SIZE_Y, part[jd.JSON_ELEMENT_LENGTH_Y], visCa, superCa),
+            self.updateValueAndOverride(vc.SIZE_Z,  part[jd.JSON_ELEMENT_LENGTH_Z], visCa, superCa),
+            self.updateValueAndOverride(vc.RADIUS, part[jd.JSON_ELEMENT_RADIUS], visCa, superCa)
+        ]
+        return any(changed)
 
     def product2VisCa(self, product, visCa, superCa):
-        self.updateValueAndOverride(vc.POSITION_X, product[jd.JSON_ELEMENT_POS_X], visCa, superCa)
-        self.updateValueAndOverride(vc.POSITION_Y, product[jd.JSON_ELEMENT_POS_Y], visCa, superCa)
-        self.updateValueAndOverride(vc.POSITION_Z, product[jd.JSON_ELEMENT_POS_Z], visCa, superCa)
-        self.updateValueAndOverride(vc.ROTATION_X, product[jd.JSON_ELEMENT_ROT_X], visCa, superCa)
-        self.updateValueAndOverride(vc.ROTATION_Y, product[jd.JSON_ELEMENT_ROT_Y], visCa, superCa)
-        self.updateValueAndOverride(vc.ROTATION_Z, product[jd.JSON_ELEMENT_ROT_Z], visCa, superCa)
+        changed = [
+            self.updateValueAndOverride(vc.POSITION_X, product[jd.JSON_ELEMENT_POS_X], visCa, superCa),
+            self.updateValueAndOverride(vc.POSITION_Y, product[jd.JSON_ELEMENT_POS_Y], visCa, superCa),
+            self.updateValueAndOverride(vc.POSITION_Z, product[jd.JSON_ELEMENT_POS_Z], visCa, superCa),
+            self.updateValueAndOverride(vc.ROTATION_X, product[jd.JSON_ELEMENT_ROT_X], visCa, superCa),
+            self.updateValueAndOverride(vc.ROTATION_Y, product[jd.JSON_ELEMENT_ROT_Y], visCa, superCa),
+            self.updateValueAndOverride(vc.ROTATION_Z, product[jd.JSON_ELEMENT_ROT_Z], visCa, superCa)
+        ]
+        return any(changed)
 
     def updateValueAndOverride(self, beanName, newValue, visCa, superCa):
+        '''
+        Updates the bean and hands back if its value or override flag changed
+        '''
+        bean = visCa[beanName]
+        oldValue, oldOverride = bean[vc.VALUE], bean.get(vc.OVERRIDE, False)
+
         # Set override if necessary
         if(superCa is not None):
-            if(newValue != superCa[beanName][vc.VALUE]):
-                visCa[beanName][vc.OVERRIDE] = True
+            if(not self.valuesEqual(newValue, superCa[beanName][vc.VALUE])):
+                bean[vc.OVERRIDE] = True
             else:
-                visCa[beanName][vc.OVERRIDE] = False
+                bean[vc.OVERRIDE] = False
 
         # Set new value
-        visCa[beanName][vc.VALUE] = newValue
+        bean[vc.VALUE] = newValue
+
+        return not self.valuesEqual(oldValue, newValue) or oldOverride != bean.get(vc.OVERRIDE, False)
+
+    def valuesEqual(self, value, otherValue):
+        # Numbers read back from FreeCAD carry rounding noise, e.g. from the placement conversion
+        if isinstance(value, Number) and isinstance(otherValue, Number) and not isinstance(value, bool) and not isinstance(otherValue, bool):
+            return math.isclose(value, otherValue, rel_tol=VALUE_TOLERANCE, abs_tol=VALUE_TOLERANCE)
+        return value == otherValue
 
     def getVisCaForSei(self, sei, visualisations):
         # Get visualization bean
@@ -25,7 +25,7 @@
 #
 
 import json_io.json_definitions as jd
-from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler
+from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler, get_crawler_threads, get_rest_cache, is_scoped_crawl_enabled
 import traceback
 import FreeCAD
 import plugins.VirtualSatelliteRestPlugin.virsat_constants as vc
@@ -37,29 +37,35 @@ Wrn = FreeCAD.Console.PrintWarning
 
 
 class VirSatRestImporter():
-    def __init__(self, project_directory, api_instances, repo_name):
+    def __init__(self, project_directory, api_instances, repo_name, session=None):
         self.project_directory, self.api_instances, self.repo_name = project_directory, api_instances, repo_name
+        # Crawl session shared with other crawls of the same command
+        self.session = session
 
     def importToDict(self, start_sei_uuid):
         Log('Calling import in Virtual Satellite REST importer\n')
         try:
             # Read tree
-            root_seis, seis, _, visualisations = TreeCrawler().crawl_tree(self.api_instances, self.repo_name)
+            crawler = TreeCrawler(get_crawler_threads(), get_rest_cache(self.api_instances, self.repo_name), self.session)
+            if is_scoped_crawl_enabled():
+                root_seis, seis, _, visualisations = crawler.crawl_subtree(self.api_instances, self.repo_name, start_sei_uuid)
+            else:
+                root_seis, seis, _, visualisations = crawler.crawl_tree(self.api_instances, self.repo_name)
             seis2products = {}
             parts = []
 
             # Find the selected starting sei
-            for sei in seis.values():
-                if(sei.uuid == start_sei_uuid):
-
-                    # Import starting at the sei
-                    products = self.importRecursive(sei, root_seis, seis, visualisations, seis2products, parts)
-                    if products is not None:
-                        data_dict = {
-                            jd.JSON_PRODUCTS: products,
-                            jd.JSON_PARTS: parts
-                        }
-                        return data_dict
+            sei = seis.get(start_sei_uuid)
+            if sei is not None:
+
+                # Import starting at the sei
+                products = self.importRecursive(sei, root_seis, seis, visualisations, seis2products, parts)
+                if products is not None:
+                    data_dict = {
+                        jd.JSON_PRODUCTS: products,
+                        jd.JSON_PARTS: parts
+                    }
+                    return data_dict
 
         except Exception:
             Err(traceback.format_exc())
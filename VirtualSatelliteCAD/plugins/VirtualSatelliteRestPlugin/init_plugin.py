@@ -52,12 +52,16 @@ class VirSatPlugin(Plugin):
             Err('Setup was not successful, aborting import\n')
             return
 
+        # SEIs fetched for the dialog are reused by the import
+        from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler, CrawlSession, get_crawler_threads, get_rest_cache
+        session = CrawlSession()
+
         # Get a starting SEI from the preferences
         start_sei_uuid = None
         if(self.preferences.GetBool('AskForStartingSEI')):
             # Get all available SEIs
-            from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler
-            root_seis, seis = TreeCrawler().crawl_raw_seis(api_instances, repo_name)
+            root_seis, seis = TreeCrawler(
+                get_crawler_threads(), get_rest_cache(api_instances, repo_name), session).crawl_raw_seis(api_instances, repo_name)
 
             # Get display names
             class SelectSeiDialog(QDialog):
@@ -119,7 +123,7 @@ class VirSatPlugin(Plugin):
             Err('No starting SEI defined\n')
             return None
         else:
-            return VirSatRestImporter(project_directory, api_instances, repo_name).importToDict(start_sei_uuid)
+            return VirSatRestImporter(project_directory, api_instances, repo_name, session).importToDict(start_sei_uuid)
 
     def exportFromDict(self, data_dict, project_directory):
         from plugins.VirtualSatelliteRestPlugin.exporter import VirSatRestExporter
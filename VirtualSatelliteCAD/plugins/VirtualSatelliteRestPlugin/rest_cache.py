@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+import hashlib
+import json
+import os
+import threading
+import time
+import FreeCAD
+from plugins.VirtualSatelliteRestPlugin.api_kinds import CAS, SEIS
+Log = FreeCAD.Console.PrintLog
+Wrn = FreeCAD.Console.PrintWarning
+
+CACHE_DIRECTORY = "rest_cache"
+CACHE_FILE_EXTENSION = ".json"
+DEFAULT_TTL = 300
+
+HTTP_NOT_MODIFIED = 304
+
+KEY_DATA = "data"
+KEY_ETAG = "etag"
+KEY_LAST_MODIFIED = "last_modified"
+KEY_FETCHED = "fetched"
+
+RESOURCE_PATHS = {
+    SEIS: ('/repository/{repoName}/sei/{seiUuid}', 'seiUuid'),
+    CAS: ('/repository/{repoName}/ca/{caUuid}', 'caUuid')
+}
+
+
+def get_cache_name(host, repo_name):
+    '''
+    Every server and repository gets its own cache file
+    '''
+    return hashlib.sha1((host + "|" + repo_name).encode("utf-8")).hexdigest()
+
+
+class RestCache(object):
+    '''
+    Persistent cache of the raw JSON of SEIs and CAs fetched via the REST API.
+    If the server handed out an ETag or Last-Modified header, an entry is always
+    revalidated by a conditional request. Only entries without these headers are
+    used without asking the server while they are younger than the ttl.
+    Entries not seen during a full crawl of the repository can be pruned.
+    '''
+
+    def __init__(self, directory, cache_name, ttl=DEFAULT_TTL):
+        self.path = os.path.join(directory, cache_name + CACHE_FILE_EXTENSION)
+        self.ttl = ttl
+        self.hits, self.revalidations, self.fetches = 0, 0, 0
+        self._entries = {}
+        self._seen = set()
+        self._modified = False
+        self._lock = threading.Lock()
+
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r") as cache_file:
+                    self._entries = json.load(cache_file)
+            except (OSError, ValueError):
+                Wrn("Could not read REST cache {}, starting with an empty one\n".format(self.path))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get_key(self, kind, uuid):
+        return kind + "/" + uuid
+
+    def get(self, kind, uuid, fetch):
+        '''
+        Returns the cached data of the element. The fetch function is called unless the entry
+        has no validators and is younger than the ttl. It gets the conditional request headers
+        and returns the tuple (status, data, response headers).
+        '''
+        key = self._get_key(kind, uuid)
+        with self._lock:
+            entry = self._entries.get(key)
+            self._seen.add(key)
+        now = time.time()
+
+        has_validators = entry is not None and (entry[KEY_ETAG] or entry[KEY_LAST_MODIFIED])
+        if entry is not None and not has_validators and now - entry[KEY_FETCHED] < self.ttl:
+            with self._lock:
+                self.hits += 1
+            return entry[KEY_DATA]
+
+        request_headers = {}
+        if entry is not None:
+            if entry[KEY_ETAG]:
+                request_headers["If-None-Match"] = entry[KEY_ETAG]
+            if entry[KEY_LAST_MODIFIED]:
+                request_headers["If-Modified-Since"] = entry[KEY_LAST_MODIFIED]
+
+        status, data, response_headers = fetch(request_headers)
+        response_headers = response_headers or {}
+
+        with self._lock:
+            self._modified = True
+            if status == HTTP_NOT_MODIFIED and entry is not None:
+                self.revalidations += 1
+                entry[KEY_FETCHED] = now
+                return entry[KEY_DATA]
+
+            self.fetches += 1
+            self._entries[key] = {
+                KEY_DATA: data,
+                KEY_ETAG: response_headers.get("ETag"),
+                KEY_LAST_MODIFIED: response_headers.get("Last-Modified"),
+                KEY_FETCHED: now
+            }
+        return data
+
+    def get_raw(self, api_instances, kind, uuid, repo_name):
+        '''
+        Returns the raw JSON of the SEI or CA, asking the server only if needed
+        '''
+        api_client = api_instances[kind].api_client
+        resource_path, uuid_param = RESOURCE_PATHS[kind]
+
+        def fetch(request_headers):
+            header_params = {'Accept': 'application/json'}
+            header_params.update(request_headers)
+            try:
+                response = api_client.call_api(
+                    resource_path, 'GET',
+                    {'repoName': repo_name, uuid_param: uuid},
+                    [('sync', False)],
+                    header_params,
+                    auth_settings=['basic'],
+                    _return_http_data_only=True,
+                    _preload_content=False)
+            except Exception as exception:
+                # The generated client raises its ApiException for every status outside of 2xx
+                if getattr(exception, "status", None) == HTTP_NOT_MODIFIED:
+                    return (HTTP_NOT_MODIFIED, None, exception.headers)
+                raise
+            return (response.status, json.loads(response.data), response.getheaders())
+
+        return self.get(kind, uuid, fetch)
+
+    def touch(self, kind, uuid):
+        '''
+        Marks the entry as seen, e.g. if the element got taken from a crawl session instead
+        '''
+        with self._lock:
+            self._seen.add(self._get_key(kind, uuid))
+
+    def prune(self, kinds):
+        '''
+        Drops all entries of the given kinds which were not seen since the cache got loaded.
+        Only call this after a full crawl, the elements it did not reach do not exist anymore.
+        Returns the number of dropped entries.
+        '''
+        prefixes = tuple(self._get_key(kind, "") for kind in kinds)
+        with self._lock:
+            unseen_keys = [key for key in self._entries if key.startswith(prefixes) and key not in self._seen]
+            for key in unseen_keys:
+                del self._entries[key]
+            if unseen_keys:
+                self._modified = True
+        return len(unseen_keys)
+
+    def invalidate(self, kind, uuid):
+        '''
+        Drops the entry e.g. after the element got changed on the server
+        '''
+        with self._lock:
+            if self._entries.pop(self._get_key(kind, uuid), None) is not None:
+                self._modified = True
+
+    def save(self):
+        '''
+        Writes the cache to disk if anything changed since it was loaded
+        '''
+        with self._lock:
+            if not self._modified:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as cache_file:
+                json.dump(self._entries, cache_file)
+            os.replace(temp_path, self.path)
+            self._modified = False
+        Log("Saved {} entries to REST cache {}\n".format(len(self._entries), self.path))
@@ -24,46 +24,262 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 #
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
 import plugins.VirtualSatelliteRestPlugin.virsat_constants as vc
 from plugins.VirtualSatelliteRestPlugin.virsat_constants import TYPE_VIS
 from plugins.VirtualSatelliteRestPlugin.api_kinds import CAS, DEFAULT, SEIS
+from plugins.VirtualSatelliteRestPlugin.rest_cache import RestCache, get_cache_name, CACHE_DIRECTORY, DEFAULT_TTL
+from module.tracer import trace_span
 import FreeCAD
 Log = FreeCAD.Console.PrintLog
 
+REST_PREFERENCES = "User parameter:BaseApp/Preferences/Mod/VirtualSatelliteREST"
+
+
+def get_crawler_threads():
+    '''
+    Returns the configured number of concurrent requests used while crawling
+    '''
+    return max(1, FreeCAD.ParamGet(REST_PREFERENCES).GetInt("CrawlerThreads", 1))
+
+
+def is_scoped_crawl_enabled():
+    '''
+    Returns if the import only crawls the tree of the starting SEI
+    '''
+    return FreeCAD.ParamGet(REST_PREFERENCES).GetBool("ScopedCrawl", False)
+
+
+def get_rest_cache(api_instances, repo_name):
+    '''
+    Returns the persistent REST cache of the repository or None if caching is disabled
+    '''
+    preferences = FreeCAD.ParamGet(REST_PREFERENCES)
+    if not preferences.GetBool("UseCrawlCache", False):
+        return None
+
+    import Init
+    host = api_instances[SEIS].api_client.configuration.host
+    return RestCache(os.path.join(Init.APPDATA_DIR, CACHE_DIRECTORY), get_cache_name(host, repo_name),
+                     preferences.GetInt("CrawlCacheTtl", DEFAULT_TTL))
+
+
+class CrawlSession(object):
+    '''
+    Holds the raw JSON of all SEIs and CAs fetched while executing one command.
+    Crawlers sharing a session never fetch an element twice.
+    '''
+
+    def __init__(self):
+        self.root_seis = None
+        self._elements = {SEIS: {}, CAS: {}}
+
+    def get(self, kind, uuid):
+        return self._elements[kind].get(uuid)
+
+    def add(self, kind, uuid, data):
+        self._elements[kind][uuid] = data
+
+    def count(self, kind):
+        return len(self._elements[kind])
+
 
 class TreeCrawler():
     '''
-    This class crawls the Model tree via the API and returns an in memory representation to avoid duplicate calls
+    This class crawls the Model tree via the API and returns an in memory representation to avoid duplicate calls.
+    The tree is fetched level by level, the requests of one level are issued by up to max_workers threads.
+    Elements are taken from the session and the cache first if given.
     '''
 
-    def crawl_tree(self, api_instances, repo_name):
-        Log('Calling crawl tree in Virtual Satellite tree crawler\n')
-        # Result dicts mapping uuids to elements
-        root_seis, seis, cas, visualisations = {}, {}, {}, {}
+    def __init__(self, max_workers=1, cache=None, session=None):
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+        self.session = session
 
-        def recurseChildren(sei, isRoot=False):
-            if(isRoot):
-                root_seis[sei.uuid] = sei
-            seis[sei.uuid] = sei
+    def _get_root_seis(self, api_instances, repo_name):
+        if self.session is None:
+            return list(api_instances[DEFAULT].get_root_seis(repo_name))
+        if self.session.root_seis is None:
+            self.session.root_seis = list(api_instances[DEFAULT].get_root_seis(repo_name))
+        return self.session.root_seis
 
-            for ca_reference in sei.category_assignments:
-                # Don't load the content in a model object because the swagger model doesn't know the available cas
-                response = api_instances[CAS].get_ca(ca_reference.uuid, repo_name, sync=False, _preload_content=False)
-                data = json.loads(response.data)
-                ca_uuid = data[vc.UUID]
+    def _get_raw(self, api_instances, kind, uuid, repo_name):
+        '''
+        Returns the raw JSON of the SEI or CA from the session, the cache or the server
+        '''
+        if self.session is not None:
+            data = self.session.get(kind, uuid)
+            if data is not None:
+                # Keeps the entry from being pruned as not crawled
+                if self.cache is not None:
+                    self.cache.touch(kind, uuid)
+                return data
+
+        if self.cache is not None:
+            data = self.cache.get_raw(api_instances, kind, uuid, repo_name)
+        elif kind == SEIS:
+            data = json.loads(api_instances[SEIS].get_sei(uuid, repo_name, sync=False, _preload_content=False).data)
+        else:
+            # Don't load the content in a model object because the swagger model doesn't know the available cas
+            data = json.loads(api_instances[CAS].get_ca(uuid, repo_name, sync=False, _preload_content=False).data)
 
+        if self.session is not None:
+            self.session.add(kind, uuid, data)
+        return data
+
+    @contextmanager
+    def _create_executor(self):
+        '''
+        Hands back a context with the thread pool, or no pool for sequential requests
+        '''
+        if self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                yield executor
+        else:
+            yield None
+
+    def _map(self, executor, function, items):
+        '''
+        Applies the function to all items and returns the results in the order of the items
+        '''
+        if executor is None:
+            return [function(item) for item in items]
+        return list(executor.map(function, items))
+
+    def _map_grouped(self, executor, function, groups):
+        '''
+        Applies the function to the items of all groups at once and returns the results grouped again
+        '''
+        results = self._map(executor, function, [item for group in groups for item in group])
+        grouped, index = [], 0
+        for group in groups:
+            grouped.append(results[index:index + len(group)])
+            index += len(group)
+        return grouped
+
+    def _save_cache(self, span, crawled_kinds=()):
+        '''
+        Saves the cache. A full crawl reached every element of the crawled kinds,
+        so it also drops the entries of elements which got deleted on the server.
+        '''
+        if self.cache is not None:
+            span.add_count("cache_hits", self.cache.hits)
+            span.add_count("cache_revalidations", self.cache.revalidations)
+            if crawled_kinds:
+                span.add_count("cache_pruned", self.cache.prune(crawled_kinds))
+            self.cache.save()
+
+    def _crawl_levels(self, executor, roots, get_uuid, get_child_uuids, fetch_sei, on_level=None):
+        '''
+        Fetches the tree below the given roots level by level and returns all seis in depth first order
+        '''
+        children_by_sei = {}
+        level = roots
+        while level:
+            if on_level is not None:
+                on_level(level)
+            children = self._map_grouped(executor, fetch_sei, [get_child_uuids(sei) for sei in level])
+            for sei, sei_children in zip(level, children):
+                children_by_sei[get_uuid(sei)] = sei_children
+            level = [child for sei_children in children for child in sei_children]
+
+        ordered_seis = []
+
+        def collect(sei):
+            ordered_seis.append(sei)
+            for child in children_by_sei[get_uuid(sei)]:
+                collect(child)
+
+        for root in roots:
+            collect(root)
+        return ordered_seis
+
+    def _get_sei(self, api_instances, sei_uuid, repo_name):
+        if self.cache is None and self.session is None:
+            return api_instances[SEIS].get_sei(sei_uuid, repo_name, sync=False)
+        # Shared raw JSON is converted to the swagger model
+        data = self._get_raw(api_instances, SEIS, sei_uuid, repo_name)
+        return api_instances[SEIS].api_client.deserialize(SimpleNamespace(data=json.dumps(data)), 'ABeanStructuralElementInstance')
+
+    def _fetch_cas(self, executor, api_instances, repo_name, level, cas_by_sei):
+        ca_uuids = [[ca_reference.uuid for ca_reference in sei.category_assignments] for sei in level]
+        level_cas = self._map_grouped(executor, lambda ca_uuid: self._get_raw(api_instances, CAS, ca_uuid, repo_name), ca_uuids)
+        for sei, sei_cas in zip(level, level_cas):
+            cas_by_sei[sei.uuid] = sei_cas
+
+    def _crawl_with_cas(self, executor, api_instances, repo_name, roots, cas_by_sei):
+        return self._crawl_levels(
+            executor, roots,
+            lambda sei: sei.uuid,
+            lambda sei: [child_reference.uuid for child_reference in sei.children],
+            lambda sei_uuid: self._get_sei(api_instances, sei_uuid, repo_name),
+            lambda level: self._fetch_cas(executor, api_instances, repo_name, level, cas_by_sei))
+
+    def _collect(self, ordered_seis, cas_by_sei, span, full_crawl=False):
+        seis, cas, visualisations = {}, {}, {}
+        for sei in ordered_seis:
+            seis[sei.uuid] = sei
+            # The root seis are not taken from the cache, but they still exist
+            if full_crawl and self.cache is not None:
+                self.cache.touch(SEIS, sei.uuid)
+            for data in cas_by_sei[sei.uuid]:
+                ca_uuid = data[vc.UUID]
                 cas[ca_uuid] = data
                 if(data[vc.TYPE] == TYPE_VIS):
                     visualisations[ca_uuid] = data
+        span.add_count("seis", len(seis))
+        span.add_count("cas", len(cas))
+        self._save_cache(span, [SEIS, CAS] if full_crawl else ())
+        return seis, cas, visualisations
 
-            # Recursion
-            for child_refernce in sei.children:
-                child = api_instances[SEIS].get_sei(child_refernce.uuid, repo_name, sync=False)
-                recurseChildren(child)
+    def crawl_tree(self, api_instances, repo_name):
+        Log('Calling crawl tree in Virtual Satellite tree crawler\n')
+        # Result dicts mapping uuids to elements
+        root_seis = {}
+        cas_by_sei = {}
 
         # Get root Seis and sync
-        for root_sei in api_instances[DEFAULT].get_root_seis(repo_name):
-            recurseChildren(root_sei, isRoot=True)
+        with trace_span("crawl") as span:
+            with self._create_executor() as executor:
+                roots = self._get_root_seis(api_instances, repo_name)
+                ordered_seis = self._crawl_with_cas(executor, api_instances, repo_name, roots, cas_by_sei)
+
+            for root_sei in roots:
+                root_seis[root_sei.uuid] = root_sei
+            seis, cas, visualisations = self._collect(ordered_seis, cas_by_sei, span, full_crawl=True)
+
+        return (root_seis, seis, cas, visualisations)
+
+    def crawl_subtree(self, api_instances, repo_name, start_sei_uuid):
+        '''
+        Crawls only the tree below the starting sei and the chain of its parents.
+        Returns the same result as crawl_tree limited to these seis.
+        '''
+        Log('Calling crawl subtree of {} in Virtual Satellite tree crawler\n'.format(start_sei_uuid))
+        root_seis = {}
+        cas_by_sei = {}
+
+        with trace_span("crawl_subtree") as span:
+            with self._create_executor() as executor:
+                start_sei = self._get_sei(api_instances, start_sei_uuid, repo_name)
+
+                # The parents are needed to resolve inherited visualisations and the parent products
+                parents = []
+                parent_uuid = start_sei.parent
+                while parent_uuid is not None:
+                    parents.insert(0, self._get_sei(api_instances, parent_uuid, repo_name))
+                    parent_uuid = parents[0].parent
+                self._fetch_cas(executor, api_instances, repo_name, parents, cas_by_sei)
+
+                ordered_seis = parents + self._crawl_with_cas(executor, api_instances, repo_name, [start_sei], cas_by_sei)
+
+            for sei in ordered_seis:
+                if sei.parent is None:
+                    root_seis[sei.uuid] = sei
+            seis, cas, visualisations = self._collect(ordered_seis, cas_by_sei, span)
 
         return (root_seis, seis, cas, visualisations)
 
@@ -72,22 +288,27 @@ class TreeCrawler():
         # Result dicts mapping uuids to elements
         root_seis, seis = {}, {}
 
-        def recurseChildren(sei, isRoot=False):
-            if(isRoot):
-                root_seis[sei[vc.UUID]] = sei
-            seis[sei[vc.UUID]] = sei
-
-            # Recursion
-            for child_refernce in sei[vc.CHILDREN]:
-                response = api_instances[SEIS].get_sei(child_refernce[vc.UUID], repo_name, sync=False, _preload_content=False)
-                child = json.loads(response.data)
-                recurseChildren(child)
+        def fetch_sei(sei_uuid):
+            return self._get_raw(api_instances, SEIS, sei_uuid, repo_name)
 
         # Get root Seis and sync
-        for root_sei in api_instances[DEFAULT].get_root_seis(repo_name):
-            # Currently no type field if fetched over the root sei endpoint
-            # Workaround: fetch the concrete sei again
-            response = api_instances[SEIS].get_sei(root_sei.uuid, repo_name, sync=False, _preload_content=False)
-            recurseChildren(json.loads(response.data), isRoot=True)
+        with trace_span("crawl_raw_seis") as span:
+            with self._create_executor() as executor:
+                # Currently no type field if fetched over the root sei endpoint
+                # Workaround: fetch the concrete sei again
+                root_uuids = [root_sei.uuid for root_sei in self._get_root_seis(api_instances, repo_name)]
+                roots = self._map(executor, fetch_sei, root_uuids)
+                ordered_seis = self._crawl_levels(
+                    executor, roots,
+                    lambda sei: sei[vc.UUID],
+                    lambda sei: [child_reference[vc.UUID] for child_reference in sei[vc.CHILDREN]],
+                    fetch_sei)
+
+            for root_sei in roots:
+                root_seis[root_sei[vc.UUID]] = root_sei
+            for sei in ordered_seis:
+                seis[sei[vc.UUID]] = sei
+            span.add_count("seis", len(seis))
+            self._save_cache(span, [SEIS])
 
         return (root_seis, seis)
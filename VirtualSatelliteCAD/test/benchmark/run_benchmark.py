@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+#
+
+"""
+Runs the synthetic satellite benchmarks for the JSON import and export round trip
+and records the results into a machine readable baseline. The assemblies are written
+by A2plus, which needs the FreeCAD GUI, thus the benchmarks run in FreeCAD and not
+in FreeCADCmd. On a machine without display, from the repository root run e.g.:
+
+    xvfb-run FreeCAD -M VirtualSatelliteCAD VirtualSatelliteCAD/test/benchmark/run_benchmark.py
+
+or call main() from the python console of a running FreeCAD. Every scenario runs
+in its own FreeCAD process, so its peak RSS does not include the scenarios before.
+
+Each run writes benchmark_results.json into the working directory and compares
+against benchmark_baseline.json next to this file. Pass update_baseline=True
+to store the results as the new baseline. Without a working_directory a new
+temporary directory is used.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import FreeCAD
+from freecad.active_document import FREECAD_FILE_EXTENSION
+from json_io.json_importer import JsonImporter
+from json_io.json_exporter import JsonExporter
+from json_io.json_definitions import JSON_PARTS
+from module.environment import Environment
+from test.benchmark.synthetic_satellite import SyntheticSatelliteGenerator
+
+App = FreeCAD
+Msg = FreeCAD.Console.PrintMessage
+Wrn = FreeCAD.Console.PrintWarning
+Err = FreeCAD.Console.PrintError
+
+BENCHMARK_DIRECTORY_PREFIX = "FreeCADbenchmark_"
+BENCHMARK_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+BENCHMARK_RESULTS_FILE_NAME = "benchmark_results.json"
+
+# A scenario process reads its job from the file named by this environment variable
+BENCHMARK_JOB_VARIABLE = "VIRTUAL_SATELLITE_BENCHMARK_JOB"
+BENCHMARK_RESULT_EXTENSION = ".result"
+BENCHMARK_LOG_EXTENSION = ".log"
+
+JOB_SCENARIO = "scenario"
+JOB_PARAMETERS = "parameters"
+JOB_WORKING_DIRECTORY = "working_directory"
+JOB_WORKER_COUNT = "worker_count"
+
+# A metric which got worse by more than this factor against the baseline is reported
+REGRESSION_THRESHOLD = 1.2
+
+RESULT_IMPORT_SECONDS = "import_seconds"
+RESULT_REIMPORT_SECONDS = "reimport_seconds"
+RESULT_EXPORT_SECONDS = "export_seconds"
+RESULT_PEAK_RSS_KB = "peak_rss_kb"
+RESULT_FCSTD_BYTES = "fcstd_bytes"
+RESULT_PARTS = "parts"
+
+COMPARED_RESULTS = [RESULT_IMPORT_SECONDS, RESULT_REIMPORT_SECONDS, RESULT_EXPORT_SECONDS, RESULT_PEAK_RSS_KB, RESULT_FCSTD_BYTES]
+
+BENCHMARK_SCENARIOS = {
+    "small": dict(product_count=20, depth=2, fan_out=3),
+    "deep": dict(product_count=100, depth=5, fan_out=2),
+    "wide": dict(product_count=200, depth=2, fan_out=20),
+    "repeated_parts": dict(product_count=200, depth=3, fan_out=5, repeated_part_ratio=0.8),
+}
+
+
+def get_peak_rss_kb():
+    '''
+    Peak resident set size of this process and its import workers. The peak never
+    decreases within a process, thus every scenario runs in its own process.
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # macOS reports bytes, Linux reports kilobytes
+    if sys.platform == "darwin":
+        peak_rss = peak_rss // 1024
+    return peak_rss
+
+
+def get_fcstd_bytes(working_directory):
+    return sum(os.path.getsize(os.path.join(working_directory, file_name))
+               for file_name in os.listdir(working_directory) if file_name.endswith(FREECAD_FILE_EXTENSION))
+
+
+def close_all_documents():
+    for document_name in list(App.listDocuments().keys()):
+        App.closeDocument(document_name)
+
+
+def get_freecad_path():
+    '''
+    Hands back the FreeCAD executable with GUI, next to the running FreeCAD or on the path
+    '''
+    executable = "FreeCAD.exe" if os.name == "nt" else "FreeCAD"
+    path = os.path.join(App.getHomePath(), "bin", executable)
+
+    if not os.path.isfile(path):
+        path = shutil.which(executable) or shutil.which(executable.lower())
+
+    return path
+
+
+class BenchmarkRunner(object):
+    '''
+    Runs the import, an unchanged re-import and the export of one synthetic satellite
+    '''
+
+    def __init__(self, working_directory=None, worker_count=1):
+        if working_directory is None:
+            working_directory = tempfile.mkdtemp(prefix=BENCHMARK_DIRECTORY_PREFIX)
+        self.working_directory = working_directory
+        self.worker_count = worker_count
+
+    def _prepare_directory(self, scenario_name):
+        scenario_directory = os.path.join(self.working_directory, scenario_name) + os.sep
+        shutil.rmtree(scenario_directory, ignore_errors=True)
+        os.makedirs(scenario_directory)
+        return scenario_directory
+
+    def run_scenario(self, scenario_name, generator):
+        scenario_directory = self._prepare_directory(scenario_name)
+        json_object = generator.generate()
+        close_all_documents()
+
+        start_time = time.perf_counter()
+        _, _, active_document = JsonImporter(scenario_directory, self.worker_count).full_import(json_object)
+        import_seconds = time.perf_counter() - start_time
+
+        close_all_documents()
+        start_time = time.perf_counter()
+        _, _, active_document = JsonImporter(scenario_directory, self.worker_count).full_import(json_object)
+        reimport_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        JsonExporter(scenario_directory).full_export(active_document)
+        export_seconds = time.perf_counter() - start_time
+
+        close_all_documents()
+
+        return {
+            RESULT_IMPORT_SECONDS: round(import_seconds, 3),
+            RESULT_REIMPORT_SECONDS: round(reimport_seconds, 3),
+            RESULT_EXPORT_SECONDS: round(export_seconds, 3),
+            RESULT_PEAK_RSS_KB: get_peak_rss_kb(),
+            RESULT_FCSTD_BYTES: get_fcstd_bytes(scenario_directory),
+            RESULT_PARTS: len(json_object[JSON_PARTS])
+        }
+
+    def run_scenario_process(self, scenario_name, parameters, freecad_path):
+        '''
+        Runs one scenario in a new FreeCAD process and hands back its results, or None if it failed
+        '''
+        job_file_path = os.path.join(self.working_directory, scenario_name + ".json")
+        with open(job_file_path, "w") as file:
+            json.dump({
+                JOB_SCENARIO: scenario_name,
+                JOB_PARAMETERS: parameters,
+                JOB_WORKING_DIRECTORY: self.working_directory,
+                JOB_WORKER_COUNT: self.worker_count
+            }, file)
+
+        environment = dict(os.environ)
+        environment[BENCHMARK_JOB_VARIABLE] = job_file_path
+
+        with open(job_file_path + BENCHMARK_LOG_EXTENSION, "w") as log_file:
+            return_code = subprocess.call(
+                [freecad_path, "-M", Environment.get_module_path(), os.path.abspath(__file__)],
+                env=environment,
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=subprocess.STDOUT)
+
+        result_file_path = job_file_path + BENCHMARK_RESULT_EXTENSION
+        if return_code != 0 or not os.path.isfile(result_file_path):
+            with open(job_file_path + BENCHMARK_LOG_EXTENSION, "r") as log_file:
+                Err(f"Benchmark '{scenario_name}' failed with exit code {return_code}:\n{log_file.read()}\n")
+            return None
+
+        with open(result_file_path, "r") as file:
+            return json.load(file)
+
+    def run(self, scenarios=BENCHMARK_SCENARIOS):
+        freecad_path = get_freecad_path()
+        if freecad_path is None:
+            Err("Could not find FreeCAD, no benchmarks are run\n")
+            return {}
+
+        results = {}
+        for scenario_name, parameters in scenarios.items():
+            Msg(f"Running benchmark '{scenario_name}'...\n")
+            scenario_results = self.run_scenario_process(scenario_name, parameters, freecad_path)
+            if scenario_results is not None:
+                results[scenario_name] = scenario_results
+                Msg(f"Benchmark '{scenario_name}': {scenario_results}\n")
+        return results
+
+
+def compare_with_baseline(results, baseline):
+    '''
+    Hands back a list of human readable regressions against the baseline
+    '''
+    regressions = []
+    for scenario_name, scenario_results in results.items():
+        baseline_results = baseline.get(scenario_name, {})
+        for result_name in COMPARED_RESULTS:
+            value, baseline_value = scenario_results.get(result_name), baseline_results.get(result_name)
+            if value is not None and baseline_value and value > baseline_value * REGRESSION_THRESHOLD:
+                regressions.append(f"{scenario_name}.{result_name}: {baseline_value} -> {value}")
+    return regressions
+
+
+def main(baseline_path=BENCHMARK_BASELINE_PATH, update_baseline=False, worker_count=1, working_directory=None):
+    runner = BenchmarkRunner(working_directory, worker_count)
+    Msg(f"Running benchmarks in '{runner.working_directory}'\n")
+    results = runner.run()
+
+    with open(os.path.join(runner.working_directory, BENCHMARK_RESULTS_FILE_NAME), "w") as file:
+        json.dump(results, file, indent=4, sort_keys=True)
+
+    if os.path.isfile(baseline_path):
+        with open(baseline_path, "r") as file:
+            regressions = compare_with_baseline(results, json.load(file))
+        for regression in regressions:
+            Wrn(f"Regression: {regression}\n")
+        if not regressions:
+            Msg("No regressions against the baseline\n")
+
+    if update_baseline:
+        with open(baseline_path, "w") as file:
+            json.dump(results, file, indent=4, sort_keys=True)
+        Msg(f"Updated baseline '{baseline_path}'\n")
+
+    return results
+
+
+def run_job(job_file_path):
+    '''
+    Runs the scenario of the job in this process and writes the results next to the job
+    '''
+    with open(job_file_path, "r") as file:
+        job = json.load(file)
+
+    runner = BenchmarkRunner(job[JOB_WORKING_DIRECTORY], job[JOB_WORKER_COUNT])
+    results = runner.run_scenario(job[JOB_SCENARIO], SyntheticSatelliteGenerator(**job[JOB_PARAMETERS]))
+
+    # Write to a temporary file first, so a crashing scenario never leaves a partial result
+    with open(job_file_path + BENCHMARK_RESULT_EXTENSION + ".tmp", "w") as file:
+        json.dump(results, file)
+    os.replace(job_file_path + BENCHMARK_RESULT_EXTENSION + ".tmp", job_file_path + BENCHMARK_RESULT_EXTENSION)
+
+
+if __name__ == "__main__":
+    exit_code = 0
+    try:
+        if BENCHMARK_JOB_VARIABLE in os.environ:
+            run_job(os.environ[BENCHMARK_JOB_VARIABLE])
+        else:
+            main()
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # FreeCAD would otherwise stay open after running the file
+    os._exit(exit_code)
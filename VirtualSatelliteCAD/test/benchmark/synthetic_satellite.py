@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+#
+import math
+import random
+import uuid
+from json_io.json_definitions import JSON_PARTS, JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, \
+    JSON_ELEMENT_NAME, JSON_ELEMENT_UUID, JSON_ELEMENT_COLOR, JSON_ELEMENT_SHAPE, \
+    JSON_ELEMENT_LENGTH_X, JSON_ELEMENT_LENGTH_Y, JSON_ELEMENT_LENGTH_Z, JSON_ELEMENT_RADIUS, \
+    JSON_ELEMENT_POS_X, JSON_ELEMENT_POS_Y, JSON_ELEMENT_POS_Z, JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z, \
+    JSON_ELEMENT_PART_UUID, JSON_ELEMENT_PART_NAME, JSON_ELEMENT_SHAPE_BOX, JSON_ELEMENT_SHAPE_CYLINDER, \
+    JSON_ELEMENT_SHAPE_SPHERE, JSON_ELEMENT_SHAPE_CONE
+
+DEFAULT_SHAPE_MIX = {
+    JSON_ELEMENT_SHAPE_BOX: 4,
+    JSON_ELEMENT_SHAPE_CYLINDER: 2,
+    JSON_ELEMENT_SHAPE_SPHERE: 1,
+    JSON_ELEMENT_SHAPE_CONE: 1
+}
+
+
+class SyntheticSatelliteGenerator(object):
+    '''
+    Generates the JSON of a synthetic satellite as it would be handed over by a plugin.
+    The tree has assemblies down to the given depth, each with the given fan out,
+    the products referencing parts are distributed over the deepest assemblies.
+    The same seed always generates the same satellite.
+    '''
+
+    def __init__(self, product_count=50, depth=3, fan_out=4, shape_mix=DEFAULT_SHAPE_MIX, repeated_part_ratio=0.0, seed=0):
+        '''
+        The product count is the number of products referencing a part. The repeated part ratio
+        is the share of these products which reference an already used part instead of a new one.
+        '''
+        self.product_count = product_count
+        self.depth = max(1, depth)
+        self.fan_out = max(1, fan_out)
+        self.shape_mix = shape_mix
+        self.repeated_part_ratio = repeated_part_ratio
+        self._random = random.Random(seed)
+
+    def _create_uuid(self):
+        return str(uuid.UUID(int=self._random.getrandbits(128), version=4))
+
+    def _create_position_and_rotation(self, json_product):
+        json_product[JSON_ELEMENT_POS_X] = round(self._random.uniform(-1.0, 1.0), 3)
+        json_product[JSON_ELEMENT_POS_Y] = round(self._random.uniform(-1.0, 1.0), 3)
+        json_product[JSON_ELEMENT_POS_Z] = round(self._random.uniform(-1.0, 1.0), 3)
+        json_product[JSON_ELEMENT_ROT_X] = self._random.choice([0.0, math.pi / 2])
+        json_product[JSON_ELEMENT_ROT_Y] = self._random.choice([0.0, math.pi / 2])
+        json_product[JSON_ELEMENT_ROT_Z] = self._random.choice([0.0, math.pi / 2])
+
+    def _create_part(self, index):
+        shapes = list(self.shape_mix.keys())
+        shape = self._random.choices(shapes, weights=[self.shape_mix[shape] for shape in shapes])[0]
+
+        return {
+            JSON_ELEMENT_NAME: "Part" + str(index),
+            JSON_ELEMENT_UUID: self._create_uuid(),
+            JSON_ELEMENT_SHAPE: shape,
+            JSON_ELEMENT_COLOR: self._random.randrange(0, 0xFFFFFF),
+            JSON_ELEMENT_LENGTH_X: round(self._random.uniform(0.01, 1.0), 3),
+            JSON_ELEMENT_LENGTH_Y: round(self._random.uniform(0.01, 1.0), 3),
+            JSON_ELEMENT_LENGTH_Z: round(self._random.uniform(0.01, 1.0), 3),
+            JSON_ELEMENT_RADIUS: round(self._random.uniform(0.01, 0.5), 3)
+        }
+
+    def _create_product(self, name):
+        json_product = {
+            JSON_ELEMENT_NAME: name,
+            JSON_ELEMENT_UUID: self._create_uuid(),
+            JSON_ELEMNT_CHILDREN: []
+        }
+        self._create_position_and_rotation(json_product)
+        return json_product
+
+    def _create_assemblies(self, json_assembly, depth, deepest_assemblies):
+        if depth == self.depth:
+            deepest_assemblies.append(json_assembly)
+            return
+
+        for index in range(self.fan_out):
+            json_child = self._create_product(json_assembly[JSON_ELEMENT_NAME] + "_" + str(index))
+            json_assembly[JSON_ELEMNT_CHILDREN].append(json_child)
+            self._create_assemblies(json_child, depth + 1, deepest_assemblies)
+
+    def _remove_empty_assemblies(self, json_assembly):
+        '''
+        With fewer products than deepest assemblies, some of them stay empty
+        '''
+        for json_child in json_assembly[JSON_ELEMNT_CHILDREN]:
+            self._remove_empty_assemblies(json_child)
+
+        json_assembly[JSON_ELEMNT_CHILDREN] = [json_child for json_child in json_assembly[JSON_ELEMNT_CHILDREN]
+                                               if json_child[JSON_ELEMNT_CHILDREN] or JSON_ELEMENT_PART_UUID in json_child]
+
+    def generate(self):
+        json_parts = []
+
+        json_root = {
+            JSON_ELEMENT_NAME: "SyntheticSatellite",
+            JSON_ELEMENT_UUID: self._create_uuid(),
+            JSON_ELEMNT_CHILDREN: []
+        }
+        deepest_assemblies = []
+        self._create_assemblies(json_root, 1, deepest_assemblies)
+
+        for index in range(self.product_count):
+            if json_parts and self._random.random() < self.repeated_part_ratio:
+                json_part = self._random.choice(json_parts)
+            else:
+                json_part = self._create_part(len(json_parts))
+                json_parts.append(json_part)
+
+            json_product = self._create_product("Product" + str(index))
+            json_product[JSON_ELEMENT_PART_UUID] = json_part[JSON_ELEMENT_UUID]
+            json_product[JSON_ELEMENT_PART_NAME] = json_part[JSON_ELEMENT_NAME]
+
+            deepest_assemblies[index % len(deepest_assemblies)][JSON_ELEMNT_CHILDREN].append(json_product)
+
+        self._remove_empty_assemblies(json_root)
+
+        return {
+            JSON_PRODUCTS: json_root,
+            JSON_PARTS: json_parts
+        }
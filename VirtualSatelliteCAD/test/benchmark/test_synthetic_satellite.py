@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+
+import unittest
+from json_io.json_definitions import JSON_PARTS, JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, JSON_ELEMENT_PART_UUID, \
+    JSON_ELEMENT_SHAPE, JSON_ELEMENT_SHAPE_BOX
+from test.benchmark.synthetic_satellite import SyntheticSatelliteGenerator
+from test.benchmark.run_benchmark import compare_with_baseline, RESULT_IMPORT_SECONDS
+
+
+class TestSyntheticSatellite(unittest.TestCase):
+
+    def _get_leaf_products_and_depth(self, json_product, depth=0):
+        if not json_product[JSON_ELEMNT_CHILDREN]:
+            return [json_product], depth
+
+        leaf_products, max_depth = [], depth
+        for json_child in json_product[JSON_ELEMNT_CHILDREN]:
+            child_leaf_products, child_depth = self._get_leaf_products_and_depth(json_child, depth + 1)
+            leaf_products += child_leaf_products
+            max_depth = max(max_depth, child_depth)
+        return leaf_products, max_depth
+
+    def test_generate(self):
+        json_object = SyntheticSatelliteGenerator(product_count=30, depth=3, fan_out=2).generate()
+
+        leaf_products, depth = self._get_leaf_products_and_depth(json_object[JSON_PRODUCTS])
+        self.assertEqual(len(leaf_products), 30, "Generated all products")
+        self.assertEqual(depth, 3, "Generated the tree with the given depth")
+        self.assertEqual(len(json_object[JSON_PARTS]), 30, "Every product got its own part")
+        self.assertTrue(all(JSON_ELEMENT_PART_UUID in json_product for json_product in leaf_products), "All leaves reference a part")
+
+    def test_generate_repeated_parts_and_shape_mix(self):
+        json_object = SyntheticSatelliteGenerator(product_count=100, shape_mix={JSON_ELEMENT_SHAPE_BOX: 1}, repeated_part_ratio=0.5).generate()
+
+        self.assertLess(len(json_object[JSON_PARTS]), 100, "Parts got repeated")
+        self.assertTrue(all(json_part[JSON_ELEMENT_SHAPE] == JSON_ELEMENT_SHAPE_BOX for json_part in json_object[JSON_PARTS]), "Only boxes")
+
+    def test_generate_without_empty_assemblies(self):
+        json_object = SyntheticSatelliteGenerator(product_count=2, depth=3, fan_out=4).generate()
+
+        leaf_products, _ = self._get_leaf_products_and_depth(json_object[JSON_PRODUCTS])
+        self.assertEqual(len(leaf_products), 2, "Empty assemblies got removed")
+
+    def test_generate_deterministic(self):
+        self.assertEqual(SyntheticSatelliteGenerator(seed=3).generate(), SyntheticSatelliteGenerator(seed=3).generate(), "Same seed, same satellite")
+
+    def test_compare_with_baseline(self):
+        baseline = {"small": {RESULT_IMPORT_SECONDS: 1.0}}
+
+        self.assertEqual(compare_with_baseline({"small": {RESULT_IMPORT_SECONDS: 1.1}}, baseline), [], "Within the threshold")
+        self.assertEqual(len(compare_with_baseline({"small": {RESULT_IMPORT_SECONDS: 2.0}}, baseline)), 1, "Detected the regression")
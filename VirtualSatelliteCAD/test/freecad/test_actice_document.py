@@ -27,7 +27,7 @@
 
 import FreeCAD
 import FreeCADGui
-from freecad.active_document import ActiveDocument
+from freecad.active_document import ActiveDocument, BulkWrite
 import os
 from test.test_setup import AWorkingDirectoryTest
 
@@ -127,3 +127,24 @@ class TestActiveDocument(AWorkingDirectoryTest):
 
         self.assertIsNotNone(freecad_object1, "Specific Object 1 exists")
         self.assertIsNotNone(freecad_object2, "Specific Object 2 did not disappear while reopening")
+
+    def test_bulk_write_defers_recompute(self):
+        TEST_DOCUMENT_NAME = "box_263_456_789_999"
+
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document(TEST_DOCUMENT_NAME)
+        box = App.ActiveDocument.addObject("Part::Box", "BoxBulkWrite")
+
+        with BulkWrite() as bulk_write:
+            active_document.recompute()
+            active_document.recompute()
+
+            self.assertEqual(bulk_write.deferred_count, 2, "Both recomputes got deferred")
+            self.assertEqual(bulk_write.recompute_count, 0, "Nothing got recomputed yet")
+            self.assertIn("Touched", box.State, "Box still needs a recompute")
+
+            active_document.save_as(TEST_DOCUMENT_NAME)
+
+            self.assertEqual(bulk_write.recompute_count, 1, "Recomputed once before saving")
+            self.assertNotIn("Touched", box.State, "Box got recomputed")
+
+        self.assertEqual(bulk_write.recompute_count, 1, "No further recompute at the end of the bulk write")
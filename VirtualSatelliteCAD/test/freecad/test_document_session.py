@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+
+import FreeCAD
+from freecad.active_document import ActiveDocument
+from freecad.document_session import DocumentSession, SESSION_HITS, SESSION_MISSES, SESSION_EVICTIONS, SESSION_SAVES
+import os
+from test.test_setup import AWorkingDirectoryTest
+
+App = FreeCAD
+
+
+class TestDocumentSession(AWorkingDirectoryTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpDirectory("DocumentSession/")
+        cls._WORKING_DIRECTORY = cls.getDirectoryFullPath()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def test_keep_open_and_save_on_end(self):
+        TEST_DOCUMENT_NAME = "box_263_456_789_555"
+        file_full_path = ActiveDocument(self._WORKING_DIRECTORY).get_file_full_path(TEST_DOCUMENT_NAME)
+
+        with DocumentSession(self._WORKING_DIRECTORY) as session:
+            self.assertEqual(DocumentSession.get_current_session(), session, "Session is the current one")
+
+            active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document(TEST_DOCUMENT_NAME)
+            App.ActiveDocument.addObject("Part::Box", "BoxSession")
+            active_document.save_and_close_active_document(TEST_DOCUMENT_NAME)
+
+            self.assertIn(TEST_DOCUMENT_NAME, App.listDocuments(), "Document stays open within the session")
+            self.assertFalse(os.path.isfile(file_full_path), "Saving is deferred")
+            self.assertTrue(session.is_dirty(TEST_DOCUMENT_NAME), "Document is marked dirty")
+
+            ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document(TEST_DOCUMENT_NAME)
+            self.assertIsNotNone(App.ActiveDocument.getObject("BoxSession"), "Got the same document again")
+            active_document.close_active_document(TEST_DOCUMENT_NAME)
+
+        self.assertIsNone(DocumentSession.get_current_session(), "Session ended")
+        self.assertTrue(os.path.isfile(file_full_path), "File got saved at the end of the session")
+        self.assertNotIn(TEST_DOCUMENT_NAME, App.listDocuments(), "Document got closed at the end of the session")
+
+        self.assertEqual(session.statistics[SESSION_MISSES], 1, "Opened the document once")
+        self.assertEqual(session.statistics[SESSION_HITS], 1, "Reused the open document")
+        self.assertEqual(session.statistics[SESSION_SAVES], 1, "Saved the document once")
+
+    def test_evict_least_recently_used(self):
+        TEST_DOCUMENT_NAMES = ["box_263_456_789_666", "box_263_456_789_777", "box_263_456_789_888"]
+
+        with DocumentSession(self._WORKING_DIRECTORY, max_open_documents=2) as session:
+            for document_name in TEST_DOCUMENT_NAMES:
+                active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document(document_name)
+                active_document.save_and_close_active_document(document_name)
+
+            loaded_documents = list(App.listDocuments().keys())
+            self.assertNotIn(TEST_DOCUMENT_NAMES[0], loaded_documents, "Least recently used document got evicted")
+            self.assertIn(TEST_DOCUMENT_NAMES[2], loaded_documents, "Most recently used document is still open")
+            self.assertTrue(os.path.isfile(ActiveDocument(self._WORKING_DIRECTORY).get_file_full_path(TEST_DOCUMENT_NAMES[0])),
+                            "Evicted document got saved")
+
+        self.assertEqual(session.statistics[SESSION_EVICTIONS], 1, "Evicted one document")
+        self.assertEqual(len(App.listDocuments()), 0, "All documents got closed at the end of the session")
@@ -26,10 +26,11 @@
 
 
 import json
+from unittest.mock import patch
 from test.test_setup import AWorkingDirectoryTest
 import FreeCAD
 import FreeCADGui
-from json_io.products.json_product import AJsonProduct
+from json_io.products.json_product import AJsonProduct, is_part_instancing_enabled, is_link_supported
 from test.json_io.test_json_data import TEST_JSON_PRODUCT_WITHOUT_CHILDREN, TEST_JSON_PRODUCT_WITHOUT_CHILDREN_WITHOUT_PART, \
     BASEPLATE_UNIQ_NAME, BASEPLATEBOTTOM_UNIQ_NAME
 from json_io.json_definitions import PART_IDENTIFIER, \
@@ -127,3 +128,19 @@ class TestJsonProduct(AWorkingDirectoryTest):
         self.assertAlmostEqualVector([json_object[JSON_ELEMENT_ROT_X], json_object[JSON_ELEMENT_ROT_Y], json_object[JSON_ELEMENT_ROT_Z]],
                                      [read_json[JSON_ELEMENT_ROT_X], read_json[JSON_ELEMENT_ROT_Y], read_json[JSON_ELEMENT_ROT_Z]],
                                      msg="Rotations in JSON files are equal")
+
+    def test_is_part_instancing_enabled(self):
+        with patch("FreeCAD.ParamGet") as mock_param_get:
+            mock_param_get.return_value.GetBool.return_value = True
+
+            with patch("json_io.products.json_product.is_link_supported", return_value=True):
+                self.assertTrue(is_part_instancing_enabled(), "Places links to shared parts")
+
+            # Without App::Link the parts get imported by A2plus
+            with patch("json_io.products.json_product.is_link_supported", return_value=False):
+                self.assertFalse(is_part_instancing_enabled(), "Falls back to A2plus imports")
+
+        with patch("FreeCAD.Version", return_value=["0", "18", "16146 (Git)"]):
+            self.assertFalse(is_link_supported(), "FreeCAD 0.18 has no App::Link")
+        with patch("FreeCAD.Version", return_value=["0", "19", "24291 (Git)"]):
+            self.assertTrue(is_link_supported(), "FreeCAD 0.19 has App::Link")
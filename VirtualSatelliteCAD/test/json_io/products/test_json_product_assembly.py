@@ -26,10 +26,14 @@
 
 
 import json
+import os
+import shutil
+from unittest.mock import patch
 from test.test_setup import AWorkingDirectoryTest
 import FreeCAD
 import FreeCADGui
-from json_io.products.json_product_assembly import JsonProductAssembly
+from json_io.products.json_product_assembly import JsonProductAssembly, RECONCILIATION_CREATE, RECONCILIATION_UPDATE, \
+    RECONCILIATION_DELETE, is_partial_update_supported
 from freecad.active_document import ActiveDocument
 from test.json_io.test_json_data import TEST_JSON_PRODUCT_WITH_CHILDREN,\
     TEST_JSON_PRODUCT_WITHOUT_CHILDREN, TEST_JSON_PRODUCT_WITH_CHILDREN_WITH_CHILD,\
@@ -38,9 +42,10 @@ from test.json_io.test_json_data import TEST_JSON_PRODUCT_WITH_CHILDREN,\
 from json_io.json_definitions import JSON_ELEMNT_CHILDREN, PRODUCT_IDENTIFIER, \
     JSON_ELEMENT_POS_X, JSON_ELEMENT_POS_Y, JSON_ELEMENT_POS_Z, \
     JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z, \
-    PART_IDENTIFIER
+    PART_IDENTIFIER, JSON_ELEMENT_PART_UUID, JSON_ELEMENT_PART_NAME
 from json_io.json_spread_sheet import FREECAD_PART_SHEET_NAME
 from json_io.products.json_product_assembly_tree_traverser import JsonProductAssemblyTreeTraverser
+from json_io.json_part_registry import JsonPartRegistry
 
 App = FreeCAD
 Gui = FreeCADGui
@@ -201,6 +206,82 @@ class TestJsonProductAssembly(AWorkingDirectoryTest):
 
         self.assertEquals(len(active_document.app_active_document.RootObjects), 6, "Found correct amount of root objects 3 objects plus 3 sheets")
 
+    def test_write_to_freecad_reconciliation(self):
+        self.create_Test_Part()
+
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("ProductAssemblyReconciliation")
+        json_object = json.loads(self.json_data)
+
+        json_product = JsonProductAssembly().parse_from_json(json_object)
+        json_product.write_to_freecad(active_document)
+        self.assertEqual(json_product.reconciliation_counts[RECONCILIATION_CREATE], 3, "Created the part of the assembly and both children")
+
+        json_product = JsonProductAssembly().parse_from_json(json_object)
+        json_product.write_to_freecad(active_document)
+        self.assertEqual(json_product.reconciliation_counts[RECONCILIATION_CREATE], 0, "Created nothing again")
+        self.assertEqual(json_product.reconciliation_counts[RECONCILIATION_UPDATE], 3, "Updated the part of the assembly and both children")
+
+        json_object[JSON_ELEMNT_CHILDREN].pop()
+        json_product = JsonProductAssembly().parse_from_json(json_object)
+        json_product.write_to_freecad(active_document)
+        self.assertEqual(json_product.reconciliation_counts[RECONCILIATION_UPDATE], 2, "Updated the remaining products")
+        self.assertEqual(json_product.reconciliation_counts[RECONCILIATION_DELETE], 1, "Deleted the removed child")
+        self.assertEquals(len(active_document.app_active_document.RootObjects), 4, "Found correct amount of root objects 2 objects plus 2 sheets")
+
+    def test_write_to_freecad_reconciliation_renamed_part(self):
+        self.create_Test_Part()
+
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("ProductAssemblyReconciliationRenamed")
+        json_object = json.loads(self.json_data)
+
+        json_product = JsonProductAssembly().parse_from_json(json_object)
+        json_product.write_to_freecad(active_document)
+
+        # Renaming the part changes its file name, while the product keeps its name
+        old_part_file_name = json_product.children[0].get_part_unique_name()
+        json_object[JSON_ELEMNT_CHILDREN][0][JSON_ELEMENT_PART_NAME] = "RenamedPlate"
+        json_product = JsonProductAssembly().parse_from_json(json_object)
+        new_part_file_name = json_product.children[0].get_part_unique_name()
+        shutil.copy(active_document.get_file_full_path(old_part_file_name), active_document.get_file_full_path(new_part_file_name))
+
+        json_product.write_to_freecad(active_document)
+        self.assertEqual(json_product.reconciliation_counts[RECONCILIATION_CREATE], 1, "Created the product of the renamed part again")
+        self.assertEqual(json_product.reconciliation_counts[RECONCILIATION_DELETE], 1, "Deleted the product of the old part")
+        self.assertEqual(json_product.reconciliation_counts[RECONCILIATION_UPDATE], 2, "Updated the other products")
+        self.assertEquals(len(active_document.app_active_document.RootObjects), 6, "Found correct amount of root objects 3 objects plus 3 sheets")
+
+        product_object = active_document.app_active_document.getObjectsByLabel(json_product.children[0].get_unique_name())[0]
+        self.assertEqual(os.path.basename(product_object.sourceFile), os.path.basename(active_document.get_file_full_path(new_part_file_name)),
+                         "Imports the file of the new name")
+
+    @patch("json_io.products.json_product.is_part_instancing_enabled", return_value=True)
+    def test_write_to_freecad_part_instancing(self, mock_instancing):
+        self.create_Test_Part()
+
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("ProductAssemblyInstancing")
+        json_object = json.loads(self.json_data)
+
+        json_product = JsonProductAssembly().parse_from_json(json_object)
+        json_product.write_to_freecad(active_document)
+
+        # all three products reference the same part, which is imported only once
+        links = [obj for obj in active_document.app_active_document.Objects if obj.TypeId == "App::Link"]
+        self.assertEquals(len(links), 3, "Placed every product as a link")
+        self.assertEquals(len({link.LinkedObject.Name for link in links}), 1, "All links share the same part")
+        self.assertEquals(len(active_document.app_active_document.Objects), 7, "Found 3 links, 3 sheets and the shared part")
+
+        product_child1_part_name = json_product.children[0].get_unique_name()
+        product_object = active_document.app_active_document.getObjectsByLabel(product_child1_part_name)[0]
+        self.assertEqual(product_object.Placement.Base.x, json_product.children[0].pos_x, "Placed the link")
+
+        # removing all products removes the shared part as well
+        json_object[JSON_ELEMNT_CHILDREN] = []
+        json_object.pop(JSON_ELEMENT_PART_UUID)
+        json_object.pop(JSON_ELEMENT_PART_NAME)
+        json_product = JsonProductAssembly().parse_from_json(json_object)
+        json_product.write_to_freecad(active_document)
+        self.assertEquals(len(active_document.app_active_document.Objects), 0, "Removed the links and the unused shared part")
+
     def test_get_products_of_active_document(self):
         active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("ProductAssemblyActiveDocuments")
         json_object = json.loads(self.json_data)
@@ -228,7 +309,7 @@ class TestJsonProductAssembly(AWorkingDirectoryTest):
 
         json_product.write_to_freecad(active_document)
 
-        part_list = []
+        part_list = JsonPartRegistry()
         root_assembly = JsonProductAssembly()
 
         root_assembly.read_from_freecad(active_document, self._WORKING_DIRECTORY, part_list)
@@ -240,3 +321,38 @@ class TestJsonProductAssembly(AWorkingDirectoryTest):
 
         self.assertJsonObjectsAlmostEqual(json_products_dict, json_object, msg="Found equal dictionaries (except rotation floats)",
                                           static_keys=[JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z])
+
+    def test_read_from_freecad_reads_child_documents_once(self):
+        self.create_Test_Part()
+
+        json_object = json.loads(self.json_data)
+        traverser = JsonProductAssemblyTreeTraverser(self._WORKING_DIRECTORY)
+        _, active_document = traverser.traverse_and_parse_from_json(json_object)
+
+        part_list = JsonPartRegistry()
+        child_cache = {}
+        root_assembly = JsonProductAssembly()
+        root_assembly.read_from_freecad(active_document, self._WORKING_DIRECTORY, part_list, child_cache=child_cache)
+
+        # the part of the assembly and both children are read from the same part document
+        self.assertEqual(len(root_assembly.children), 3, "Read all products")
+        self.assertEqual(list(child_cache.keys()), [PART_IDENTIFIER + BASEPLATE_UNIQ_NAME], "Read the part document only once")
+        self.assertEqual(len(part_list), 1, "Read the part only once")
+        self.assertEqual(part_list.deduplicated_reads, 2, "Both other products found the part in the registry")
+        self.assertEqual(len({child.get_unique_name() for child in root_assembly.children}), 3, "Read every product from its own sheet")
+
+    def test_is_partial_update_supported(self):
+        def update_all(app_document):
+            pass
+
+        def update_partial(app_document, partial=False):
+            pass
+
+        # The support is detected from the signature, not from errors raised by A2plus
+        with patch("json_io.products.json_product_assembly._partial_update_supported", None), \
+                patch("json_io.products.json_product_assembly.updateImportedParts", update_all):
+            self.assertFalse(is_partial_update_supported(), "Old A2plus updates all parts")
+
+        with patch("json_io.products.json_product_assembly._partial_update_supported", None), \
+                patch("json_io.products.json_product_assembly.updateImportedParts", update_partial):
+            self.assertTrue(is_partial_update_supported(), "Current A2plus updates selected parts")
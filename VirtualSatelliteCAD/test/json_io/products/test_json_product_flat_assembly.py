@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+from test.test_setup import AWorkingDirectoryTest
+from test.json_io.test_json_data import TEST_JSON_PRODUCT_ROOT, BASEPLATE_UNIQ_NAME
+from json_io.products.json_product_flat_assembly import JsonProductFlatAssembly
+from json_io.json_definitions import JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z, \
+    FLAT_IDENTIFIER, PART_IDENTIFIER
+from json_io.json_part_registry import JsonPartRegistry
+import json
+
+
+class TestJsonProductFlatAssembly(AWorkingDirectoryTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpDirectory("ProductFlatAssembly/")
+        cls._WORKING_DIRECTORY = cls.getDirectoryFullPath()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def test_write_to_freecad(self):
+        self.create_Test_Part()
+
+        json_object = json.loads(TEST_JSON_PRODUCT_ROOT)
+        flat_assembly = JsonProductFlatAssembly(self._WORKING_DIRECTORY)
+        json_product, active_document = flat_assembly.write_to_freecad(json_object)
+
+        self.assertTrue(active_document.app_active_document.Name.startswith(FLAT_IDENTIFIER), "Wrote a flat document")
+
+        objects = active_document.app_active_document.Objects
+        groups = [obj for obj in objects if obj.TypeId == "App::Part"]
+        links = [obj for obj in objects if obj.TypeId == "App::Link"]
+        self.assertEqual(len(groups), 2, "Wrote the root assembly and the sub assembly as groups")
+        self.assertEqual(len(links), 2, "Placed the part of the sub assembly and its child as links")
+        self.assertEqual(len({link.LinkedObject.Name for link in links}), 1, "Imported the part only once")
+
+        sub_assembly = active_document.app_active_document.getObjectsByLabel(json_product.children[0].get_unique_name())[0]
+        self.assertIn(sub_assembly, groups, "The sub assembly is a group")
+        self.assertEqual(sub_assembly.getParentGeoFeatureGroup().Label, json_product.get_unique_name(), "The sub assembly is part of the root")
+
+        # writing again replaces the content of the document
+        _, active_document = flat_assembly.write_to_freecad(json_object)
+        self.assertEqual(len(active_document.app_active_document.Objects), len(objects), "Wrote the same objects again")
+
+    def test_read_from_freecad(self):
+        self.create_Test_Part()
+
+        json_object = json.loads(TEST_JSON_PRODUCT_ROOT)
+        flat_assembly = JsonProductFlatAssembly(self._WORKING_DIRECTORY)
+        _, active_document = flat_assembly.write_to_freecad(json_object)
+
+        part_list = JsonPartRegistry()
+        root_assembly = flat_assembly.read_from_freecad(active_document, part_list)
+
+        self.assertEqual(len(part_list), 1, "Found correct number of 1 part")
+        self.assertEqual(part_list[0][0], PART_IDENTIFIER + BASEPLATE_UNIQ_NAME, "Found correct part")
+
+        json_products_dict = root_assembly.parse_to_json(isRoot=True)
+
+        self.assertJsonObjectsAlmostEqual(json_products_dict, json_object, msg="Found equal dictionaries (except rotation floats)",
+                                          static_keys=[JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z])
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+import json
+from unittest.mock import patch
+from test.test_setup import AWorkingDirectoryTest
+from json_io.json_importer import JsonImporter
+from json_io.json_change_plan import CHANGE_CREATE, CHANGE_UPDATE, CHANGE_DELETE, CHANGE_UNTOUCHED
+from json_io.json_definitions import JSON_PARTS, JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, JSON_ELEMENT_NAME, \
+    JSON_ELEMENT_UUID, JSON_ELEMENT_LENGTH_Y
+from test.json_io.test_json_data import TEST_JSON_FULL_VISCUBE
+
+
+class TestJsonChangePlan(AWorkingDirectoryTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpDirectory("ChangePlan/")
+        cls._WORKING_DIRECTORY = cls.getDirectoryFullPath()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def _get_child(self, json_product, name):
+        return [json_child for json_child in json_product[JSON_ELEMNT_CHILDREN] if json_child[JSON_ELEMENT_NAME] == name][0]
+
+    def _get_part(self, json_object, name):
+        return [json_part for json_part in json_object[JSON_PARTS] if json_part[JSON_ELEMENT_NAME] == name][0]
+
+    def test_plan_import(self):
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_root = json_object[JSON_PRODUCTS]
+        json_beam_structure = self._get_child(json_root, "BeamStructure")
+
+        change_plan = json_importer.plan_import(json_object)
+        self.assertEqual(change_plan.get_part_counts()[CHANGE_CREATE], 7, "All parts have to be created")
+        self.assertEqual(change_plan.get_assembly_counts()[CHANGE_CREATE], 2, "Root and BeamStructure have to be created")
+        self.assertEqual(change_plan.get_document_write_count(), 9, "Writes all documents")
+
+        json_importer.full_import(json_object)
+
+        change_plan = json_importer.plan_import(json_object)
+        self.assertTrue(change_plan.is_empty(), "Nothing to do after the import")
+
+        # A changed part deep in the tree updates all assemblies above it
+        self._get_part(json_object, "Left")[JSON_ELEMENT_LENGTH_Y] = 2.0
+        change_plan = json_importer.plan_import(json_object)
+        self.assertEqual(change_plan.get_part_counts()[CHANGE_UPDATE], 1, "Only the changed part gets updated")
+        self.assertEqual(change_plan.get_assembly_change(json_beam_structure[JSON_ELEMENT_UUID]), CHANGE_UPDATE, "Parent gets updated")
+        self.assertEqual(change_plan.get_assembly_change(json_root[JSON_ELEMENT_UUID]), CHANGE_UPDATE, "Root gets updated")
+
+        # A removed child only updates its own assembly
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_root = json_object[JSON_PRODUCTS]
+        json_root[JSON_ELEMNT_CHILDREN].remove(self._get_child(json_root, "Top"))
+        change_plan = json_importer.plan_import(json_object)
+        self.assertEqual(change_plan.get_assembly_change(json_beam_structure[JSON_ELEMENT_UUID]), CHANGE_UNTOUCHED, "Sub assembly untouched")
+        self.assertEqual(change_plan.get_assembly_change(json_root[JSON_ELEMENT_UUID]), CHANGE_UPDATE, "Root gets updated")
+
+        # A sub assembly without children is not an assembly anymore
+        self._get_child(json_root, "BeamStructure")[JSON_ELEMNT_CHILDREN] = []
+        change_plan = json_importer.plan_import(json_object)
+        self.assertEqual(change_plan.get_assembly_change(json_beam_structure[JSON_ELEMENT_UUID]), CHANGE_DELETE, "Assembly gets deleted")
+
+    def test_full_import_with_plan(self):
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+
+        change_plan = json_importer.plan_import(json_object)
+
+        # The confirmed plan is applied as is, the JSON is not preprocessed and planned again
+        with patch.object(JsonImporter, "_preprocess") as mock_preprocess:
+            json_importer.full_import(json_object, change_plan=change_plan)
+        mock_preprocess.assert_not_called()
+
+        self.assertTrue(json_importer.plan_import(json_object).is_empty(), "Applied the plan")
+
+    def test_plan_import_flat_assembly(self):
+        json_importer = JsonImporter(self._WORKING_DIRECTORY, flatten_assemblies=True)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_root = json_object[JSON_PRODUCTS]
+
+        change_plan = json_importer.plan_import(json_object)
+        self.assertEqual(change_plan.get_assembly_counts()[CHANGE_CREATE], 1, "Only the flat document has to be created")
+        self.assertEqual(change_plan.get_document_write_count(), 8, "Writes all parts and the flat document")
+
+        json_importer.full_import(json_object)
+
+        change_plan = json_importer.plan_import(json_object)
+        self.assertTrue(change_plan.is_empty(), "The flat document got recorded in the manifest")
+
+        # Any change within the tree updates the flat document
+        self._get_child(self._get_child(json_root, "BeamStructure"), "Left")[JSON_ELEMENT_NAME] = "LeftWall"
+        change_plan = json_importer.plan_import(json_object)
+        self.assertEqual(change_plan.get_assembly_change(json_root[JSON_ELEMENT_UUID]), CHANGE_UPDATE, "Flat document gets updated")
+
+    def test_flatten_assemblies_without_link_support(self):
+        with patch("json_io.json_importer.is_link_supported", return_value=False):
+            json_importer = JsonImporter(self._WORKING_DIRECTORY, flatten_assemblies=True)
+
+        self.assertFalse(json_importer.flatten_assemblies, "Writes one document per assembly instead")
+
+    def test_full_import_skips_unchanged_assemblies(self):
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+
+        json_importer.full_import(json_object)
+        _, json_product, active_document = json_importer.full_import(json_object)
+
+        self.assertEqual(len(json_product.children), 5, "Correct amount of children")
+        self.assertEqual(len(active_document.app_active_document.RootObjects), 10, "Root got opened from disk unchanged")
@@ -29,7 +29,7 @@ from json_io.json_importer import JsonImporter
 from json_io.json_exporter import JsonExporter
 from test.json_io.test_json_data import TEST_JSON_FULL_VISCUBE, TEST_JSON_FULL_GEOMETRY, TEST_JSON_FULL_NONE_SHAPE_ASSEMBLY
 from json_io.json_definitions import JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, JSON_ELEMENT_NAME, \
-    JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z, JSON_ELEMENT_STL_PATH, JSON_PARTS
+    JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z, JSON_ELEMENT_STL_PATH, JSON_PARTS, JSON_ELEMENT_COLOR
 import json
 from module.environment import Environment
 import os
@@ -74,6 +74,24 @@ class TestJsonExporter(AWorkingDirectoryTest):
         self.assertAlmostEqual(exported_child[JSON_ELEMENT_ROT_Y], json_child[JSON_ELEMENT_ROT_Y], msg="Rotation Y equal")
         self.assertAlmostEqual(exported_child[JSON_ELEMENT_ROT_Z], json_child[JSON_ELEMENT_ROT_Z], msg="Rotation Z equal")
 
+    def test_full_export_merged_parts(self):
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+
+        # Give the part "Top" the same color as the part "Plate", thus both share one part document
+        plate = [part for part in json_object[JSON_PARTS] if part[JSON_ELEMENT_NAME] == "Plate"][0]
+        top = [part for part in json_object[JSON_PARTS] if part[JSON_ELEMENT_NAME] == "Top"][0]
+        top[JSON_ELEMENT_COLOR] = plate[JSON_ELEMENT_COLOR]
+
+        json_importer = JsonImporter(self._WORKING_DIRECTORY, merge_identical_parts=True)
+        _, _, active_document = json_importer.full_import(json_object)
+
+        json_exporter = JsonExporter(self._WORKING_DIRECTORY)
+        exported_json = json_exporter.full_export(active_document)
+
+        # The export still hands back the part each product references in Virtual Satellite
+        static_keys = [JSON_ELEMENT_ROT_X, JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z]
+        self.assertJsonObjectsAlmostEqual(exported_json, json_object, [], "JSON in and out equal each other", static_keys)
+
     def test_full_export_shape_none(self):
         json_importer = JsonImporter(self._WORKING_DIRECTORY)
         json_object = json.loads(TEST_JSON_FULL_NONE_SHAPE_ASSEMBLY)
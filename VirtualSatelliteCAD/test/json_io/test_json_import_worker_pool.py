@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+import os
+import json
+import FreeCAD
+import FreeCADGui
+from test.test_setup import AWorkingDirectoryTest
+from json_io.json_import_worker_pool import JsonImportWorkerPool
+from json_io.json_importer import JsonImporter
+from json_io.json_definitions import JSON_PARTS, JSON_ELEMENT_UUID
+from freecad.active_document import FREECAD_FILE_EXTENSION
+from test.json_io.test_json_data import TEST_JSON_FULL_VISCUBE, TEST_JSON_PART_BOX
+
+App = FreeCAD
+Gui = FreeCADGui
+
+
+class TestJsonImportWorkerPool(AWorkingDirectoryTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpDirectory("ImportWorkerPool/")
+        cls._WORKING_DIRECTORY = cls.getDirectoryFullPath()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def test_split_into_chunks(self):
+        worker_pool = JsonImportWorkerPool(self._WORKING_DIRECTORY, 3)
+
+        chunks = worker_pool._split_into_chunks(list(range(7)))
+        self.assertEqual(chunks, [[0, 3, 6], [1, 4], [2, 5]], "Items are distributed round robin")
+
+        chunks = worker_pool._split_into_chunks([0, 1])
+        self.assertEqual(chunks, [[0], [1]], "No worker without items")
+
+    def test_run_without_freecad_cmd(self):
+        worker_pool = JsonImportWorkerPool(self._WORKING_DIRECTORY, 2, "/not/existing/FreeCADCmd")
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+
+        results = worker_pool.create_or_update_parts(json_object[JSON_PARTS])
+        self.assertEqual(results, {}, "Failed workers hand back no results")
+
+    def test_create_or_update_parts_falls_back(self):
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_importer = JsonImporter(self._WORKING_DIRECTORY, worker_count=2)
+
+        # Parts that got not written by a worker are written by the importer itself
+        part_file_names = json_importer.create_or_update_parts(json_object[JSON_PARTS])
+
+        self.assertEqual(len(part_file_names), 7, "Wrote 7 parts")
+        for part_file_name in part_file_names.values():
+            test_file_name = self._WORKING_DIRECTORY + part_file_name + FREECAD_FILE_EXTENSION
+            self.assertTrue(os.path.isfile(test_file_name), "File exists on drive")
+
+    def test_write_part_colors(self):
+        json_object = json.loads(TEST_JSON_PART_BOX)
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        part_file_name = json_importer.create_or_update_part(json_object)
+
+        # The color of a part written by a headless worker gets written afterwards
+        json_object["color"] = 0
+        json_importer.write_part_colors([json_object], {json_object[JSON_ELEMENT_UUID]: part_file_name})
+
+        App.open(self._WORKING_DIRECTORY + part_file_name + FREECAD_FILE_EXTENSION)
+        self.assertEquals(Gui.ActiveDocument.getObject("Box").ShapeColor, (0.0, 0.0, 0.0, 0.0), "Wrote the color of the part")
@@ -27,7 +27,7 @@
 import os
 import json
 
-from json_io.json_importer import JsonImporter
+from json_io.json_importer import JsonImporter, PARTS_CREATED, PARTS_UPDATED, PARTS_SKIPPED
 
 import FreeCAD
 import FreeCADGui
@@ -37,7 +37,8 @@ from module.environment import Environment
 from json_io.json_definitions import JSON_ELEMENT_STL_PATH, PART_IDENTIFIER, PRODUCT_IDENTIFIER, \
     JSON_PARTS, JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, JSON_ELEMENT_ROT_X,\
     JSON_ELEMENT_ROT_Y, JSON_ELEMENT_ROT_Z, JSON_ELEMENT_POS_X,\
-    JSON_ELEMENT_POS_Y, JSON_ELEMENT_POS_Z, JSON_ELEMENT_LENGTH_Y
+    JSON_ELEMENT_POS_Y, JSON_ELEMENT_POS_Z, JSON_ELEMENT_LENGTH_Y, JSON_ELEMENT_NAME, JSON_ELEMENT_UUID, JSON_ELEMENT_PART_UUID
+from json_io.json_change_plan import CHANGE_UNTOUCHED, CHANGE_UPDATE
 from test.json_io.test_json_data import TEST_JSON_FULL_VISCUBE, TEST_JSON_FULL_NONE_SHAPE, TEST_JSON_FULL_NONE_SHAPE_ASSEMBLY, \
     TEST_JSON_FULL_GEOMETRY, TEST_JSON_PART_BOX, TEST_JSON_PART_NONE, BEAM_UNIQ_NAME, BEAMSTRUCTURE_UNIQ_NAME, NONE_UNIQ_NAME
 from json_io.json_spread_sheet import FREECAD_PART_SHEET_NAME, JsonSpreadSheet
@@ -484,3 +485,76 @@ class TestJsonImporter(AWorkingDirectoryTest):
         # Check that the right number of children and root objects got created
         self.assertEquals(len(json_product2.children), 4, "Correct amount of children")
         self.assertEquals(len(active_document2.app_active_document.RootObjects), 8, "Found correct amount of root objects 4 plus 4 sheets")
+
+    def test_full_import_again_skips_unchanged_parts(self):
+        """
+        Importing the same file again should not write the unchanged parts again
+        """
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+
+        # First import, the parts may already exist from other tests
+        json_importer.full_import(json_object)
+
+        # Second import without changes
+        part_file_names, _, _ = json_importer.full_import(json_object)
+        self.assertEqual(len(part_file_names), 7, "Found 7 files")
+        self.assertEqual(json_importer.part_statistics[PARTS_SKIPPED], 7, "Skipped all unchanged parts")
+
+        # Third import with one changed part
+        json_object[JSON_PARTS][0][JSON_ELEMENT_LENGTH_Y] = 30
+        part_file_names, _, _ = json_importer.full_import(json_object)
+        self.assertEqual(len(part_file_names), 7, "Found 7 files")
+        self.assertEqual(json_importer.part_statistics[PARTS_CREATED], 0, "Created no part")
+        self.assertEqual(json_importer.part_statistics[PARTS_UPDATED], 1, "Updated the changed part")
+        self.assertEqual(json_importer.part_statistics[PARTS_SKIPPED], 6, "Skipped the unchanged parts")
+
+    def test_full_import_again_tracks_changed_files(self):
+        """
+        Only the files written during an import should be read in again by the assemblies
+        """
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_importer.full_import(json_object)
+
+        json_importer.full_import(json_object)
+        self.assertEqual(json_importer.changed_file_names, set(), "Wrote no file again")
+
+        json_object[JSON_PARTS][0][JSON_ELEMENT_LENGTH_Y] = 40
+        part_file_names, _, _ = json_importer.full_import(json_object)
+        self.assertIn(part_file_names[0], json_importer.changed_file_names, "Tracked the changed part")
+        for part_file_name in part_file_names[1:]:
+            self.assertNotIn(part_file_name, json_importer.changed_file_names, "Did not track the unchanged parts")
+
+    def test_full_import_subtree(self):
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        beam_structure = [child for child in json_object[JSON_PRODUCTS][JSON_ELEMNT_CHILDREN] if child[JSON_ELEMENT_NAME] == "BeamStructure"][0]
+
+        part_file_names, json_product, active_document = json_importer.full_import(json_object, beam_structure[JSON_ELEMENT_UUID])
+
+        self.assertEqual(len(part_file_names), 3, "Only imported the parts of the subtree")
+        self.assertEqual(json_product.name, "BeamStructure", "Subtree got imported as root")
+        self.assertEqual(active_document.app_active_document.Name, json_product.get_product_unique_name(), "Opened the subtree assembly")
+
+    def test_full_import_subtree_updates_parents_later(self):
+        """
+        The assemblies above an imported subtree import its document, thus the next import has to update them
+        """
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_importer.full_import(json_object)
+
+        # Change a part of the subtree and only import the subtree
+        beam_structure = [child for child in json_object[JSON_PRODUCTS][JSON_ELEMNT_CHILDREN] if child[JSON_ELEMENT_NAME] == "BeamStructure"][0]
+        beam_part_uuid = [child for child in beam_structure[JSON_ELEMNT_CHILDREN] if JSON_ELEMENT_PART_UUID in child][0][JSON_ELEMENT_PART_UUID]
+        beam_part = [json_part for json_part in json_object[JSON_PARTS] if json_part[JSON_ELEMENT_UUID] == beam_part_uuid][0]
+        beam_part[JSON_ELEMENT_LENGTH_Y] = 40
+        json_importer.full_import(json_object, beam_structure[JSON_ELEMENT_UUID])
+
+        change_plan = json_importer.plan_import(json_object)
+        self.assertEqual(change_plan.get_assembly_change(beam_structure[JSON_ELEMENT_UUID]), CHANGE_UNTOUCHED, "Subtree is up to date")
+        self.assertEqual(change_plan.get_assembly_change(json_object[JSON_PRODUCTS][JSON_ELEMENT_UUID]), CHANGE_UPDATE, "Parent gets updated")
+
+        json_importer.full_import(json_object)
+        self.assertTrue(json_importer.plan_import(json_object).is_empty(), "Parent is up to date after the full import")
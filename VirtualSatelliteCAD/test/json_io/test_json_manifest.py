@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+import json
+from test.test_setup import AWorkingDirectoryTest
+from json_io.json_manifest import JsonManifest, get_json_hash
+from json_io.json_importer import JsonImporter
+from json_io.json_definitions import PART_IDENTIFIER, JSON_ELEMENT_LENGTH_X
+from test.json_io.test_json_data import TEST_JSON_PART_BOX, BEAM_UNIQ_NAME
+
+
+class TestJsonManifest(AWorkingDirectoryTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpDirectory("Manifest/")
+        cls._WORKING_DIRECTORY = cls.getDirectoryFullPath()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def test_get_json_hash(self):
+        json_object = json.loads(TEST_JSON_PART_BOX)
+        json_object_reordered = dict(reversed(list(json_object.items())))
+
+        self.assertEqual(get_json_hash(json_object), get_json_hash(json_object_reordered), "Hash does not depend on the key order")
+
+        json_object_reordered[JSON_ELEMENT_LENGTH_X] = 2.0
+        self.assertNotEqual(get_json_hash(json_object), get_json_hash(json_object_reordered), "Hash depends on the values")
+
+    def test_is_part_unchanged(self):
+        json_object = json.loads(TEST_JSON_PART_BOX)
+        part_file_name = PART_IDENTIFIER + BEAM_UNIQ_NAME
+
+        manifest = JsonManifest(self._WORKING_DIRECTORY).load()
+        self.assertFalse(manifest.is_part_unchanged(json_object, part_file_name), "Unknown parts are never unchanged")
+
+        JsonImporter(self._WORKING_DIRECTORY).create_or_update_part(json_object)
+        manifest.update_part(json_object, part_file_name)
+        manifest.save()
+
+        manifest = JsonManifest(self._WORKING_DIRECTORY).load()
+        self.assertTrue(manifest.is_part_unchanged(json_object, part_file_name), "Stored part is unchanged")
+
+        json_object[JSON_ELEMENT_LENGTH_X] = 2.0
+        self.assertFalse(manifest.is_part_unchanged(json_object, part_file_name), "Changed part json is detected")
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+import json
+import unittest
+from copy import deepcopy
+from json_io.json_preprocessor import JsonPreprocessor
+from json_io.json_definitions import JSON_PARTS, JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, \
+    JSON_ELEMENT_UUID, JSON_ELEMENT_NAME, JSON_ELEMENT_COLOR, JSON_ELEMENT_PART_UUID, JSON_ELEMENT_PART_NAME, \
+    JSON_ELEMENT_PART_FILE_NAME, PART_IDENTIFIER, get_part_name_uuid
+from test.json_io.test_json_data import TEST_JSON_FULL_VISCUBE
+
+
+class TestJsonPreprocessor(unittest.TestCase):
+
+    def test_deduplicate_parts_by_uuid(self):
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_object[JSON_PARTS] += deepcopy(json_object[JSON_PARTS][0:2])
+
+        preprocessor = JsonPreprocessor()
+        deduplicated_json_object = preprocessor.deduplicate_parts(json_object)
+
+        self.assertEqual(len(deduplicated_json_object[JSON_PARTS]), 7, "Removed the parts with the same uuid")
+        self.assertEqual(preprocessor.removed_by_uuid, 2, "Counted the removed parts")
+        self.assertEqual(preprocessor.removed_by_geometry, 0, "Identical geometries are not merged by default")
+        self.assertEqual(len(json_object[JSON_PARTS]), 9, "The given json object is untouched")
+
+    def test_deduplicate_parts_by_geometry(self):
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+
+        # Give the part "Top" the same color as the part "Plate", thus they look the same
+        plate = [part for part in json_object[JSON_PARTS] if part[JSON_ELEMENT_NAME] == "Plate"][0]
+        top = [part for part in json_object[JSON_PARTS] if part[JSON_ELEMENT_NAME] == "Top"][0]
+        top[JSON_ELEMENT_COLOR] = plate[JSON_ELEMENT_COLOR]
+
+        preprocessor = JsonPreprocessor()
+        deduplicated_json_object = preprocessor.deduplicate_parts(json_object, merge_identical_geometry=True)
+
+        self.assertEqual(len(deduplicated_json_object[JSON_PARTS]), 6, "Merged the identical parts")
+        self.assertEqual(preprocessor.removed_by_geometry, 1, "Counted the merged part")
+
+        # The product "Top" now imports the document of the part "Plate", but keeps its own part for the export
+        top_product = [child for child in deduplicated_json_object[JSON_PRODUCTS][JSON_ELEMNT_CHILDREN] if child[JSON_ELEMENT_NAME] == "Top"][0]
+        self.assertEqual(top_product[JSON_ELEMENT_PART_FILE_NAME], PART_IDENTIFIER + get_part_name_uuid(plate), "Imports the kept part")
+        self.assertEqual(top_product[JSON_ELEMENT_PART_UUID], top[JSON_ELEMENT_UUID], "Kept the uuid of the part")
+        self.assertEqual(top_product[JSON_ELEMENT_PART_NAME], top[JSON_ELEMENT_NAME], "Kept the name of the part")
+
+        top_product = [child for child in json_object[JSON_PRODUCTS][JSON_ELEMNT_CHILDREN] if child[JSON_ELEMENT_NAME] == "Top"][0]
+        self.assertNotIn(JSON_ELEMENT_PART_FILE_NAME, top_product, "The given json object is untouched")
+
+    def test_prune_to_product(self):
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        beam_structure = [child for child in json_object[JSON_PRODUCTS][JSON_ELEMNT_CHILDREN] if child[JSON_ELEMENT_NAME] == "BeamStructure"][0]
+
+        pruned_json_object = JsonPreprocessor().prune_to_product(json_object, beam_structure[JSON_ELEMENT_UUID])
+
+        self.assertEqual(pruned_json_object[JSON_PRODUCTS][JSON_ELEMENT_NAME], "BeamStructure", "Subtree is the new root")
+        self.assertEqual(sorted([part[JSON_ELEMENT_NAME] for part in pruned_json_object[JSON_PARTS]]), ["BeamStructure", "Left", "Right"],
+                         "Only kept the parts referenced by the subtree")
+        self.assertEqual(len(json_object[JSON_PARTS]), 7, "The given json object is untouched")
+
+    def test_get_ancestor_uuids(self):
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        root_uuid = json_object[JSON_PRODUCTS][JSON_ELEMENT_UUID]
+        beam_structure = [child for child in json_object[JSON_PRODUCTS][JSON_ELEMNT_CHILDREN] if child[JSON_ELEMENT_NAME] == "BeamStructure"][0]
+        beam = beam_structure[JSON_ELEMNT_CHILDREN][0]
+
+        preprocessor = JsonPreprocessor()
+        self.assertEqual(preprocessor.get_ancestor_uuids(json_object, beam[JSON_ELEMENT_UUID]), [root_uuid, beam_structure[JSON_ELEMENT_UUID]],
+                         "Found the chain from the root")
+        self.assertEqual(preprocessor.get_ancestor_uuids(json_object, root_uuid), [], "The root has no ancestors")
+        self.assertEqual(preprocessor.get_ancestor_uuids(json_object, "unknown-uuid"), [], "Unknown products have no ancestors")
+
+    def test_prune_to_unknown_product(self):
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        top = [child for child in json_object[JSON_PRODUCTS][JSON_ELEMNT_CHILDREN] if child[JSON_ELEMENT_NAME] == "Top"][0]
+
+        self.assertIsNone(JsonPreprocessor().prune_to_product(json_object, "unknown-uuid"), "There is no such product")
+        self.assertIsNone(JsonPreprocessor().prune_to_product(json_object, top[JSON_ELEMENT_UUID]), "A product without children is no assembly")
@@ -27,10 +27,11 @@
 
 import FreeCAD
 import FreeCADGui
-from freecad.active_document import ActiveDocument
+from freecad.active_document import ActiveDocument, BulkWrite
 from test.test_setup import AWorkingDirectoryTest
-from json_io.json_spread_sheet import JsonSpreadSheet
+from json_io.json_spread_sheet import JsonSpreadSheet, is_cell_content_equal
 import json
+from unittest.mock import patch
 from json_io.parts.json_part import AJsonPart
 
 App = FreeCAD
@@ -102,6 +103,95 @@ class TestJsonSpreadSheet(AWorkingDirectoryTest):
 
         self.assertEquals(attribute, 300, "Got correct value")
 
+    def test_read_sheet_attributes_from_freecad(self):
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("PartSheetTest_ReadAll")
+        json_part = AJsonPart().parse_from_json(self._json_test_object)
+        json_spread_sheet = JsonSpreadSheet(json_part)
+
+        json_spread_sheet.write_to_freecad(active_document)
+
+        freecad_sheet = active_document.app_active_document.getObject(json_spread_sheet.create_sheet_name())
+
+        sheet_attributes = json_spread_sheet.read_sheet_attributes_from_freecad(freecad_sheet)
+
+        self.assertEquals(list(sheet_attributes.keys()), list(json_part.attributes.keys()), "Read all attributes")
+        self.assertEquals(sheet_attributes["name"], "Beam", "Got correct value")
+        self.assertEquals(sheet_attributes["height"], 300, "Got correct value")
+
+    def test_write_to_freecad_existing_sheet(self):
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("PartSheetTest_WriteAgain")
+        json_part = AJsonPart().parse_from_json(self._json_test_object)
+        json_spread_sheet = JsonSpreadSheet(json_part)
+
+        json_spread_sheet.write_to_freecad(active_document)
+
+        json_part.height = 400.0
+        with patch.object(JsonSpreadSheet, "_read_sheet_contents", autospec=True, side_effect=JsonSpreadSheet._read_sheet_contents) as mock_read:
+            json_spread_sheet.write_to_freecad(active_document)
+        active_document.app_active_document.recompute()
+        mock_read.assert_called_once()
+
+        freecad_sheet = active_document.app_active_document.getObject(json_spread_sheet.create_sheet_name())
+        self.assertEquals(len(active_document.app_active_document.RootObjects), 1, "Reused the existing sheet")
+        self.assertEquals(freecad_sheet.getContents("A1"), "Virtual Satellite Part Data", "Kept the header")
+        self.assertEquals(json_spread_sheet.read_sheet_attribute_from_freecad(freecad_sheet, "height"), 400, "Wrote the changed value")
+        self.assertEquals(json_spread_sheet.read_sheet_attribute_from_freecad(freecad_sheet, "width"), 10, "Kept the unchanged value")
+
+    def test_write_to_freecad_unchanged_sheet(self):
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("PartSheetTest_Unchanged")
+        json_part = AJsonPart().parse_from_json(self._json_test_object)
+        json_spread_sheet = JsonSpreadSheet(json_part)
+
+        json_spread_sheet.write_to_freecad(active_document)
+        active_document.app_active_document.recompute()
+
+        # Writing the same part again changes no cell, the owning object still needs its recompute
+        with BulkWrite() as bulk_write:
+            json_spread_sheet.write_to_freecad(active_document)
+
+            self.assertEqual(bulk_write.deferred_count, 1, "Requested the recompute of the document")
+
+    def test_is_cell_content_equal(self):
+        self.assertTrue(is_cell_content_equal("Beam", "Beam"), "Same text")
+        self.assertTrue(is_cell_content_equal("'Beam", "Beam"), "Text marked by FreeCAD")
+        self.assertTrue(is_cell_content_equal("400", "400.0"), "Number normalised by FreeCAD")
+        self.assertTrue(is_cell_content_equal("", ""), "Empty cell")
+        self.assertFalse(is_cell_content_equal("400", "300.0"), "Changed number")
+        self.assertFalse(is_cell_content_equal("Beam", ""), "Cleared cell")
+
+    @patch("json_io.json_spread_sheet.is_property_storage_enabled", return_value=True)
+    def test_write_to_freecad_property_storage(self, mock_property_storage):
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("PartSheetTest_Property")
+        json_part = AJsonPart().parse_from_json(self._json_test_object)
+        json_spread_sheet = JsonSpreadSheet(json_part)
+
+        json_spread_sheet.write_to_freecad(active_document)
+
+        freecad_sheet = active_document.app_active_document.getObject(json_spread_sheet.create_sheet_name())
+        self.assertNotEqual(freecad_sheet.TypeId, "Spreadsheet::Sheet", "Stored the attributes without a spreadsheet")
+        self.assertTrue(json_spread_sheet.is_sheet_attached(active_document), "The attributes are attached")
+        self.assertEquals(float(json_spread_sheet.read_sheet_attribute(active_document, "height")), 300, "Got correct value")
+
+        sheet_attributes = json_spread_sheet.read_sheet_attributes_from_freecad(freecad_sheet)
+        self.assertEquals(list(sheet_attributes.keys()), list(json_part.attributes.keys()), "Read all attributes")
+        self.assertEquals(sheet_attributes["name"], "Beam", "Got correct value")
+
+    def test_write_to_freecad_migrate_to_property_storage(self):
+        active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("PartSheetTest_Migrate")
+        json_part = AJsonPart().parse_from_json(self._json_test_object)
+        json_spread_sheet = JsonSpreadSheet(json_part)
+
+        json_spread_sheet.write_to_freecad(active_document)
+
+        # A document with a spreadsheet gets migrated when it is written with the property storage
+        with patch("json_io.json_spread_sheet.is_property_storage_enabled", return_value=True):
+            json_spread_sheet.write_to_freecad(active_document)
+
+        freecad_sheet = active_document.app_active_document.getObject(json_spread_sheet.create_sheet_name())
+        self.assertEquals(len(active_document.app_active_document.RootObjects), 1, "Replaced the spreadsheet")
+        self.assertNotEqual(freecad_sheet.TypeId, "Spreadsheet::Sheet", "Stored the attributes without a spreadsheet")
+        self.assertEquals(float(json_spread_sheet.read_sheet_attribute_from_freecad(freecad_sheet, "height")), 300, "Got correct value")
+
     def test_is_sheet_attached(self):
         active_document = ActiveDocument(self._WORKING_DIRECTORY).open_set_and_get_document("PartSheetTest_Attached")
         json_part = AJsonPart().parse_from_json(self._json_test_object)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+import json
+import os
+from unittest.mock import patch
+from test.test_setup import AWorkingDirectoryTest
+from test.json_io.test_json_data import TEST_JSON_FULL_VISCUBE
+from json_io.json_uuid_index import JsonUuidIndex, INDEX_KIND_PART, INDEX_KIND_ASSEMBLY, INDEX_FILE_NAME, \
+    INDEX_OBJECT_NAME, INDEX_IMPORT_TIME
+from json_io.json_importer import JsonImporter
+from json_io.json_definitions import PART_IDENTIFIER, JSON_PARTS, JSON_PRODUCTS, JSON_ELEMNT_CHILDREN, \
+    JSON_ELEMENT_NAME, JSON_ELEMENT_UUID, JSON_ELEMENT_PART_NAME, JSON_ELEMENT_PART_UUID, get_part_name_uuid
+from freecad.active_document import FREECAD_FILE_EXTENSION
+
+
+class TestJsonUuidIndex(AWorkingDirectoryTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpDirectory("UuidIndex/")
+        cls._WORKING_DIRECTORY = cls.getDirectoryFullPath()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def test_update_and_get_entry(self):
+        with JsonUuidIndex(self._WORKING_DIRECTORY) as uuid_index:
+            self.assertIsNone(uuid_index.get_entry("uuid-1", INDEX_KIND_PART), "Unknown uuid has no entry")
+
+            uuid_index.update("uuid-1", INDEX_KIND_PART, "part_Beam_uuid___1", "Box", imported=True)
+            uuid_index.update("uuid-1", INDEX_KIND_ASSEMBLY, "assembly_Beam_uuid___1")
+
+        # The index is persisted in the working directory
+        with JsonUuidIndex(self._WORKING_DIRECTORY) as uuid_index:
+            entry = uuid_index.get_entry("uuid-1", INDEX_KIND_PART)
+            self.assertEqual(entry[INDEX_FILE_NAME], "part_Beam_uuid___1", "Stored the file name")
+            self.assertEqual(entry[INDEX_OBJECT_NAME], "Box", "Stored the object name")
+            self.assertIsNotNone(entry[INDEX_IMPORT_TIME], "Stored the import time")
+            self.assertEqual(uuid_index.get_file_name("uuid-1", INDEX_KIND_ASSEMBLY), "assembly_Beam_uuid___1", "Kinds are separate")
+
+            # Values which are not given are kept
+            uuid_index.update("uuid-1", INDEX_KIND_PART, "part_Plate_uuid___1")
+            entry = uuid_index.get_entry("uuid-1", INDEX_KIND_PART)
+            self.assertEqual(entry[INDEX_FILE_NAME], "part_Plate_uuid___1", "Updated the file name")
+            self.assertEqual(entry[INDEX_OBJECT_NAME], "Box", "Kept the object name")
+
+            uuid_index.remove("uuid-1", INDEX_KIND_PART)
+            self.assertIsNone(uuid_index.get_entry("uuid-1", INDEX_KIND_PART), "Removed the entry")
+            uuid_index.remove("uuid-1", INDEX_KIND_ASSEMBLY)
+
+    def test_find_orphaned_and_missing_files(self):
+        orphan_file_name = PART_IDENTIFIER + "Orphan_uuid___2"
+        with open(os.path.join(self._WORKING_DIRECTORY, orphan_file_name + FREECAD_FILE_EXTENSION), "w") as file:
+            file.write("")
+
+        with JsonUuidIndex(self._WORKING_DIRECTORY) as uuid_index:
+            self.assertIn(orphan_file_name, uuid_index.find_orphaned_files(), "Found the unknown document")
+
+            uuid_index.update("uuid-2", INDEX_KIND_PART, orphan_file_name)
+            uuid_index.update("uuid-3", INDEX_KIND_PART, PART_IDENTIFIER + "Missing_uuid___3")
+            self.assertNotIn(orphan_file_name, uuid_index.find_orphaned_files(), "The document is known now")
+            self.assertEqual(uuid_index.find_missing_files(), [("uuid-3", INDEX_KIND_PART)], "Found the entry without document")
+
+            uuid_index.remove("uuid-2", INDEX_KIND_PART)
+            uuid_index.remove("uuid-3", INDEX_KIND_PART)
+        os.remove(os.path.join(self._WORKING_DIRECTORY, orphan_file_name + FREECAD_FILE_EXTENSION))
+
+    def test_set_and_get_references(self):
+        with JsonUuidIndex(self._WORKING_DIRECTORY) as uuid_index:
+            uuid_index.set_references("assembly_Root_uuid___1", ["part_Beam_uuid___2", "assembly_Sub_uuid___3"])
+            uuid_index.set_references("assembly_Sub_uuid___3", ["part_Beam_uuid___2", "part_Plate_uuid___4"])
+
+        with JsonUuidIndex(self._WORKING_DIRECTORY) as uuid_index:
+            self.assertEqual(uuid_index.get_referenced_file_names(),
+                             {"part_Beam_uuid___2", "assembly_Sub_uuid___3", "part_Plate_uuid___4"}, "Stored the references")
+            self.assertEqual(uuid_index.get_referenced_file_names(excluded_file_names={"assembly_Sub_uuid___3"}),
+                             {"part_Beam_uuid___2", "assembly_Sub_uuid___3"}, "Left out the references of the excluded document")
+
+            # Writing a document again replaces its references
+            uuid_index.set_references("assembly_Sub_uuid___3", ["part_Plate_uuid___4"])
+            uuid_index.remove_references("assembly_Root_uuid___1")
+            self.assertEqual(uuid_index.get_referenced_file_names(), {"part_Plate_uuid___4"}, "Replaced the references")
+
+            uuid_index.remove_references("assembly_Sub_uuid___3")
+
+    def _rename_part(self, json_product, part_uuid, part_name):
+        if json_product.get(JSON_ELEMENT_PART_UUID) == part_uuid:
+            json_product[JSON_ELEMENT_PART_NAME] = part_name
+        for json_child in json_product.get(JSON_ELEMNT_CHILDREN, []):
+            self._rename_part(json_child, part_uuid, part_name)
+
+    def test_full_import_renamed_part(self):
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_importer.full_import(json_object)
+
+        json_part = json_object[JSON_PARTS][0]
+        old_part_file_name = PART_IDENTIFIER + get_part_name_uuid(json_part)
+        with JsonUuidIndex(self._WORKING_DIRECTORY) as uuid_index:
+            self.assertEqual(uuid_index.get_file_name(json_part[JSON_ELEMENT_UUID], INDEX_KIND_PART), old_part_file_name, "Indexed the part")
+
+        # Renaming the part in Virtual Satellite changes its file name but not its uuid
+        json_part[JSON_ELEMENT_NAME] = "Renamed"
+        self._rename_part(json_object[JSON_PRODUCTS], json_part[JSON_ELEMENT_UUID], "Renamed")
+        json_importer.full_import(json_object)
+
+        new_part_file_name = PART_IDENTIFIER + get_part_name_uuid(json_part)
+        self.assertFalse(os.path.isfile(os.path.join(self._WORKING_DIRECTORY, old_part_file_name + FREECAD_FILE_EXTENSION)),
+                         "Deleted the document of the old name")
+        with JsonUuidIndex(self._WORKING_DIRECTORY) as uuid_index:
+            self.assertEqual(uuid_index.get_file_name(json_part[JSON_ELEMENT_UUID], INDEX_KIND_PART), new_part_file_name, "Indexed the new name")
+            self.assertNotIn(old_part_file_name, uuid_index.find_orphaned_files(), "Left no orphaned document")
+
+        with JsonUuidIndex(self._WORKING_DIRECTORY) as uuid_index:
+            referenced_file_names = uuid_index.get_referenced_file_names()
+        self.assertIn(new_part_file_name, referenced_file_names, "The assemblies import the document of the new name")
+        self.assertNotIn(old_part_file_name, referenced_file_names, "No assembly imports the document of the old name")
+
+    def test_full_import_renamed_part_still_imported(self):
+        json_importer = JsonImporter(self._WORKING_DIRECTORY)
+        json_object = json.loads(TEST_JSON_FULL_VISCUBE)
+        json_importer.full_import(json_object)
+
+        json_part = json_object[JSON_PARTS][0]
+        old_part_file_name = PART_IDENTIFIER + get_part_name_uuid(json_part)
+
+        # An assembly outside of an imported subtree may still import the document of the old name
+        json_part[JSON_ELEMENT_NAME] = "RenamedAgain"
+        self._rename_part(json_object[JSON_PRODUCTS], json_part[JSON_ELEMENT_UUID], "RenamedAgain")
+        with patch.object(JsonUuidIndex, "get_referenced_file_names", return_value={old_part_file_name}):
+            json_importer.full_import(json_object)
+
+        self.assertTrue(os.path.isfile(os.path.join(self._WORKING_DIRECTORY, old_part_file_name + FREECAD_FILE_EXTENSION)),
+                        "Kept the document of the old name")
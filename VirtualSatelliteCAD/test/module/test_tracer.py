@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+
+import json
+import os
+import threading
+import time
+from module.tracer import Tracer, trace_span, SPAN_CPU_MS
+from test.test_setup import AWorkingDirectoryTest
+
+
+class TestTracer(AWorkingDirectoryTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpDirectory("Tracer/")
+        cls._WORKING_DIRECTORY = cls.getDirectoryFullPath()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def test_no_tracer(self):
+        self.assertIsNone(Tracer.get_current_tracer(), "No tracer is active")
+
+        with trace_span("phase") as span:
+            span.add_count("objects")
+
+    def test_write_nested_spans(self):
+        with Tracer(self._WORKING_DIRECTORY) as tracer:
+            with trace_span("outer", objects=2) as outer_span:
+                with trace_span("inner"):
+                    pass
+                with trace_span("inner"):
+                    pass
+                outer_span.add_count("objects", 3)
+
+        self.assertIsNone(Tracer.get_current_tracer(), "Tracer got deactivated")
+        self.assertTrue(os.path.isfile(tracer.trace_file_path), "Trace file got written")
+
+        self.assertEqual(tracer.summary["inner"][0], 2, "Counted both inner spans")
+        self.assertEqual(tracer.summary["outer"][0], 1, "Counted the outer span")
+
+        # The chrome trace format accepts the array without the closing bracket
+        with open(tracer.trace_file_path, "r") as trace_file:
+            events = json.loads(trace_file.read().rstrip(",\n") + "]")
+
+        self.assertEqual([event["name"] for event in events], ["inner", "inner", "outer"], "Spans are written when they end")
+        outer_event = events[2]
+        self.assertEqual(outer_event["args"]["objects"], 5, "Counts got accumulated")
+        self.assertIn(SPAN_CPU_MS, outer_event["args"], "CPU time got recorded")
+        self.assertLessEqual(outer_event["ts"], events[0]["ts"], "Outer span started first")
+        self.assertGreaterEqual(outer_event["dur"], events[0]["dur"], "Outer span encloses the inner span")
+
+    def test_span_cpu_time_of_own_thread(self):
+        def busy():
+            end = time.perf_counter() + 0.3
+            while time.perf_counter() < end:
+                pass
+
+        with Tracer(self._WORKING_DIRECTORY) as tracer:
+            with trace_span("waiting"):
+                # The span only waits while another thread uses the CPU
+                thread = threading.Thread(target=busy)
+                thread.start()
+                thread.join()
+
+        self.assertLess(tracer.summary["waiting"][2], 0.15, "CPU time of other threads is not counted")
+
+    def test_disabled_tracer(self):
+        with Tracer(self._WORKING_DIRECTORY, enabled=False) as tracer:
+            self.assertIsNone(Tracer.get_current_tracer(), "Disabled tracer does not get active")
+
+        self.assertIsNone(tracer.trace_file_path, "No trace file got written")
@@ -33,7 +33,7 @@ import plugins.VirtualSatelliteRestPlugin.virsat_constants as vc
 from test.plugins.VirtualSatelliteRestPlugin.api_mocks import get_mock_api, \
     COMPLEX_ROOT_SEIS, SEI_VIS, SEI_EMPTY, CA_VIS_RESPONSE, CA_NO_VIS_RESPONSE, \
     COMPLEX_ROOT_DICT, \
-    ROOT_SEI_COMPLEX_RESPONSE, SEI_VIS_RESPONSE, SEI_VIS_DICT, CA_VIS_DICT
+    SEI_VIS_RESPONSE, SEI_VIS_DICT, CA_VIS_DICT
 from plugins.VirtualSatelliteRestPlugin.api_kinds import SEIS, DEFAULT, CAS
 
 
@@ -48,7 +48,7 @@ class TestExorter(TestCase):
         mock_api[DEFAULT].get_root_seis.return_value = COMPLEX_ROOT_SEIS
         mock_api[SEIS].get_sei.side_effect = [
             SEI_EMPTY, SEI_VIS,  # Initial tree crawl
-            ROOT_SEI_COMPLEX_RESPONSE, SEI_VIS_RESPONSE  # Recurse products
+            SEI_VIS_RESPONSE  # Recurse products, only the renamed sei is fetched
         ]
         mock_api[CAS].get_ca.side_effect = [
             CA_VIS_RESPONSE, CA_NO_VIS_RESPONSE,  # Initial tree crawl
@@ -59,11 +59,14 @@ class TestExorter(TestCase):
         # Simulate changes that should be reflected on the api later:
         # Change the product information
         root_dict[jd.JSON_PRODUCTS][jd.JSON_ELEMNT_CHILDREN][0][jd.JSON_ELEMENT_POS_X] = 0.0
+        root_dict[jd.JSON_PRODUCTS][jd.JSON_ELEMNT_CHILDREN][0][jd.JSON_ELEMENT_NAME] = "seiVisRenamed"
         root_dict[jd.JSON_PARTS][0][jd.JSON_ELEMENT_LENGTH_X] = 0.0
         exporter.exportFromDict(root_dict, mock_api, "")
 
         # assert correct api calls:
-        mock_api[SEIS].put_sei.assert_called_with(SEI_VIS_DICT, '', _preload_content=False, sync=False)
+        sei_changes = deepcopy(SEI_VIS_DICT)
+        sei_changes[vc.NAME] = "seiVisRenamed"
+        mock_api[SEIS].put_sei.assert_called_once_with(sei_changes, '', _preload_content=False, sync=False)
 
         dict_changes = deepcopy(CA_VIS_DICT)
         dict_changes[vc.SIZE_X][vc.VALUE] = 0.0
@@ -84,11 +87,10 @@ class TestExorter(TestCase):
             call.get_sei('seiVis', '', sync=False),
 
             # Recurse products
-            call.get_sei('rootSeiComplex', '', _preload_content=False, sync=False),
             call.get_sei('seiVis', '', _preload_content=False, sync=False),
 
             # Update product data
-            call.put_sei(SEI_VIS_DICT, '', _preload_content=False, sync=False),
+            call.put_sei(sei_changes, '', _preload_content=False, sync=False),
         ]
         mock_api[SEIS].assert_has_calls(seis_calls)
 
@@ -96,13 +98,31 @@ class TestExorter(TestCase):
             # Crawl the tree
             call.get_ca('caNoVis', '', _preload_content=False, sync=False),
 
-            # Update part data of ca
             call.get_ca('caVis', '', _preload_content=False, sync=False),
-            # Here we will also see the product changes because it is the same object in the
-            # exporter and it will be observed after all operations
-            call.put_ca(dict_changes, '', _preload_content=False, sync=False),
 
-            # Update product data
+            # Part and product data of the ca are put together
             call.put_ca(dict_changes, '', _preload_content=False, sync=False),
         ]
         mock_api[CAS].assert_has_calls(cas_calls)
+        mock_api[CAS].put_ca.assert_called_once()
+        self.assertEqual(exporter.skipped_writes, 0, "Nothing skipped")
+
+    def test_exportFromDict_unchanged(self):
+        mock_api = get_mock_api()
+        exporter = VirSatRestExporter()
+
+        mock_api[DEFAULT].get_root_seis.return_value = COMPLEX_ROOT_SEIS
+        mock_api[SEIS].get_sei.side_effect = [SEI_EMPTY, SEI_VIS]
+        mock_api[CAS].get_ca.side_effect = [CA_VIS_RESPONSE, CA_NO_VIS_RESPONSE]
+
+        # Export the imported data again, values only differ by rounding noise
+        root_dict = deepcopy(COMPLEX_ROOT_DICT)
+        root_dict[jd.JSON_PRODUCTS][jd.JSON_ELEMNT_CHILDREN][0][jd.JSON_ELEMENT_ROT_X] += 1e-12
+        exporter.exportFromDict(root_dict, mock_api, "")
+
+        mock_api[CAS].put_ca.assert_not_called()
+        mock_api[SEIS].put_sei.assert_not_called()
+        mock_api[DEFAULT].force_synchronize.assert_not_called()
+        self.assertEqual(mock_api[SEIS].get_sei.call_count, 2, "Only the tree crawl fetched seis")
+        # The part ca, the product ca and the product sei
+        self.assertEqual(exporter.skipped_writes, 3, "Counted the skipped writes")
@@ -25,10 +25,11 @@
 #
 from plugins.VirtualSatelliteRestPlugin.importer import VirSatRestImporter
 from test.plugins.VirtualSatelliteRestPlugin.api_mocks import get_mock_api,\
-    COMPLEX_ROOT_SEIS, SEI_VIS, SEI_EMPTY, CA_VIS_RESPONSE, CA_NO_VIS_RESPONSE,\
+    COMPLEX_ROOT_SEIS, SEI_VIS, SEI_EMPTY, CA_VIS_RESPONSE, CA_NO_VIS_RESPONSE, CA_VIS, CA_NO_VIS,\
     ROOT_SEI_COMPLEX, GEOMETRY_BEAN_RESPONSE, COMPLEX_ROOT_DICT
 from test.test_setup import AWorkingDirectoryTest
 import os
+from unittest.mock import patch
 from plugins.VirtualSatelliteRestPlugin.api_kinds import SEIS, DEFAULT, CAS, PROPERTIES
 
 
@@ -54,3 +55,19 @@ class TestImporter(AWorkingDirectoryTest):
         self.assertJsonObjectsEqual(COMPLEX_ROOT_DICT, returned_dict, "Returned JSON as expected")
         stl_file_path = os.path.join(self.getDirectoryFullPath(), 'seiVis.file.stl')
         self.assertTrue(os.path.isfile(stl_file_path), "File exists on FS")
+
+    @patch("plugins.VirtualSatelliteRestPlugin.importer.is_scoped_crawl_enabled", return_value=True)
+    def test_importToDict_scoped(self, mock_scoped):
+        mock_api = get_mock_api()
+        importer = VirSatRestImporter(self.getDirectoryFullPath(), mock_api, "")
+
+        # Set up mock data answered by uuid
+        seis = {sei.uuid: sei for sei in [ROOT_SEI_COMPLEX, SEI_EMPTY, SEI_VIS]}
+        ca_responses = {CA_VIS.uuid: CA_VIS_RESPONSE, CA_NO_VIS.uuid: CA_NO_VIS_RESPONSE}
+        mock_api[SEIS].get_sei.side_effect = lambda uuid, *args, **kwargs: seis[uuid]
+        mock_api[CAS].get_ca.side_effect = lambda uuid, *args, **kwargs: ca_responses[uuid]
+        mock_api[PROPERTIES].get_resource.return_value = GEOMETRY_BEAN_RESPONSE
+
+        returned_dict = importer.importToDict(ROOT_SEI_COMPLEX.uuid)
+        self.assertJsonObjectsEqual(COMPLEX_ROOT_DICT, returned_dict, "Returned JSON as expected")
+        mock_api[DEFAULT].get_root_seis.assert_not_called()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Virtual Satellite 4 - FreeCAD module
+#
+# Copyright (C) 2019 by
+#
+#    DLR (German Aerospace Center),
+#    Software for Space Systems and interactive Visualization
+#    Braunschweig, Germany
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+#
+
+import os
+from unittest.mock import Mock
+from test.test_setup import AWorkingDirectoryTest
+from test.plugins.VirtualSatelliteRestPlugin.api_mocks import get_mock_api, ROOT_SEI_CHILD, ROOT_SEI_EMPTY, \
+    ROOT_SEI_EMPTY_RESPONSE, ROOT_SEI_CHILD_RESPONSE, SEI_EMPTY_RESPONSE, SEI_EMPTY
+from plugins.VirtualSatelliteRestPlugin.rest_cache import RestCache, HTTP_NOT_MODIFIED
+from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler
+from plugins.VirtualSatelliteRestPlugin.api_kinds import SEIS, CAS, DEFAULT
+
+
+class TestRestCache(AWorkingDirectoryTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setUpDirectory("RestCache/")
+        cls._WORKING_DIRECTORY = cls.getDirectoryFullPath()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def test_get_with_ttl(self):
+        cache = RestCache(self._WORKING_DIRECTORY, "ttl", ttl=1000)
+        fetch = Mock(return_value=(200, {"uuid": "sei"}, {}))
+
+        self.assertEqual(cache.get(SEIS, "sei", fetch), {"uuid": "sei"}, "Fetched the data")
+        self.assertEqual(cache.get(SEIS, "sei", fetch), {"uuid": "sei"}, "Used the cached data")
+        self.assertEqual(fetch.call_count, 1, "Fresh entries are not fetched again")
+        self.assertEqual(cache.hits, 1, "Counted the hit")
+
+        # Cache is persisted
+        cache.save()
+        cache = RestCache(self._WORKING_DIRECTORY, "ttl", ttl=1000)
+        self.assertEqual(cache.get(SEIS, "sei", fetch), {"uuid": "sei"}, "Used the persisted data")
+        self.assertEqual(fetch.call_count, 1, "Persisted entries are not fetched again")
+
+        # Invalidated entries are fetched again
+        cache.invalidate(SEIS, "sei")
+        fetch.return_value = (200, {"uuid": "sei", "name": "changed"}, {})
+        self.assertEqual(cache.get(SEIS, "sei", fetch), {"uuid": "sei", "name": "changed"}, "Fetched the data again")
+
+    def test_get_with_revalidation(self):
+        cache = RestCache(self._WORKING_DIRECTORY, "revalidation", ttl=0)
+        fetch = Mock(return_value=(200, {"uuid": "ca"}, {"ETag": "v1", "Last-Modified": "yesterday"}))
+        cache.get(SEIS, "ca", fetch)
+        fetch.assert_called_with({})
+
+        # Expired entries are revalidated with the stored validators
+        fetch.return_value = (HTTP_NOT_MODIFIED, None, {})
+        self.assertEqual(cache.get(SEIS, "ca", fetch), {"uuid": "ca"}, "Kept the unchanged data")
+        fetch.assert_called_with({"If-None-Match": "v1", "If-Modified-Since": "yesterday"})
+        self.assertEqual(cache.revalidations, 1, "Counted the revalidation")
+
+        # Changed entries are replaced
+        fetch.return_value = (200, {"uuid": "ca", "name": "changed"}, {"ETag": "v2"})
+        self.assertEqual(cache.get(SEIS, "ca", fetch), {"uuid": "ca", "name": "changed"}, "Replaced the data")
+        cache.get(SEIS, "ca", fetch)
+        fetch.assert_called_with({"If-None-Match": "v2"})
+
+    def test_get_with_validators_ignores_ttl(self):
+        cache = RestCache(self._WORKING_DIRECTORY, "validators", ttl=1000)
+        fetch = Mock(return_value=(200, {"uuid": "sei"}, {"ETag": "v1"}))
+        cache.get(SEIS, "sei", fetch)
+
+        # A fresh entry with validators is still revalidated
+        fetch.return_value = (HTTP_NOT_MODIFIED, None, {})
+        self.assertEqual(cache.get(SEIS, "sei", fetch), {"uuid": "sei"}, "Kept the unchanged data")
+        fetch.assert_called_with({"If-None-Match": "v1"})
+        self.assertEqual(cache.hits, 0, "Did not use the entry without asking the server")
+        self.assertEqual(cache.revalidations, 1, "Counted the revalidation")
+
+    def test_prune(self):
+        cache = RestCache(self._WORKING_DIRECTORY, "prune", ttl=1000)
+        fetch = Mock(return_value=(200, {"uuid": "element"}, {}))
+        cache.get(SEIS, "kept", fetch)
+        cache.get(SEIS, "deleted", fetch)
+        cache.get(CAS, "ca", fetch)
+        cache.save()
+
+        cache = RestCache(self._WORKING_DIRECTORY, "prune", ttl=1000)
+        cache.get(SEIS, "kept", fetch)
+        self.assertEqual(cache.prune([SEIS]), 1, "Dropped the sei which was not seen")
+        self.assertEqual(len(cache), 2, "Kept the seen sei and the entries of other kinds")
+
+        cache.invalidate(SEIS, "kept")
+        cache.invalidate(CAS, "ca")
+        cache.save()
+
+    def test_crawl_raw_seis_with_cache(self):
+        cache = RestCache(self._WORKING_DIRECTORY, "crawl", ttl=1000)
+        responses = {
+            ROOT_SEI_EMPTY.uuid: ROOT_SEI_EMPTY_RESPONSE,
+            ROOT_SEI_CHILD.uuid: ROOT_SEI_CHILD_RESPONSE,
+            SEI_EMPTY.uuid: SEI_EMPTY_RESPONSE
+        }
+
+        def call_api(resource_path, method, path_params, *args, **kwargs):
+            response = responses[path_params['seiUuid']]
+            return Mock(status=200, data=response.data, getheaders=Mock(return_value={}))
+
+        mock_api = get_mock_api()
+        mock_api[SEIS].api_client = Mock(spec=['call_api'])
+        mock_api[SEIS].api_client.call_api.side_effect = call_api
+        mock_api[DEFAULT].get_root_seis.return_value = [ROOT_SEI_EMPTY, ROOT_SEI_CHILD]
+
+        crawler = TreeCrawler(cache=cache)
+        root_seis, seis = crawler.crawl_raw_seis(mock_api, '')
+        self.assertListEqual([*seis.keys()], [ROOT_SEI_EMPTY.uuid, ROOT_SEI_CHILD.uuid, SEI_EMPTY.uuid])
+        self.assertEqual(mock_api[SEIS].api_client.call_api.call_count, 3, "Fetched every sei once")
+        self.assertTrue(os.path.isfile(cache.path), "Saved the cache")
+
+        # A repeated crawl doesn't fetch the seis again
+        root_seis, seis = TreeCrawler(cache=RestCache(self._WORKING_DIRECTORY, "crawl", ttl=1000)).crawl_raw_seis(mock_api, '')
+        self.assertListEqual([*root_seis.keys()], [ROOT_SEI_EMPTY.uuid, ROOT_SEI_CHILD.uuid])
+        self.assertListEqual([*seis.keys()], [ROOT_SEI_EMPTY.uuid, ROOT_SEI_CHILD.uuid, SEI_EMPTY.uuid])
+        self.assertEqual(mock_api[SEIS].api_client.call_api.call_count, 3, "Used the cached seis")
+        mock_api[SEIS].get_sei.assert_not_called()
+
+        # A full crawl drops the seis which got deleted on the server
+        mock_api[DEFAULT].get_root_seis.return_value = [ROOT_SEI_EMPTY]
+        cache = RestCache(self._WORKING_DIRECTORY, "crawl", ttl=1000)
+        TreeCrawler(cache=cache).crawl_raw_seis(mock_api, '')
+        self.assertEqual(len(RestCache(self._WORKING_DIRECTORY, "crawl", ttl=1000)), 1, "Pruned the deleted seis")
@@ -24,8 +24,9 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 #
 import unittest
-from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler
-from test.plugins.VirtualSatelliteRestPlugin.api_mocks import get_mock_api,\
+from plugins.VirtualSatelliteRestPlugin.tree_crawler import TreeCrawler, CrawlSession
+from plugins.VirtualSatelliteRestPlugin.generated_api.v0_0_1.swagger_client import ApiClient
+from test.plugins.VirtualSatelliteRestPlugin.api_mocks import get_mock_api, create_response,\
     ROOT_SEI_EMPTY, SEI_EMPTY_RESPONSE,\
     ROOT_SEI_CHILD_RESPONSE, ROOT_SEI_EMPTY_RESPONSE, COMPLEX_ROOT_SEIS,\
     SEI_VIS, ROOT_SEI_COMPLEX, CA_VIS_RESPONSE, CA_VIS, ROOT_SEI_CAS,\
@@ -88,3 +89,80 @@ class TestTreeCrawler(unittest.TestCase):
         root_seis, seis = crawler.crawl_raw_seis(mock_api, '')
         self.assertListEqual([*root_seis.keys()], [ROOT_SEI_EMPTY.uuid, ROOT_SEI_CHILD.uuid])
         self.assertListEqual([*seis.keys()], [ROOT_SEI_EMPTY.uuid, ROOT_SEI_CHILD.uuid, SEI_EMPTY.uuid])
+
+    def test_crawl_tree_concurrent(self):
+        crawler = TreeCrawler(max_workers=4)
+        mock_api = get_mock_api()
+
+        # Requests may be issued in any order, therefore answer them by uuid
+        seis = {sei.uuid: sei for sei in [SEI_EMPTY, SEI_VIS]}
+        ca_responses = {CA_VIS.uuid: CA_VIS_RESPONSE, CA_NO_VIS.uuid: CA_NO_VIS_RESPONSE}
+        mock_api[DEFAULT].get_root_seis.return_value = COMPLEX_ROOT_SEIS
+        mock_api[SEIS].get_sei.side_effect = lambda uuid, *args, **kwargs: seis[uuid]
+        mock_api[CAS].get_ca.side_effect = lambda uuid, *args, **kwargs: ca_responses[uuid]
+
+        root_seis, seis, cas, visualisations = crawler.crawl_tree(mock_api, '')
+        self.assertListEqual([*root_seis.keys()], [ROOT_SEI_COMPLEX.uuid, ROOT_SEI_EMPTY.uuid])
+        self.assertListEqual([*seis.keys()], [ROOT_SEI_COMPLEX.uuid, SEI_EMPTY.uuid, SEI_VIS.uuid, ROOT_SEI_EMPTY.uuid])
+        self.assertListEqual([*cas.keys()], [CA_NO_VIS.uuid, CA_VIS.uuid])
+        self.assertListEqual([*visualisations.keys()], [CA_VIS.uuid])
+
+        # Raw crawl answers by uuid as well
+        responses = {
+            ROOT_SEI_EMPTY.uuid: ROOT_SEI_EMPTY_RESPONSE,
+            ROOT_SEI_CHILD.uuid: ROOT_SEI_CHILD_RESPONSE,
+            SEI_EMPTY.uuid: SEI_EMPTY_RESPONSE
+        }
+        mock_api[DEFAULT].get_root_seis.return_value = [ROOT_SEI_EMPTY, ROOT_SEI_CHILD]
+        mock_api[SEIS].get_sei.side_effect = lambda uuid, *args, **kwargs: responses[uuid]
+        root_seis, seis = crawler.crawl_raw_seis(mock_api, '')
+        self.assertListEqual([*root_seis.keys()], [ROOT_SEI_EMPTY.uuid, ROOT_SEI_CHILD.uuid])
+        self.assertListEqual([*seis.keys()], [ROOT_SEI_EMPTY.uuid, ROOT_SEI_CHILD.uuid, SEI_EMPTY.uuid])
+
+    def test_crawl_with_session(self):
+        session = CrawlSession()
+        mock_api = get_mock_api()
+        api_client = ApiClient()
+        mock_api[SEIS].api_client = api_client
+
+        # The raw responses contain the complete seis
+        responses = {sei.uuid: create_response(api_client.sanitize_for_serialization(sei))
+                     for sei in [ROOT_SEI_COMPLEX, ROOT_SEI_EMPTY, SEI_EMPTY, SEI_VIS]}
+        ca_responses = {CA_VIS.uuid: CA_VIS_RESPONSE, CA_NO_VIS.uuid: CA_NO_VIS_RESPONSE}
+        mock_api[DEFAULT].get_root_seis.return_value = COMPLEX_ROOT_SEIS
+        mock_api[SEIS].get_sei.side_effect = lambda uuid, *args, **kwargs: responses[uuid]
+        mock_api[CAS].get_ca.side_effect = lambda uuid, *args, **kwargs: ca_responses[uuid]
+
+        # First crawl for the dialog, then for the import
+        root_seis, seis = TreeCrawler(session=session).crawl_raw_seis(mock_api, '')
+        self.assertListEqual([*seis.keys()], [ROOT_SEI_COMPLEX.uuid, SEI_EMPTY.uuid, SEI_VIS.uuid, ROOT_SEI_EMPTY.uuid])
+        self.assertEqual(mock_api[SEIS].get_sei.call_count, 4, "Fetched every sei")
+
+        root_seis, seis, cas, visualisations = TreeCrawler(session=session).crawl_tree(mock_api, '')
+        self.assertListEqual([*root_seis.keys()], [ROOT_SEI_COMPLEX.uuid, ROOT_SEI_EMPTY.uuid])
+        self.assertListEqual([*seis.keys()], [ROOT_SEI_COMPLEX.uuid, SEI_EMPTY.uuid, SEI_VIS.uuid, ROOT_SEI_EMPTY.uuid])
+        self.assertEqual(seis[SEI_VIS.uuid].category_assignments[0].uuid, CA_VIS.uuid, "Converted the raw sei")
+        self.assertListEqual([*cas.keys()], [CA_NO_VIS.uuid, CA_VIS.uuid])
+        self.assertListEqual([*visualisations.keys()], [CA_VIS.uuid])
+
+        self.assertEqual(mock_api[SEIS].get_sei.call_count, 4, "No sei fetched twice")
+        self.assertEqual(mock_api[DEFAULT].get_root_seis.call_count, 1, "Root seis fetched once")
+        self.assertEqual(session.count(CAS), 2, "Session holds the cas")
+
+    def test_crawl_subtree(self):
+        crawler = TreeCrawler()
+        mock_api = get_mock_api()
+
+        seis = {sei.uuid: sei for sei in [ROOT_SEI_COMPLEX, SEI_EMPTY, SEI_VIS, ROOT_SEI_EMPTY]}
+        ca_responses = {CA_VIS.uuid: CA_VIS_RESPONSE, CA_NO_VIS.uuid: CA_NO_VIS_RESPONSE}
+        mock_api[SEIS].get_sei.side_effect = lambda uuid, *args, **kwargs: seis[uuid]
+        mock_api[CAS].get_ca.side_effect = lambda uuid, *args, **kwargs: ca_responses[uuid]
+
+        # Crawling a child only fetches it and its parents
+        root_seis, seis, cas, visualisations = crawler.crawl_subtree(mock_api, '', SEI_VIS.uuid)
+        self.assertListEqual([*root_seis.keys()], [ROOT_SEI_COMPLEX.uuid])
+        self.assertListEqual([*seis.keys()], [ROOT_SEI_COMPLEX.uuid, SEI_VIS.uuid])
+        self.assertListEqual([*cas.keys()], [CA_NO_VIS.uuid, CA_VIS.uuid])
+        self.assertListEqual([*visualisations.keys()], [CA_VIS.uuid])
+        self.assertEqual(mock_api[SEIS].get_sei.call_count, 2, "Siblings are not fetched")
+        mock_api[DEFAULT].get_root_seis.assert_not_called()